@@ -1,3 +1,4 @@
+from functools import wraps
 from typing import Any, AsyncGenerator
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
@@ -8,9 +9,11 @@ except ImportError:
     create_openai_tools_agent = None
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.tools import BaseTool, StructuredTool
 
 from config import get_settings
 from tools.registry import get_tools_by_names
+from utils.llm import use_agent_model
 
 settings = get_settings()
 
@@ -31,7 +34,7 @@ class AgentExecutor:
         self.tool_names = tool_names or []
 
         self.llm = self._create_llm()
-        self.tools = get_tools_by_names(self.tool_names)
+        self.tools = [self._with_agent_model(t) for t in get_tools_by_names(self.tool_names)]
         self.agent = self._create_agent()
 
     def _create_llm(self):
@@ -56,6 +59,38 @@ class AgentExecutor:
                 api_key=settings.openai_api_key,
             )
 
+    def _with_agent_model(self, tool: BaseTool) -> BaseTool:
+        """
+        Copy of a registry tool whose LLM calls follow this agent's model
+        (utils/llm.py). The model is set and reset around each tool call, in
+        the context the call runs in, rather than around the whole agent run:
+        a streaming generator can be closed from another context on client
+        disconnect, where resetting the ContextVar would raise.
+        """
+        if not isinstance(tool, StructuredTool):
+            return tool
+        model = self.model_name
+        update = {}
+        if tool.func:
+            func = tool.func
+
+            @wraps(func)
+            def run(*args, **kwargs):
+                with use_agent_model(model):
+                    return func(*args, **kwargs)
+
+            update["func"] = run
+        if tool.coroutine:
+            coroutine = tool.coroutine
+
+            @wraps(coroutine)
+            async def arun(*args, **kwargs):
+                with use_agent_model(model):
+                    return await coroutine(*args, **kwargs)
+
+            update["coroutine"] = arun
+        return tool.model_copy(update=update)
+
     def _create_agent(self):
         """Create LangChain agent"""
         prompt = ChatPromptTemplate.from_messages([
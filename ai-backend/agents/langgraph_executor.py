@@ -18,6 +18,7 @@ from langgraph.checkpoint.memory import MemorySaver
 
 from config import get_settings
 from tools.registry import get_tools_by_names, get_all_tools
+from utils.llm import use_agent_model
 
 settings = get_settings()
 
@@ -228,8 +229,9 @@ class LangGraphAgentExecutor:
 
             if tool:
                 try:
-                    # Execute tool
-                    result = await tool.ainvoke(tool_args)
+                    # Execute tool (LLM calls inside it follow this agent's model)
+                    with use_agent_model(self.model_name):
+                        result = await tool.ainvoke(tool_args)
                     tool_results.append(
                         ToolMessage(
                             content=str(result),
@@ -485,6 +487,8 @@ class DocsAgentExecutor(LangGraphAgentExecutor):
     def __init__(self, model: str = "gpt-4o", **kwargs):
         tool_names = [
             "ai_docs_create",
+            "ai_docs_bulk_create",
+            "ai_docs_bulk_status",
             "ai_docs_search",
             "ai_docs_get",
             "ai_docs_analyze",
@@ -497,6 +501,7 @@ class DocsAgentExecutor(LangGraphAgentExecutor):
 
 주요 기능:
 - 문서 생성: 분석, 요약, 보고서, 회의록 등 다양한 유형의 문서 작성
+- 대량 등록: 여러 문서를 한 번에 등록하고 요약은 백그라운드에서 생성
 - 문서 검색: 키워드 기반 문서 검색
 - 문서 분석: AI 기반 문서 내용 분석 및 요약
 - 문서 관리: 문서 수정, 삭제, 목록 조회
@@ -554,10 +559,13 @@ class EmailAgentExecutor(LangGraphAgentExecutor):
             "email_get",
             "email_list",
             "email_analyze",
+            "email_triage_batch",
             "email_translate",
             "email_draft_reply",
             "email_search",
             "email_mark_read",
+            "email_bulk_mark_read",
+            "email_bulk_label",
             "email_summarize_inbox",
         ]
 
@@ -569,6 +577,10 @@ class EmailAgentExecutor(LangGraphAgentExecutor):
 - 이메일 번역: 다국어 이메일 번역
 - 답장 작성: 적절한 톤의 답장 초안 작성
 - 받은 편지함 요약: 전체 받은 편지함 요약
+- 일괄 정리: 여러 이메일 읽음 표시/라벨 변경
+
+여러 이메일을 읽음 처리하거나 라벨을 바꿀 때는 email_mark_read를 반복 호출하지 말고
+email_bulk_mark_read / email_bulk_label을 id 목록이나 필터(발신자, 폴더, 카테고리, 기간)로 한 번만 호출하세요.
 
 이메일 분석 시 중요도와 필요한 조치를 명확히 제시하세요.
 답장 작성 시 상황에 맞는 적절한 톤을 사용하세요."""
@@ -541,7 +541,7 @@ async def list_agent_types():
                 "name": "Documents Agent",
                 "description": "문서 생성, 검색, 분석 전문 에이전트",
                 "default_model": "gpt-4o",
-                "tools": ["ai_docs_create", "ai_docs_search", "ai_docs_get", "ai_docs_analyze", "ai_docs_update", "ai_docs_list", "ai_docs_delete"],
+                "tools": ["ai_docs_create", "ai_docs_bulk_create", "ai_docs_bulk_status", "ai_docs_search", "ai_docs_get", "ai_docs_analyze", "ai_docs_update", "ai_docs_list", "ai_docs_delete"],
             },
             {
                 "type": "sheet",
@@ -555,7 +555,7 @@ async def list_agent_types():
                 "name": "Email Agent",
                 "description": "이메일 관리 및 AI 분석 전문 에이전트",
                 "default_model": "grok-3-fast",
-                "tools": ["email_get", "email_list", "email_analyze", "email_translate", "email_draft_reply", "email_search", "email_mark_read", "email_summarize_inbox"],
+                "tools": ["email_get", "email_list", "email_analyze", "email_triage_batch", "email_translate", "email_draft_reply", "email_search", "email_mark_read", "email_bulk_mark_read", "email_bulk_label", "email_summarize_inbox"],
             },
             {
                 "type": "multi",
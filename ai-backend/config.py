@@ -23,6 +23,20 @@ class Settings(BaseSettings):
     # Models
     default_model: str = "gpt-4o"
     default_temperature: float = 0.7
+    # Model for light tool work (summaries, priority tags); empty = per-provider default in utils/llm.py
+    fast_model: str = ""
+    # Cap on tokens for sheet rows sampled into analysis/query prompts; 0 = sized to the model only
+    sheet_preview_max_tokens: int = 0
+
+    # Caches
+    sheet_cache_max_mb: int = 256
+
+    # Email pre-analysis worker
+    email_worker_enabled: bool = False
+    email_worker_interval_seconds: int = 30
+    email_worker_batch_size: int = 100
+    # Translation target when the user has no language preference
+    email_default_language: str = "ko"
 
     class Config:
         env_file = "../.env.local"
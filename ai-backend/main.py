@@ -5,7 +5,13 @@ from contextlib import asynccontextmanager
 from config import get_settings
 from agents.router import router as agents_router
 from tools.router import router as tools_router
+from tools.docs_router import router as docs_router
+from tools.sheet_router import router as sheet_router
+from tools.email_router import router as email_router
+from tools.email_worker import start_worker as start_email_worker, stop_worker as stop_email_worker
 from skills.youtube_router import router as youtube_router
+from utils.write_behind import flush_all
+from utils.supabase import close_supabase_client
 
 settings = get_settings()
 
@@ -14,9 +20,14 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting AI Backend...")
+    if settings.email_worker_enabled:
+        start_email_worker()
     yield
     # Shutdown
     print("Shutting down AI Backend...")
+    stop_email_worker()
+    flush_all()
+    close_supabase_client()
 
 
 app = FastAPI(
@@ -38,6 +49,9 @@ app.add_middleware(
 # Routers
 app.include_router(agents_router, prefix="/api/agents", tags=["agents"])
 app.include_router(tools_router, prefix="/api/tools", tags=["tools"])
+app.include_router(docs_router, prefix="/api/docs", tags=["docs"])
+app.include_router(sheet_router, prefix="/api/sheets", tags=["sheets"])
+app.include_router(email_router, prefix="/api/email", tags=["email"])
 app.include_router(youtube_router, prefix="/api/youtube", tags=["youtube"])
 
 
@@ -0,0 +1,147 @@
+"""
+Sheet Import/Export Benchmark
+CSV/XLSX 스트리밍 파이프라인 처리량과 최대 메모리 측정
+
+Usage (from ai-backend/):
+    python scripts/benchmark_sheet_io.py --rows 1000000
+    python scripts/benchmark_sheet_io.py --rows 100000 --xlsx
+    python scripts/benchmark_sheet_io.py --rows 1000000 --sheet-id <uuid>   # real import into Supabase
+"""
+from datetime import date, timedelta
+from itertools import chain, islice
+import argparse
+import csv
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.sheet_io import (  # noqa: E402
+    IMPORT_BATCH_SIZE,
+    INFER_SAMPLE_ROWS,
+    _batches,
+    convert_rows,
+    import_records,
+    iter_csv_export,
+    iter_csv_rows,
+    iter_xlsx_rows,
+    plan_columns,
+    write_xlsx_export,
+)
+
+HEADER = ["날짜", "지역", "상품", "수량", "매출", "할인", "반품"]
+REGIONS = ["서울", "부산", "대구", "인천", "광주", "대전"]
+
+
+def _records(rows: int):
+    start = date(2020, 1, 1)
+    for i in range(rows):
+        yield [
+            (start + timedelta(days=i % 1500)).isoformat(),
+            random.choice(REGIONS),
+            f"SKU-{random.randint(1, 5000):05d}",
+            random.randint(1, 50),
+            round(random.uniform(1000, 500000), 2),
+            "" if i % 5 else round(random.random() * 0.3, 3),
+            "true" if i % 97 == 0 else "false",
+        ]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Peak RSS after imports, before any data is generated or parsed (interpreter + numpy/openpyxl)
+_baseline_rss_mb = 0.0
+
+
+def _report(label: str, rows: int, elapsed: float) -> None:
+    peak = _peak_rss_mb()
+    print(
+        f"{label:<28} {rows:>10,} rows  {elapsed:8.2f}s  {rows / elapsed:>12,.0f} rows/s  "
+        f"peak RSS {peak:,.0f} MB (+{peak - _baseline_rss_mb:,.0f} MB over baseline)"
+    )
+
+
+def generate_csv(path: str, rows: int) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(_records(rows))
+
+
+def generate_xlsx(path: str, rows: int) -> None:
+    sheet = {"name": "bench", "columns": [{"id": str(i), "name": name} for i, name in enumerate(HEADER)]}
+    source = ({str(i): v for i, v in enumerate(record)} for record in _records(rows))
+    with write_xlsx_export(sheet, source) as output, open(path, "wb") as f:
+        f.write(output.read())
+
+
+def bench_parse(label: str, records) -> list[dict]:
+    """Parse → infer → convert → batch, without a database"""
+    started = time.perf_counter()
+    records = iter(records)
+    header = next(records)
+    sample = list(islice(records, INFER_SAMPLE_ROWS))
+    columns, mapping = plan_columns(header, sample, [])
+
+    count = 0
+    for batch in _batches(convert_rows(chain(sample, records), mapping), IMPORT_BATCH_SIZE):
+        count += len(batch)
+    _report(label, count, time.perf_counter() - started)
+    return columns
+
+
+def bench_export(rows: int, columns: list[dict]) -> None:
+    sheet = {"name": "bench", "columns": columns}
+    source = ({c["id"]: v for c, v in zip(columns, record)} for record in _records(rows))
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in iter_csv_export(sheet, source))
+    _report(f"export csv ({size / 1e6:,.0f} MB)", rows, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--xlsx", action="store_true", help="Also benchmark XLSX parsing")
+    parser.add_argument("--sheet-id", help="Import the generated CSV into this sheet via Supabase")
+    args = parser.parse_args()
+
+    # ru_maxrss only ever grows, so each later figure is the peak up to that step
+    global _baseline_rss_mb
+    _baseline_rss_mb = _peak_rss_mb()
+    print(f"baseline peak RSS {_baseline_rss_mb:,.0f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "bench.csv")
+        started = time.perf_counter()
+        generate_csv(csv_path, args.rows)
+        print(f"generated {csv_path} ({os.path.getsize(csv_path) / 1e6:,.0f} MB) in {time.perf_counter() - started:.1f}s")
+
+        with open(csv_path, "rb") as f:
+            columns = bench_parse("parse csv", iter_csv_rows(f))
+
+        if args.xlsx:
+            xlsx_path = os.path.join(tmp, "bench.xlsx")
+            generate_xlsx(xlsx_path, args.rows)
+            with open(xlsx_path, "rb") as f:
+                bench_parse("parse xlsx", iter_xlsx_rows(f))
+
+        bench_export(args.rows, columns)
+
+        if args.sheet_id:
+            from utils.supabase import get_supabase_client
+
+            with open(csv_path, "rb") as f:
+                result = import_records(get_supabase_client(), args.sheet_id, iter_csv_rows(f))
+            _report("import csv → supabase", result["imported_rows"], result["elapsed_seconds"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Document Search Ranking Checks
+tools/docs_search_local.py(SQLite FTS5 대체 구현)로 search_project_documents의 랭킹 규칙 확인
+(제목 > 요약 > 본문 가중치, 접두어 AND 검색, 필터, 하이브리드 가중치, 재등록) - Supabase 불필요
+
+Usage (from ai-backend/):
+    python scripts/check_docs_search.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.docs_search_local import LocalDocumentIndex  # noqa: E402
+
+PROJECT = "p1"
+
+
+def _doc(doc_id: str, title: str, content: str, **fields) -> dict:
+    return {"id": doc_id, "project_id": PROJECT, "title": title, "content": content, **fields}
+
+
+def _ids(index: LocalDocumentIndex, query: str = "", **params) -> list[str]:
+    return [r["id"] for r in index.search({"p_project_id": PROJECT, "p_query": query, **params})]
+
+
+def _check(label: str, condition: bool, detail=None) -> bool:
+    print(f"{'ok  ' if condition else 'FAIL'} {label}" + ("" if condition or detail is None else f": {detail}"))
+    return condition
+
+
+def build_index() -> LocalDocumentIndex:
+    index = LocalDocumentIndex()
+    filler = " ".join(["background"] * 40)
+    index.upsert(_doc("title", "Revenue forecast", f"quarterly plan {filler}", created_at="2026-01-01"))
+    index.upsert(_doc("summary", "Quarterly plan", filler, summary="revenue outlook", created_at="2026-01-02"))
+    index.upsert(_doc("content", "Quarterly plan", f"the revenue line {filler}", created_at="2026-01-03"))
+    index.upsert(_doc("draft", "Revenue draft", "revenue", status="draft", created_at="2026-01-04"))
+    index.upsert(_doc("memo", "Revenue memo", "revenue", doc_type="memo", created_at="2026-01-05"))
+    index.upsert({**_doc("other", "Revenue forecast", "revenue"), "project_id": "p2"})
+    index.upsert(_doc("analysis", "Churn analysis", "customer retention", created_at="2026-01-06"), [1.0, 0.0])
+    index.upsert(_doc("vector", "Onboarding notes", "welcome checklist", created_at="2026-01-07"), [0.9, 0.1])
+    index.upsert(_doc("far", "Office move", "new desks", created_at="2026-01-08"), [0.0, 1.0])
+    return index
+
+
+def check_text_ranking(index: LocalDocumentIndex) -> list[bool]:
+    ranked = _ids(index, "revenue")
+    results = index.search({"p_project_id": PROJECT, "p_query": "revenue"})
+    return [
+        _check(
+            "title match > summary match > content match",
+            [i for i in ranked if i in ("title", "summary", "content")] == ["title", "summary", "content"],
+            ranked,
+        ),
+        _check("text scores are squashed into 0~1", all(0 < r["text_score"] < 1 for r in results), results),
+        _check("prefix terms match longer words", _ids(index, "analy") == ["analysis"], _ids(index, "analy")),
+        _check("all terms must match", _ids(index, "revenue memo") == ["memo"], _ids(index, "revenue memo")),
+        _check("punctuation and quotes are not FTS syntax", _ids(index, '"revenue" (memo*') == ["memo"]),
+        _check("empty query returns nothing without an embedding", _ids(index, "  ") == []),
+    ]
+
+
+def check_filters(index: LocalDocumentIndex) -> list[bool]:
+    ranked = _ids(index, "revenue")
+    return [
+        _check("other projects are excluded", "other" not in ranked, ranked),
+        _check("unpublished documents are excluded", "draft" not in ranked, ranked),
+        _check("doc_type filter", _ids(index, "revenue", p_doc_type="memo") == ["memo"]),
+        _check("match_count limits results", len(_ids(index, "revenue", p_match_count=2)) == 2),
+    ]
+
+
+def check_hybrid(index: LocalDocumentIndex) -> list[bool]:
+    embedding = [1.0, 0.0]
+    semantic = _ids(index, "", p_query_embedding=embedding)
+    text_heavy = _ids(index, "churn", p_query_embedding=embedding, p_text_weight=0.9)
+    vector_heavy = index.search({
+        "p_project_id": PROJECT, "p_query": "desks", "p_query_embedding": embedding, "p_text_weight": 0.1,
+    })
+    text_first = _ids(index, "desks", p_query_embedding=embedding, p_text_weight=0.9)
+    return [
+        _check("vector-only search ranks by cosine similarity", semantic == ["analysis", "vector"], semantic),
+        _check("similarity threshold drops unrelated embeddings", "far" not in semantic, semantic),
+        _check("text and vector hits are merged", text_heavy[0] == "analysis" and "vector" in text_heavy, text_heavy),
+        _check(
+            "score is the weighted sum of text and vector scores",
+            all(abs(r["score"] - (0.1 * r["text_score"] + 0.9 * r["vector_score"])) < 1e-9 for r in vector_heavy),
+            vector_heavy,
+        ),
+        _check("a high text weight puts the text hit first", text_first[0] == "far", text_first),
+        _check(
+            "a low text weight lets similarity outrank the text hit",
+            [r["id"] for r in vector_heavy][0] == "analysis",
+            [r["id"] for r in vector_heavy],
+        ),
+    ]
+
+
+def check_reindex(index: LocalDocumentIndex) -> list[bool]:
+    index.upsert(_doc("memo", "Hiring memo", "interview loop", doc_type="memo", created_at="2026-01-05"))
+    return [
+        _check("re-upserted text replaces the old text", "memo" not in _ids(index, "revenue")),
+        _check("re-upserted document is found by its new text", _ids(index, "interview") == ["memo"]),
+    ]
+
+
+def main() -> None:
+    index = build_index()
+    results = []
+    for check in (check_text_ranking, check_filters, check_hybrid, check_reindex):
+        results += check(index)
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
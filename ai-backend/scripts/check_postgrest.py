@@ -0,0 +1,273 @@
+"""
+PostgREST Client Checks
+utils/postgrest.py의 요청 인코딩(필터, in_ 인용, single, count/HEAD)과 요청 병합, 배치 insert를
+로컬 모의 PostgREST 서버로 확인 (Supabase 불필요)
+
+Usage (from ai-backend/):
+    python scripts/check_postgrest.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.postgrest import APIError, PostgrestClient  # noqa: E402
+
+# Seconds each mock read takes, so concurrent identical reads overlap
+READ_DELAY = 0.2
+
+_requests: list[dict] = []
+_requests_lock = threading.Lock()
+
+
+class _MockPostgrest(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _record(self, body=None) -> dict:
+        url = urlsplit(self.path)
+        request = {
+            "method": self.command,
+            "path": url.path,
+            "params": parse_qsl(url.query, keep_blank_values=True),
+            "prefer": self.headers.get("Prefer"),
+            "accept": self.headers.get("Accept"),
+            "body": body,
+        }
+        with _requests_lock:
+            _requests.append(request)
+        return request
+
+    def _reply(self, status: int, body=None, headers: dict | None = None, raw: bytes | None = None) -> None:
+        data = raw if raw is not None else (b"" if body is None else json.dumps(body).encode())
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def do_GET(self):
+        request = self._record()
+        time.sleep(READ_DELAY)
+        if request["path"].endswith("/missing"):
+            return self._reply(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+        if request["path"].endswith("/broken"):
+            return self._reply(502, raw=b"<html>Bad Gateway</html>")
+        if (request["accept"] or "").startswith("application/vnd.pgrst.object+json"):
+            return self._reply(200, {"id": 1})
+        self._reply(200, [{"id": 1}, {"id": 2}], {"Content-Range": "0-1/42"})
+
+    def do_HEAD(self):
+        self._record()
+        self._reply(200, headers={"Content-Range": "*/7"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        request = self._record(body)
+        if request["path"].startswith("/rest/v1/rpc/"):
+            time.sleep(READ_DELAY)
+            return self._reply(200, 5)
+        if request["path"].endswith("/rejected"):
+            return self._reply(400, {"code": "23502", "message": "null value in column"})
+        if request["path"].endswith("/short"):
+            return self._reply(201, [body[0]])
+        if request["path"].endswith("/empty"):
+            return self._reply(201, raw=b"null")
+        rows = body if isinstance(body, list) else [body]
+        self._reply(201, [{**row, "id": i} for i, row in enumerate(rows)])
+
+    def do_PATCH(self):
+        self._record(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self._reply(200, [])
+
+
+def _take() -> list[dict]:
+    with _requests_lock:
+        taken = list(_requests)
+        _requests.clear()
+    return taken
+
+
+def _check(label: str, condition: bool, detail=None) -> bool:
+    print(f"{'ok  ' if condition else 'FAIL'} {label}" + ("" if condition or detail is None else f": {detail}"))
+    return condition
+
+
+def check_encoding(client: PostgrestClient) -> list[bool]:
+    client.table("email_messages").select("id, subject").eq("account_id", "a").eq("is_read", False).neq(
+        "folder", "Sent"
+    ).gt("position", 10).ilike("subject", "%회의%").is_("ai_analyzed_at", None).order("received_at", desc=True).order(
+        "id"
+    ).range(20, 29).execute()
+    params = _take()[0]["params"]
+
+    client.table("t").select().in_("id", ["plain", "a,b", 'say "hi"', "x.y", 3]).execute()
+    in_filter = dict(_take()[0]["params"])["id"]
+
+    return [
+        _check("select columns are sent without spaces", ("select", "id,subject") in params, params),
+        _check("eq/neq/gt/ilike/is filters", all(p in params for p in [
+            ("account_id", "eq.a"), ("is_read", "eq.false"), ("folder", "neq.Sent"),
+            ("position", "gt.10"), ("subject", "ilike.%회의%"), ("ai_analyzed_at", "is.null"),
+        ]), params),
+        _check("orders are combined into one param", ("order", "received_at.desc,id.asc") in params, params),
+        _check("range becomes offset + limit", ("offset", "20") in params and ("limit", "10") in params, params),
+        _check(
+            "in_ quotes values with reserved characters",
+            in_filter == 'in.(plain,"a,b","say \\"hi\\"","x.y",3)',
+            in_filter,
+        ),
+    ]
+
+
+def check_responses(client: PostgrestClient) -> list[bool]:
+    results = []
+    single = client.table("t").select("*").eq("id", 1).single().execute()
+    request = _take()[0]
+    results.append(_check(
+        "single() asks for an object and returns a dict",
+        request["accept"] == "application/vnd.pgrst.object+json" and single.data == {"id": 1},
+        (request["accept"], single.data),
+    ))
+
+    try:
+        client.table("missing").select("*").single().execute()
+        results.append(_check("single() with no row raises APIError", False, "no error"))
+    except APIError as e:
+        results.append(_check("single() with no row raises APIError", e.status == 406 and e.code == "PGRST116", e))
+
+    try:
+        client.table("broken").select("*").execute()
+        results.append(_check("non-JSON error body raises APIError", False, "no error"))
+    except APIError as e:
+        results.append(_check("non-JSON error body raises APIError", e.status == 502 and "Bad Gateway" in str(e), e))
+
+    counted = client.table("t").select("id", count="exact").limit(2).execute()
+    results.append(_check("count is parsed from Content-Range", counted.count == 42, counted.count))
+
+    head = client.table("t").select("id", count="exact", head=True).execute()
+    request = _take()[-1]
+    results.append(_check(
+        "head=True sends HEAD with Prefer count",
+        request["method"] == "HEAD" and request["prefer"] == "count=exact" and head.count == 7 and head.data == [],
+        (request, head.count, head.data),
+    ))
+
+    client.table("t").upsert([{"a": 1}, {"b": 2}], on_conflict="a").execute()
+    request = _take()[0]
+    results.append(_check(
+        "upsert sends union of columns, on_conflict and merge-duplicates",
+        ("columns", "a,b") in request["params"] and ("on_conflict", "a") in request["params"]
+        and "resolution=merge-duplicates" in request["prefer"],
+        request,
+    ))
+    results.append(_check(
+        "mixed-key rows ask for column defaults, not NULL",
+        "missing=default" in request["prefer"],
+        request["prefer"],
+    ))
+    return results
+
+
+def _concurrently(call, times: int = 8) -> list:
+    with ThreadPoolExecutor(times) as pool:
+        return list(pool.map(lambda _: call(), range(times)))
+
+
+def check_coalescing(client: PostgrestClient) -> list[bool]:
+    results = []
+    _take()
+
+    _concurrently(lambda: client.table("sheets").select("version").eq("id", "s").execute())
+    results.append(_check("plain reads are never coalesced", len(_take()) == 8))
+
+    responses = _concurrently(lambda: client.table("deployed_agents").select("*").eq("id", "a").coalesce().execute())
+    sent = len(_take())
+    responses[0].data[0]["mutated"] = True
+    results.append(_check("opted-in identical reads share one request", sent == 1, sent))
+    results.append(_check(
+        "coalesced callers get their own parsed rows",
+        all("mutated" not in r.data[0] for r in responses[1:]),
+    ))
+
+    _concurrently(lambda: client.table("deployed_agents").update({"name": "x"}).eq("id", "a").coalesce().execute())
+    results.append(_check("writes ignore coalesce()", len(_take()) == 8))
+
+    _concurrently(lambda: client.rpc("search_email_messages", {"p_query": "회의"}, coalesce=True).execute())
+    results.append(_check("coalesce=True RPCs share one request", len(_take()) == 1))
+
+    _concurrently(lambda: client.rpc("sheet_get_column_stats", {"p_sheet_id": "s"}).execute())
+    results.append(_check("other RPCs always go out", len(_take()) == 8))
+    return results
+
+
+def check_batcher(client: PostgrestClient) -> list[bool]:
+    results = []
+    _take()
+
+    async def save(table: str, count: int):
+        batcher = client.batcher(table)
+        return await asyncio.gather(
+            *[batcher.submit({"role": "user", "content": str(i)}) for i in range(count)],
+            return_exceptions=True,
+        )
+
+    rows = asyncio.run(save("agent_chat_history", 30))
+    inserts = _take()
+    results.append(_check("30 concurrent saves become one insert", len(inserts) == 1 and len(inserts[0]["body"]) == 30, len(inserts)))
+    results.append(_check(
+        "each save gets its own row back, in order",
+        [row["content"] for row in rows] == [str(i) for i in range(30)],
+    ))
+
+    failed = asyncio.run(save("rejected", 3))
+    results.append(_check(
+        "a failed batch raises for every caller",
+        all(isinstance(e, APIError) for e in failed) and client.batcher("rejected").stats()["failed"] == 3,
+        failed,
+    ))
+
+    short = asyncio.run(save("short", 3))
+    results.append(_check(
+        "rows missing from the response fail their callers instead of hanging",
+        short[0]["content"] == "0" and all(isinstance(e, APIError) for e in short[1:]),
+        short,
+    ))
+
+    empty = asyncio.run(save("empty", 2))
+    results.append(_check(
+        "a written batch with no rows back resolves to None",
+        empty == [None, None] and client.batcher("empty").stats()["failed"] == 0,
+        empty,
+    ))
+    return results
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockPostgrest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = PostgrestClient(f"http://127.0.0.1:{server.server_address[1]}", "service-key")
+
+    results = []
+    for check in (check_encoding, check_responses, check_coalescing, check_batcher):
+        results += check(client)
+
+    client.close()
+    server.shutdown()
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from .calculator import calculator_tool
 # AI Docs tools - Document management and analysis
 from .ai_docs import (
     ai_docs_create,
+    ai_docs_bulk_create,
+    ai_docs_bulk_status,
     ai_docs_search,
     ai_docs_get,
     ai_docs_analyze,
@@ -32,10 +34,13 @@ from .email import (
     email_get,
     email_list,
     email_analyze,
+    email_triage_batch,
     email_translate,
     email_draft_reply,
     email_search,
     email_mark_read,
+    email_bulk_mark_read,
+    email_bulk_label,
     email_summarize_inbox,
 )
 
@@ -51,6 +56,8 @@ __all__ = [
     "calculator_tool",
     # AI Docs tools
     "ai_docs_create",
+    "ai_docs_bulk_create",
+    "ai_docs_bulk_status",
     "ai_docs_search",
     "ai_docs_get",
     "ai_docs_analyze",
@@ -70,9 +77,12 @@ __all__ = [
     "email_get",
     "email_list",
     "email_analyze",
+    "email_triage_batch",
     "email_translate",
     "email_draft_reply",
     "email_search",
     "email_mark_read",
+    "email_bulk_mark_read",
+    "email_bulk_label",
     "email_summarize_inbox",
 ]
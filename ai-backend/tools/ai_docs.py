@@ -3,23 +3,39 @@ AI Docs Tool - 문서 생성, 검색, 분석 도구
 project_documents 테이블 연동
 """
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Literal, Optional
+import base64
 import json
+import threading
 
 from config import get_settings
 from .registry import register_tool
+from .docs_worker import submit_summary_job, get_summary_job, submit_embedding_refresh
+from utils.cache import LRUCache
+from utils.embeddings import embed_query
+from utils.hashing import content_hash
+from utils.llm import get_llm, model_name
 from utils.supabase import get_supabase_client
+from utils.text import chunk_document, count_tokens, split_sections
 
 settings = get_settings()
 
-# LLM for document analysis
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.3,
-    api_key=settings.openai_api_key,
-)
+
+def _get_llm(tier: str = "default"):
+    """LLM for document analysis: the calling agent's model, else gpt-4o"""
+    return get_llm("gpt-4o", temperature=0.3, tier=tier)
+
+
+DOC_TYPES = ("analysis", "summary", "report", "research", "transcript", "meeting_notes", "deliverable", "other")
+
+# Rows per insert request for bulk ingestion
+BULK_INSERT_CHUNK = 500
+
+summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", "주어진 문서의 핵심 내용을 2-3문장으로 요약해주세요. 요약만 출력하세요."),
+    ("human", "{content}")
+])
 
 
 @tool
@@ -55,11 +71,7 @@ def ai_docs_create(
         # Auto-generate summary if not provided
         if not summary and len(content) > 200:
             try:
-                summary_prompt = ChatPromptTemplate.from_messages([
-                    ("system", "주어진 문서의 핵심 내용을 2-3문장으로 요약해주세요. 요약만 출력하세요."),
-                    ("human", "{content}")
-                ])
-                chain = summary_prompt | llm
+                chain = summary_prompt | _get_llm("fast")
                 result = chain.invoke({"content": content[:3000]})
                 summary = result.content[:500]
             except Exception:
@@ -84,6 +96,7 @@ def ai_docs_create(
 
         if result.data:
             doc = result.data[0]
+            submit_embedding_refresh([doc])
             return json.dumps({
                 "success": True,
                 "document": {
@@ -102,44 +115,152 @@ def ai_docs_create(
         return json.dumps({"success": False, "error": f"문서 생성 오류: {str(e)}"}, ensure_ascii=False)
 
 
+def bulk_create_documents(project_id: str, documents: list[dict], summarize: bool = True) -> dict:
+    """
+    Insert many documents at once and defer summarization to the background worker.
+
+    Args:
+        project_id: Project ID to create documents in
+        documents: [{"title", "content", "doc_type", "summary", "tags", "source_url", "source_type"}, ...]
+        summarize: Generate missing summaries in the background
+
+    Returns:
+        Result dict with created documents and summary job info
+    """
+    if not documents:
+        return {"success": False, "error": "등록할 문서가 없습니다."}
+
+    rows = []
+    for i, doc in enumerate(documents):
+        if not doc.get("title") or not doc.get("content"):
+            return {"success": False, "error": f"{i}번째 문서에 title 또는 content가 없습니다."}
+        doc_type = doc.get("doc_type") or "report"
+        if doc_type not in DOC_TYPES:
+            return {"success": False, "error": f"{i}번째 문서의 doc_type이 올바르지 않습니다: {doc_type}"}
+
+        content = doc["content"]
+        needs_summary = not doc.get("summary") and len(content) > 200
+        rows.append({
+            "project_id": project_id,
+            "title": doc["title"],
+            "content": content,
+            "summary": doc.get("summary"),
+            "doc_type": doc_type,
+            "tags": doc.get("tags") or [],
+            "source_url": doc.get("source_url"),
+            "source_type": doc.get("source_type"),
+            "created_by_type": "agent",
+            "status": "published",
+            "metadata": {"summary_status": "pending"} if needs_summary and summarize else {},
+        })
+
+    client = get_supabase_client()
+
+    created = []
+    for start in range(0, len(rows), BULK_INSERT_CHUNK):
+        result = client.table("project_documents").insert(rows[start:start + BULK_INSERT_CHUNK]).execute()
+        created.extend(result.data or [])
+
+    pending = [
+        {"id": doc["id"], "content": doc["content"]}
+        for doc in created
+        if (doc.get("metadata") or {}).get("summary_status") == "pending"
+    ]
+
+    submit_embedding_refresh(created)
+
+    job = None
+    if pending:
+        job = submit_summary_job(project_id, pending, summary_prompt | _get_llm("fast"))
+
+    return {
+        "success": True,
+        "created_count": len(created),
+        "documents": [
+            {"id": doc["id"], "title": doc["title"], "doc_type": doc["doc_type"]}
+            for doc in created
+        ],
+        "summary_job": {
+            "job_id": job["job_id"],
+            "total": job["total"],
+            "batches": len(job["batches"]),
+        } if job else None,
+        "message": f"{len(created)}개 문서가 등록되었습니다."
+        + (f" {len(pending)}개 문서의 요약은 백그라운드에서 생성됩니다." if pending else ""),
+    }
+
+
+@tool
+def ai_docs_bulk_create(project_id: str, documents: list[dict], summarize: bool = True) -> str:
+    """
+    Create many documents in one request (e.g., importing transcripts or meeting notes).
+    Summaries are generated in the background; check progress with ai_docs_bulk_status.
+
+    Args:
+        project_id: Project ID to create documents in
+        documents: List of documents [{"title": "...", "content": "...", "doc_type": "transcript", "tags": [...], "source_url": "...", "source_type": "youtube"}, ...]
+        summarize: Generate missing summaries in the background (default: True)
+
+    Returns:
+        Created documents and summary job info
+    """
+    try:
+        return json.dumps(bulk_create_documents(project_id, documents, summarize), ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"문서 일괄 생성 오류: {str(e)}"}, ensure_ascii=False)
+
+
+@tool
+def ai_docs_bulk_status(job_id: str) -> str:
+    """
+    Get progress of a background summary job started by ai_docs_bulk_create.
+
+    Args:
+        job_id: Summary job ID
+
+    Returns:
+        Job progress with per-batch status
+    """
+    job = get_summary_job(job_id)
+    if not job:
+        return json.dumps({"success": False, "error": "작업을 찾을 수 없습니다."}, ensure_ascii=False)
+
+    return json.dumps({"success": True, "job": job}, ensure_ascii=False)
+
+
 @tool
 def ai_docs_search(
     project_id: str,
     query: str,
     doc_type: Optional[str] = None,
     limit: int = 10,
+    semantic: bool = True,
 ) -> str:
     """
-    Search documents in a project by keyword.
+    Search documents in a project by keyword and meaning.
+    Results are ranked by full-text relevance combined with embedding similarity.
 
     Args:
         project_id: Project ID to search in
-        query: Search keyword
+        query: Search keyword or question
         doc_type: Optional filter by document type
         limit: Maximum number of results (default: 10)
+        semantic: Also rank by embedding similarity (default: True)
 
     Returns:
-        List of matching documents
+        List of matching documents ordered by relevance
     """
     try:
         client = get_supabase_client()
 
-        # Build query
-        db_query = (
-            client.table("project_documents")
-            .select("id, title, summary, doc_type, tags, status, created_at")
-            .eq("project_id", project_id)
-            .eq("status", "published")
-        )
-
-        if doc_type:
-            db_query = db_query.eq("doc_type", doc_type)
-
-        # Text search using ilike for simple matching
-        db_query = db_query.or_(f"title.ilike.%{query}%,content.ilike.%{query}%")
-        db_query = db_query.order("created_at", desc=True).limit(limit)
-
-        result = db_query.execute()
+        result = client.rpc("search_project_documents", {
+            "p_project_id": project_id,
+            "p_query": query,
+            "p_query_embedding": embed_query(query) if semantic else None,
+            "p_doc_type": doc_type,
+            "p_match_count": limit,
+        }, coalesce=True).execute()
 
         if not result.data:
             return json.dumps({
@@ -160,23 +281,89 @@ def ai_docs_search(
         return json.dumps({"success": False, "error": f"검색 오류: {str(e)}"}, ensure_ascii=False)
 
 
+# Columns ai_docs_get may return (embedding/search_vector are never sent to the LLM)
+DOC_FIELDS = (
+    "id", "project_id", "title", "summary", "content", "doc_type", "tags", "status",
+    "source_url", "source_type", "metadata", "created_at", "updated_at",
+)
+DEFAULT_DOC_FIELDS = ["id", "title", "summary", "doc_type", "tags", "status", "source_url", "created_at", "updated_at", "content"]
+
+# Characters of content returned per ai_docs_get call
+DEFAULT_CONTENT_PAGE = 4000
+
+
+def _find_section(content: str, name: str) -> dict | None:
+    """Find a heading section (including its sub-sections) by case-insensitive name match"""
+    sections = split_sections(content)
+    needle = name.strip().lower()
+    for i, section in enumerate(sections):
+        if section["heading"] and needle in section["heading"].lower():
+            end = len(content)
+            for following in sections[i + 1:]:
+                if following["level"] and following["level"] <= section["level"]:
+                    end = following["start"]
+                    break
+            return {"heading": section["heading"], "start": section["start"], "end": end}
+    return None
+
+
+def _content_range(offset: int, length: int, total: int, returned: str) -> dict:
+    has_more = offset + length < total
+    return {
+        "offset": offset,
+        "length": len(returned),
+        "total_length": total,
+        "has_more": has_more,
+        "next_offset": offset + length if has_more else None,
+    }
+
+
+def _outline(content: str) -> list[dict]:
+    return [
+        {"heading": s["heading"], "level": s["level"], "offset": s["start"], "length": s["end"] - s["start"]}
+        for s in split_sections(content)
+        if s["heading"]
+    ]
+
+
 @tool
-def ai_docs_get(doc_id: str) -> str:
+def ai_docs_get(
+    doc_id: str,
+    fields: Optional[list[str]] = None,
+    section: Optional[str] = None,
+    offset: int = 0,
+    length: int = DEFAULT_CONTENT_PAGE,
+    include_outline: bool = False,
+) -> str:
     """
-    Get a document by ID with full content.
+    Get a document by ID. Large documents are returned page by page.
 
     Args:
         doc_id: Document ID
+        fields: Fields to return (default: id, title, summary, doc_type, tags, status, source_url, created_at, updated_at, content).
+            Omit "content" to fetch only metadata.
+        section: Return only the section under this heading (case-insensitive partial match)
+        offset: Character offset into the content (or into the section)
+        length: Max characters of content to return (default: 4000)
+        include_outline: Include the heading outline with character offsets
 
     Returns:
-        Document with full content
+        Document fields with the requested content range; use next_offset to read further
     """
     try:
         client = get_supabase_client()
 
+        fields = [f for f in (fields or DEFAULT_DOC_FIELDS) if f in DOC_FIELDS] or ["id", "title"]
+        want_content = "content" in fields
+        meta_fields = [f for f in fields if f != "content"]
+
+        # Heading lookups need the whole body; plain ranges are sliced in the database
+        needs_full_content = section is not None or include_outline
+        select_fields = meta_fields + (["content"] if needs_full_content else [])
+
         result = (
             client.table("project_documents")
-            .select("*")
+            .select(", ".join(select_fields or ["id"]))
             .eq("id", doc_id)
             .single()
             .execute()
@@ -185,76 +372,80 @@ def ai_docs_get(doc_id: str) -> str:
         if not result.data:
             return json.dumps({"success": False, "error": "문서를 찾을 수 없습니다."}, ensure_ascii=False)
 
-        return json.dumps({
-            "success": True,
-            "document": result.data,
-        }, ensure_ascii=False)
+        document = {f: result.data.get(f) for f in meta_fields}
+        response = {"success": True, "document": document}
+        offset = max(offset, 0)
+        length = max(length, 0)
+
+        if needs_full_content:
+            full_content = result.data.get("content") or ""
+            if include_outline:
+                response["outline"] = _outline(full_content)
+
+            base, end = 0, len(full_content)
+            if section is not None:
+                found = _find_section(full_content, section)
+                if not found:
+                    return json.dumps({
+                        "success": False,
+                        "error": f"'{section}' 섹션을 찾을 수 없습니다.",
+                        "outline": _outline(full_content),
+                    }, ensure_ascii=False)
+                base, end = found["start"], found["end"]
+                response["section"] = found["heading"]
+
+            if want_content or section is not None:
+                total = end - base
+                document["content"] = full_content[base + offset:base + min(offset + length, total)]
+                response["content_range"] = _content_range(offset, length, total, document["content"])
+
+        elif want_content:
+            slice_result = client.rpc("get_project_document_content", {
+                "p_doc_id": doc_id,
+                "p_offset": offset,
+                "p_length": length,
+            }).execute()
+            row = slice_result.data[0] if slice_result.data else {"content": "", "content_length": 0}
+            total = row["content_length"] or 0
+            document["content"] = row["content"] or ""
+            response["content_range"] = _content_range(offset, length, total, document["content"])
+
+        return json.dumps(response, ensure_ascii=False)
 
     except Exception as e:
         return json.dumps({"success": False, "error": f"문서 조회 오류: {str(e)}"}, ensure_ascii=False)
 
 
-@tool
-def ai_docs_analyze(doc_id: str, analysis_type: Literal["summary", "key_points", "action_items", "sentiment", "full"] = "summary") -> str:
-    """
-    Analyze a document using AI.
-
-    Args:
-        doc_id: Document ID to analyze
-        analysis_type: Type of analysis (summary, key_points, action_items, sentiment, full)
-
-    Returns:
-        AI analysis results
-    """
-    try:
-        client = get_supabase_client()
-
-        # Get document
-        result = (
-            client.table("project_documents")
-            .select("id, title, content, doc_type")
-            .eq("id", doc_id)
-            .single()
-            .execute()
-        )
-
-        if not result.data:
-            return json.dumps({"success": False, "error": "문서를 찾을 수 없습니다."}, ensure_ascii=False)
-
-        doc = result.data
-        content = doc["content"][:8000]  # Limit content for analysis
-
-        # Build analysis prompt based on type
-        prompts = {
-            "summary": """다음 문서를 3-5문장으로 핵심 내용을 요약해주세요.
+ANALYSIS_PROMPTS = {
+    "summary": """다음 문서를 3-5문장으로 핵심 내용을 요약해주세요.
 
 문서 제목: {title}
 문서 내용:
 {content}
 
 요약:""",
-            "key_points": """다음 문서에서 핵심 포인트를 5-7개 추출해주세요. 불릿 포인트로 정리해주세요.
+    "key_points": """다음 문서에서 핵심 포인트를 5-7개 추출해주세요. 불릿 포인트로 정리해주세요.
 
 문서 제목: {title}
 문서 내용:
 {content}
 
 핵심 포인트:""",
-            "action_items": """다음 문서에서 필요한 액션 아이템(할 일)을 추출해주세요. 우선순위와 함께 정리해주세요.
+    "action_items": """다음 문서에서 필요한 액션 아이템(할 일)을 추출해주세요. 우선순위와 함께 정리해주세요.
 
 문서 제목: {title}
 문서 내용:
 {content}
 
 액션 아이템:""",
-            "sentiment": """다음 문서의 전반적인 톤과 감정을 분석해주세요. (긍정/부정/중립, 긴급성, 중요도 등)
+    "sentiment": """다음 문서의 전반적인 톤과 감정을 분석해주세요. (긍정/부정/중립, 긴급성, 중요도 등)
 
 문서 제목: {title}
 문서 내용:
 {content}
 
 분석:""",
-            "full": """다음 문서를 종합적으로 분석해주세요:
+    "full": """다음 문서를 종합적으로 분석해주세요:
 1. 핵심 요약 (3-5문장)
 2. 주요 포인트 (5-7개)
 3. 액션 아이템 (있다면)
@@ -267,10 +458,220 @@ def ai_docs_analyze(doc_id: str, analysis_type: Literal["summary", "key_points",
 {content}
 
 분석 결과:""",
-        }
+}
+
+# Map step instructions for chunked (map-reduce) analysis
+MAP_INSTRUCTIONS = {
+    "summary": "이 부분의 핵심 내용을 3-5문장으로 요약해주세요.",
+    "key_points": "이 부분의 핵심 포인트를 불릿 포인트로 추출해주세요.",
+    "action_items": "이 부분에 나오는 액션 아이템(할 일)을 우선순위 단서와 함께 추출해주세요. 없으면 '없음'이라고 답하세요.",
+    "sentiment": "이 부분의 톤과 감정(긍정/부정/중립, 긴급성, 중요도)을 간단히 분석해주세요.",
+    "full": "이 부분의 핵심 요약, 주요 포인트, 액션 아이템, 톤을 간단히 정리해주세요.",
+}
+
+map_prompt = ChatPromptTemplate.from_template("""다음은 문서 '{title}'의 일부입니다.
+
+{instruction}
+
+문서 내용:
+{content}
 
-        prompt = ChatPromptTemplate.from_template(prompts.get(analysis_type, prompts["summary"]))
-        chain = prompt | llm
+결과:""")
+
+# Documents up to this many characters are analyzed in a single pass
+SINGLE_PASS_CHARS = 8000
+# Chunk size for map-reduce analysis / max reduce input before collapsing again
+CHUNK_TOKENS = 2000
+REDUCE_MAX_TOKENS = 12000
+MAX_REDUCE_ROUNDS = 3
+ANALYZE_MAX_CONCURRENCY = 4
+
+# Per-chunk map results keyed by (chunk hash, analysis_type, model)
+_chunk_cache = LRUCache(max_entries=4096)
+
+# Counters for the persisted document_analyses cache
+_analysis_cache_counters = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+_analysis_cache_lock = threading.Lock()
+
+
+def _count_analysis_cache(event: str, amount: int = 1) -> None:
+    with _analysis_cache_lock:
+        _analysis_cache_counters[event] += amount
+
+
+def _get_cached_analysis(client, doc_id: str, doc_hash: str, analysis_type: str, mode: str) -> dict | None:
+    """Look up a stored analysis for this exact document content"""
+    result = (
+        client.table("document_analyses")
+        .select("analysis, metadata, created_at")
+        .eq("document_id", doc_id)
+        .eq("content_hash", doc_hash)
+        .eq("analysis_type", analysis_type)
+        .eq("model", model_name(_get_llm()))
+        .eq("mode", mode)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+def _store_analysis(client, doc_id: str, doc_hash: str, analysis_type: str, mode: str, analysis: str, metadata: dict) -> None:
+    try:
+        client.table("document_analyses").upsert({
+            "document_id": doc_id,
+            "content_hash": doc_hash,
+            "analysis_type": analysis_type,
+            "model": model_name(_get_llm()),
+            "mode": mode,
+            "analysis": analysis,
+            "metadata": metadata,
+        }, on_conflict="document_id,content_hash,analysis_type,model,mode").execute()
+        _count_analysis_cache("stores")
+    except Exception:
+        pass  # Cache write failures must not fail the analysis
+
+
+def invalidate_document_analyses(client, doc_id: str) -> None:
+    """Drop stored analyses of a document whose content changed"""
+    try:
+        client.table("document_analyses").delete().eq("document_id", doc_id).execute()
+        _count_analysis_cache("invalidations")
+    except Exception:
+        pass
+
+
+def get_analysis_cache_stats() -> dict:
+    """Hit/miss counters for persisted analyses and the in-process chunk cache"""
+    with _analysis_cache_lock:
+        counters = dict(_analysis_cache_counters)
+
+    lookups = counters["hits"] + counters["misses"]
+    stats = {
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        "chunk_cache": _chunk_cache.stats(),
+    }
+
+    try:
+        result = get_supabase_client().table("document_analyses").select("id", count="exact", head=True).execute()
+        stats["stored_entries"] = result.count
+    except Exception:
+        stats["stored_entries"] = None
+
+    return stats
+
+
+def _map_chunks(title: str, chunks: list[str], analysis_type: str) -> tuple[list[str], int]:
+    """Analyze chunks concurrently, reusing cached results for unchanged chunks"""
+    instruction = MAP_INSTRUCTIONS.get(analysis_type, MAP_INSTRUCTIONS["summary"])
+    keys = [(content_hash(title, chunk), analysis_type, model_name(_get_llm())) for chunk in chunks]
+
+    results = [_chunk_cache.get(key) for key in keys]
+    missing = [i for i, r in enumerate(results) if r is None]
+
+    if missing:
+        chain = map_prompt | _get_llm()
+        outputs = chain.batch(
+            [{"title": title, "instruction": instruction, "content": chunks[i]} for i in missing],
+            config={"max_concurrency": ANALYZE_MAX_CONCURRENCY},
+        )
+        for i, output in zip(missing, outputs):
+            results[i] = output.content
+            _chunk_cache.set(keys[i], output.content)
+
+    return results, len(chunks) - len(missing)
+
+
+def _map_reduce_input(doc: dict, analysis_type: str) -> tuple[str, dict]:
+    """
+    Build the reduce-step input for a long document.
+
+    Chunks are analyzed in parallel; if the combined notes are still too long
+    they are chunked and mapped again (up to MAX_REDUCE_ROUNDS).
+    """
+    chunks = chunk_document(doc["content"], CHUNK_TOKENS)
+    notes, cached = _map_chunks(doc["title"], chunks, analysis_type)
+    stats = {"chunks_total": len(chunks), "chunks_cached": cached}
+
+    combined = "\n\n".join(f"[부분 {i + 1}]\n{note}" for i, note in enumerate(notes))
+    rounds = 1
+    while count_tokens(combined) > REDUCE_MAX_TOKENS and rounds < MAX_REDUCE_ROUNDS:
+        notes, _ = _map_chunks(doc["title"], chunk_document(combined, CHUNK_TOKENS), analysis_type)
+        combined = "\n\n".join(f"[부분 {i + 1}]\n{note}" for i, note in enumerate(notes))
+        rounds += 1
+
+    stats["map_rounds"] = rounds
+    return f"(긴 문서이므로 부분별 분석 결과를 제공합니다)\n\n{combined}", stats
+
+
+@tool
+def ai_docs_analyze(
+    doc_id: str,
+    analysis_type: Literal["summary", "key_points", "action_items", "sentiment", "full"] = "summary",
+    mode: Literal["auto", "single", "map_reduce"] = "auto",
+    use_cache: bool = True,
+) -> str:
+    """
+    Analyze a document using AI.
+    Long documents are split by headings, analyzed chunk by chunk, then combined.
+    Results are cached until the document content changes.
+
+    Args:
+        doc_id: Document ID to analyze
+        analysis_type: Type of analysis (summary, key_points, action_items, sentiment, full)
+        mode: auto (map_reduce for long documents), single (first 8000 chars only), map_reduce
+        use_cache: Return a stored analysis if the document is unchanged (default: True)
+
+    Returns:
+        AI analysis results
+    """
+    try:
+        client = get_supabase_client()
+
+        # Get document
+        result = (
+            client.table("project_documents")
+            .select("id, title, content, doc_type")
+            .eq("id", doc_id)
+            .single()
+            .execute()
+        )
+
+        if not result.data:
+            return json.dumps({"success": False, "error": "문서를 찾을 수 없습니다."}, ensure_ascii=False)
+
+        doc = result.data
+
+        if mode == "auto":
+            mode = "single" if len(doc["content"]) <= SINGLE_PASS_CHARS else "map_reduce"
+
+        doc_hash = content_hash(doc["title"], doc["content"], doc["doc_type"])
+
+        if use_cache:
+            cached = _get_cached_analysis(client, doc_id, doc_hash, analysis_type, mode)
+            if cached:
+                _count_analysis_cache("hits")
+                return json.dumps({
+                    "success": True,
+                    "document_id": doc_id,
+                    "document_title": doc["title"],
+                    "analysis_type": analysis_type,
+                    "mode": mode,
+                    **(cached.get("metadata") or {}),
+                    "analysis": cached["analysis"],
+                    "cached": True,
+                    "cached_at": cached["created_at"],
+                }, ensure_ascii=False)
+            _count_analysis_cache("misses")
+
+        chunk_stats = {}
+        if mode == "map_reduce":
+            content, chunk_stats = _map_reduce_input(doc, analysis_type)
+        else:
+            content = doc["content"][:SINGLE_PASS_CHARS]  # Limit content for analysis
+
+        prompt = ChatPromptTemplate.from_template(ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["summary"]))
+        chain = prompt | _get_llm()
 
         analysis = chain.invoke({
             "title": doc["title"],
@@ -278,12 +679,17 @@ def ai_docs_analyze(doc_id: str, analysis_type: Literal["summary", "key_points",
             "doc_type": doc["doc_type"],
         })
 
+        _store_analysis(client, doc_id, doc_hash, analysis_type, mode, analysis.content, chunk_stats)
+
         return json.dumps({
             "success": True,
             "document_id": doc_id,
             "document_title": doc["title"],
             "analysis_type": analysis_type,
+            "mode": mode,
+            **chunk_stats,
             "analysis": analysis.content,
+            "cached": False,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -340,6 +746,9 @@ def ai_docs_update(
         )
 
         if result.data:
+            if title is not None or content is not None:
+                invalidate_document_analyses(client, doc_id)
+                submit_embedding_refresh(result.data)
             return json.dumps({
                 "success": True,
                 "message": "문서가 업데이트되었습니다.",
@@ -352,50 +761,100 @@ def ai_docs_update(
         return json.dumps({"success": False, "error": f"업데이트 오류: {str(e)}"}, ensure_ascii=False)
 
 
+def _encode_cursor(row: dict) -> str:
+    """Opaque keyset cursor for the (created_at, id) of the last row on a page"""
+    raw = json.dumps({"c": row["created_at"], "i": row["id"]})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return raw["c"], raw["i"]
+
+
+def list_documents_page(
+    project_id: str,
+    doc_type: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    include_content: bool = False,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Fetch one keyset page of project documents, newest first.
+
+    Returns:
+        (documents, next_cursor) - next_cursor is None on the last page
+    """
+    cursor_created_at, cursor_id = _decode_cursor(cursor) if cursor else (None, None)
+
+    result = get_supabase_client().rpc("list_project_documents", {
+        "p_project_id": project_id,
+        "p_doc_type": doc_type,
+        "p_status": status,
+        "p_cursor_created_at": cursor_created_at,
+        "p_cursor_id": cursor_id,
+        "p_limit": limit + 1,
+        "p_include_content": include_content,
+    }, coalesce=True).execute()
+
+    rows = result.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not include_content:
+        for row in rows:
+            row.pop("content", None)
+
+    return rows, (_encode_cursor(rows[-1]) if has_more else None)
+
+
+def iter_project_documents(
+    project_id: str,
+    doc_type: Optional[str] = None,
+    status: Optional[str] = None,
+    include_content: bool = True,
+    page_size: int = 200,
+):
+    """Yield every matching document page by page (used for streaming export)"""
+    cursor = None
+    while True:
+        rows, cursor = list_documents_page(project_id, doc_type, status, page_size, cursor, include_content)
+        yield from rows
+        if not cursor:
+            break
+
+
 @tool
 def ai_docs_list(
     project_id: str,
     doc_type: Optional[str] = None,
     status: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0,
+    cursor: Optional[str] = None,
 ) -> str:
     """
-    List documents in a project.
+    List documents in a project, newest first.
 
     Args:
         project_id: Project ID
         doc_type: Filter by document type (optional)
         status: Filter by status (optional)
         limit: Number of results (default: 20)
-        offset: Pagination offset (default: 0)
+        cursor: next_cursor from the previous page (omit for the first page)
 
     Returns:
-        List of documents
+        List of documents and next_cursor for the following page
     """
     try:
-        client = get_supabase_client()
-
-        query = (
-            client.table("project_documents")
-            .select("id, title, summary, doc_type, tags, status, created_at, updated_at")
-            .eq("project_id", project_id)
-        )
-
-        if doc_type:
-            query = query.eq("doc_type", doc_type)
-        if status:
-            query = query.eq("status", status)
-
-        query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        documents, next_cursor = list_documents_page(project_id, doc_type, status, limit, cursor)
 
         return json.dumps({
             "success": True,
-            "documents": result.data or [],
-            "count": len(result.data or []),
-            "offset": offset,
+            "documents": documents,
+            "count": len(documents),
             "limit": limit,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -438,6 +897,8 @@ def ai_docs_delete(doc_id: str) -> str:
 
 # Register all tools
 register_tool(ai_docs_create)
+register_tool(ai_docs_bulk_create)
+register_tool(ai_docs_bulk_status)
 register_tool(ai_docs_search)
 register_tool(ai_docs_get)
 register_tool(ai_docs_analyze)
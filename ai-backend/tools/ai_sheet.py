@@ -3,49 +3,193 @@ AI Sheet Tool - 스프레드시트 데이터 분석 및 조작 도구
 sheets 테이블 연동
 """
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from typing import Literal, Optional, Any
+from pydantic import BaseModel, Field
+from typing import Literal, Optional, Any, Union
 import json
-import statistics
+import re
+import threading
 from datetime import datetime
 
 from config import get_settings
 from .registry import register_tool
+from .sheet_engine import get_columnar_sheet
+from .sheet_insights import compute_insights
+from .sheet_preview import build_preview, column_summary, preview_token_budget
+from .sheet_stats import IncrementalStats, describe_from_stats, rebuild_column_stats, touch_column_stats
+from .sheet_store import SheetConflictError, append_rows, load_sheet, update_cached_columns, update_cell
+from utils.cache import LRUCache
+from utils.hashing import content_hash
+from utils.llm import get_llm, model_name
 from utils.supabase import get_supabase_client
+from utils.write_behind import get_write_behind
 
 settings = get_settings()
 
-# LLM for data analysis
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.2,
-    api_key=settings.openai_api_key,
-)
 
+def _get_llm(tier: str = "default"):
+    """LLM for data analysis: the calling agent's model, else gpt-4o"""
+    return get_llm("gpt-4o", temperature=0.2, tier=tier)
 
-def _extract_column_values(rows: list[dict], column_id: str) -> list[Any]:
-    """Extract values from a specific column"""
-    return [row.get(column_id) for row in rows if row.get(column_id) is not None]
 
+# Compiled query plans keyed by (normalized question, schema hash)
+_plan_cache = LRUCache(1024)
 
-def _calculate_statistics(values: list) -> dict:
-    """Calculate basic statistics for numeric values"""
-    numeric_values = [v for v in values if isinstance(v, (int, float))]
-    if not numeric_values:
-        return {"error": "No numeric values found"}
+# Categorical columns with at most this many distinct values list them in the plan prompt
+PLAN_HINT_MAX_VALUES = 20
 
+# Recent analyses keyed by (sheet_id, sheet_version, analysis_type, column_key, model);
+# covers the window before write-behind inserts reach sheet_analyses
+_analysis_cache = LRUCache(256)
+
+# Counters for reuse of stored sheet_analyses
+_analysis_counters = {"hits": 0, "misses": 0, "stores": 0}
+_analysis_counters_lock = threading.Lock()
+
+
+class SheetFilter(BaseModel):
+    column: str = Field(description="Column id")
+    op: Literal["eq", "ne", "gt", "gte", "lt", "lte", "contains", "in", "is_null", "not_null"]
+    value: Optional[Union[float, str, list[str]]] = None
+
+
+class SheetAggregate(BaseModel):
+    func: Literal["count", "count_distinct", "sum", "mean", "median", "min", "max", "stdev"]
+    column: Optional[str] = Field(default=None, description="Column id (omit for row count)")
+
+
+class SheetQueryPlan(BaseModel):
+    """Structured query executed locally over the full sheet"""
+
+    answerable: bool = Field(description="False if the question cannot be expressed as filter/group/aggregate/sort")
+    filters: list[SheetFilter] = []
+    group_by: list[str] = Field(default=[], description="Column ids")
+    aggregates: list[SheetAggregate] = []
+    select: list[str] = Field(default=[], description="Column ids to return when not aggregating")
+    sort_by: Optional[str] = Field(
+        default=None,
+        description="Column id, or aggregate output like 'sum_<column id>' / 'count'",
+    )
+    descending: bool = True
+    limit: int = 20
+
+
+plan_prompt = ChatPromptTemplate.from_template("""스프레드시트 질문을 구조화된 쿼리로 변환하세요. 계산은 하지 마세요.
+
+컬럼 (id, 이름, 타입, 값 예시):
+{columns}
+
+질문: {query}
+
+- 필터/그룹/집계/정렬로 표현할 수 없는 질문이면 answerable=false
+- 컬럼은 반드시 id로 지정
+- 집계 결과 정렬은 '<func>_<컬럼 id>' 또는 'count'를 sort_by로 사용
+- "가장 높은/낮은" 질문은 sort_by + limit으로 표현""")
+
+
+def get_plan_cache_stats() -> dict:
+    return _plan_cache.stats()
+
+
+def _count_analysis(event: str) -> None:
+    with _analysis_counters_lock:
+        _analysis_counters[event] += 1
+
+
+def _column_key(column_ids: list[str] | None) -> str:
+    return ",".join(sorted(set(column_ids))) if column_ids else ""
+
+
+def _get_stored_analysis(client, sheet_id: str, version: int, analysis_type: str, column_key: str) -> dict | None:
+    """Analysis of this exact sheet version, from memory or sheet_analyses"""
+    key = (sheet_id, version, analysis_type, column_key, model_name(_get_llm()))
+    record = _analysis_cache.get(key)
+    if record is not None:
+        return record
+
+    result = (
+        client.table("sheet_analyses")
+        .select("results, created_at")
+        .eq("sheet_id", sheet_id)
+        .eq("sheet_version", version)
+        .eq("analysis_type", analysis_type)
+        .eq("column_key", column_key)
+        .eq("model_used", model_name(_get_llm()))
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    if not result.data:
+        return None
+    _analysis_cache.set(key, result.data[0])
+    return result.data[0]
+
+
+def _store_analysis(sheet_id: str, version: int, analysis_type: str, column_key: str, results: dict) -> None:
+    """Remember an analysis and queue its sheet_analyses insert (write-behind)"""
+    record = {"results": results, "created_at": datetime.now().isoformat()}
+    _analysis_cache.set((sheet_id, version, analysis_type, column_key, model_name(_get_llm())), record)
+    get_write_behind("sheet_analyses").submit({
+        "sheet_id": sheet_id,
+        "sheet_version": version,
+        "analysis_type": analysis_type,
+        "column_key": column_key,
+        "query": None,
+        "results": results,
+        "model_used": model_name(_get_llm()),
+    })
+    _count_analysis("stores")
+
+
+def get_analysis_reuse_stats() -> dict:
+    """Reuse counters for stored sheet analyses plus the in-process cache"""
+    with _analysis_counters_lock:
+        counters = dict(_analysis_counters)
+    lookups = counters["hits"] + counters["misses"]
     return {
-        "count": len(numeric_values),
-        "sum": sum(numeric_values),
-        "mean": statistics.mean(numeric_values),
-        "median": statistics.median(numeric_values),
-        "min": min(numeric_values),
-        "max": max(numeric_values),
-        "stdev": statistics.stdev(numeric_values) if len(numeric_values) > 1 else 0,
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        "memory": _analysis_cache.stats(),
+        "write_behind": get_write_behind("sheet_analyses").stats(),
     }
 
 
+def _normalize_question(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?.!。 ")
+
+
+def _schema_hash(columns: list[dict]) -> str:
+    return content_hash(json.dumps([[c["id"], c.get("name"), c.get("type")] for c in columns], ensure_ascii=False))
+
+
+def _plan_columns(columnar) -> str:
+    """Column list for the plan prompt with a few literal values per column"""
+    lines = []
+    for column in columnar.columns.values():
+        if column.is_numeric:
+            stats = column.numeric_stats()
+            hint = f"{stats.get('min')} ~ {stats.get('max')}" if "min" in stats else ""
+        else:
+            top = column.top_values(PLAN_HINT_MAX_VALUES + 1)
+            values = [value for value, _ in top[:PLAN_HINT_MAX_VALUES]]
+            hint = ", ".join(values) + (" ..." if len(top) > PLAN_HINT_MAX_VALUES else "")
+        lines.append(f"- {column.id}, {column.name}, {column.type}, {hint}")
+    return "\n".join(lines)
+
+
+def _compile_query_plan(columns: list[dict], columnar, query: str) -> tuple[dict, bool]:
+    """Get (plan, cached) for a question, asking the LLM only on a cache miss"""
+    key = (_normalize_question(query), _schema_hash(columns))
+    plan = _plan_cache.get(key)
+    if plan is not None:
+        return plan, True
+
+    chain = plan_prompt | _get_llm().with_structured_output(SheetQueryPlan)
+    plan = chain.invoke({"columns": _plan_columns(columnar), "query": query}).model_dump()
+    _plan_cache.set(key, plan)
+    return plan, False
+
+
 @tool
 def ai_sheet_create(
     team_id: str,
@@ -124,14 +268,14 @@ def ai_sheet_get(sheet_id: str) -> str:
     try:
         client = get_supabase_client()
 
-        result = client.table("sheets").select("*").eq("id", sheet_id).single().execute()
+        sheet = load_sheet(client, sheet_id)
 
-        if not result.data:
+        if not sheet:
             return json.dumps({"success": False, "error": "시트를 찾을 수 없습니다."}, ensure_ascii=False)
 
         return json.dumps({
             "success": True,
-            "sheet": result.data,
+            "sheet": sheet,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -152,47 +296,38 @@ def ai_sheet_add_rows(sheet_id: str, rows: list[dict]) -> str:
     """
     try:
         client = get_supabase_client()
+        stats = IncrementalStats.load(client, sheet_id)
 
-        # Get current sheet
-        current = client.table("sheets").select("rows").eq("id", sheet_id).single().execute()
-
-        if not current.data:
+        # Server-side append (no read-modify-write of existing rows)
+        try:
+            result = append_rows(client, sheet_id, rows)
+        except LookupError:
             return json.dumps({"success": False, "error": "시트를 찾을 수 없습니다."}, ensure_ascii=False)
 
-        current_rows = current.data.get("rows", [])
-
-        # Add IDs to new rows
-        import uuid
-        for row in rows:
-            if "id" not in row:
-                row["id"] = str(uuid.uuid4())[:8]
-
-        updated_rows = current_rows + rows
-
-        # Update sheet
-        result = (
-            client.table("sheets")
-            .update({"rows": updated_rows})
-            .eq("id", sheet_id)
-            .execute()
-        )
-
-        if result.data:
-            return json.dumps({
-                "success": True,
-                "added_count": len(rows),
-                "total_rows": len(updated_rows),
-                "message": f"{len(rows)}개 행이 추가되었습니다."
-            }, ensure_ascii=False)
+        # Fold the new rows into the running column stats
+        stats.append(rows, result["version"])
+        stats.save(client)
 
-        return json.dumps({"success": False, "error": "행 추가 실패"}, ensure_ascii=False)
+        return json.dumps({
+            "success": True,
+            "added_count": len(rows),
+            "total_rows": result["total_rows"],
+            "version": result["version"],
+            "message": f"{len(rows)}개 행이 추가되었습니다."
+        }, ensure_ascii=False)
 
     except Exception as e:
         return json.dumps({"success": False, "error": f"행 추가 오류: {str(e)}"}, ensure_ascii=False)
 
 
 @tool
-def ai_sheet_update_cell(sheet_id: str, row_id: str, column_id: str, value: Any) -> str:
+def ai_sheet_update_cell(
+    sheet_id: str,
+    row_id: str,
+    column_id: str,
+    value: Any,
+    expected_version: Optional[int] = None,
+) -> str:
     """
     Update a specific cell value.
 
@@ -201,49 +336,39 @@ def ai_sheet_update_cell(sheet_id: str, row_id: str, column_id: str, value: Any)
         row_id: Row ID
         column_id: Column ID
         value: New value
+        expected_version: Optional sheet version from a previous read
+            (ai_sheet_get's sheet.version) or update; the update is rejected
+            if the sheet changed in the meantime
 
     Returns:
-        Update result
+        Update result with the new sheet version
     """
     try:
         client = get_supabase_client()
+        stats = IncrementalStats.load(client, sheet_id)
 
-        # Get current sheet
-        current = client.table("sheets").select("rows").eq("id", sheet_id).single().execute()
-
-        if not current.data:
-            return json.dumps({"success": False, "error": "시트를 찾을 수 없습니다."}, ensure_ascii=False)
-
-        rows = current.data.get("rows", [])
-
-        # Find and update row
-        updated = False
-        for row in rows:
-            if row.get("id") == row_id:
-                row[column_id] = value
-                updated = True
-                break
-
-        if not updated:
-            return json.dumps({"success": False, "error": "행을 찾을 수 없습니다."}, ensure_ascii=False)
-
-        # Save updated rows
-        result = (
-            client.table("sheets")
-            .update({"rows": rows})
-            .eq("id", sheet_id)
-            .execute()
-        )
-
-        if result.data:
+        try:
+            result = update_cell(client, sheet_id, row_id, column_id, value, expected_version)
+        except SheetConflictError as e:
             return json.dumps({
-                "success": True,
-                "message": f"셀이 업데이트되었습니다.",
-                "row_id": row_id,
-                "column_id": column_id,
+                "success": False,
+                "error": "다른 사용자가 먼저 수정했습니다. 최신 데이터를 다시 조회한 뒤 시도해주세요.",
+                "current_version": e.current_version,
             }, ensure_ascii=False)
+        except LookupError as e:
+            message = "행을 찾을 수 없습니다." if str(e) == "row not found" else "시트를 찾을 수 없습니다."
+            return json.dumps({"success": False, "error": message}, ensure_ascii=False)
 
-        return json.dumps({"success": False, "error": "셀 업데이트 실패"}, ensure_ascii=False)
+        stats.update_cell(column_id, result["old_value"], value, result["sheet_version"])
+        stats.save(client)
+
+        return json.dumps({
+            "success": True,
+            "message": f"셀이 업데이트되었습니다.",
+            "row_id": row_id,
+            "column_id": column_id,
+            "version": result["version"],
+        }, ensure_ascii=False)
 
     except Exception as e:
         return json.dumps({"success": False, "error": f"셀 업데이트 오류: {str(e)}"}, ensure_ascii=False)
@@ -258,6 +383,9 @@ def ai_sheet_analyze(
     """
     Analyze spreadsheet data using AI.
 
+    A stored analysis of the same sheet version, type, columns and model is
+    returned as is instead of running the analysis again.
+
     Args:
         sheet_id: Sheet ID to analyze
         analysis_type: Type of analysis (summary, statistics, trends, anomalies, correlation)
@@ -268,14 +396,36 @@ def ai_sheet_analyze(
     """
     try:
         client = get_supabase_client()
+        column_key = _column_key(column_ids)
+
+        # Reuse a stored analysis when the data hasn't changed since
+        head = client.table("sheets").select("name, version, row_count").eq("id", sheet_id).limit(1).execute()
+        if not head.data:
+            return json.dumps({"success": False, "error": "시트를 찾을 수 없습니다."}, ensure_ascii=False)
+
+        stored = _get_stored_analysis(client, sheet_id, head.data[0]["version"], analysis_type, column_key)
+        if stored:
+            _count_analysis("hits")
+            results = stored["results"]
+            return json.dumps({
+                "success": True,
+                "sheet_name": head.data[0]["name"],
+                "analysis_type": analysis_type,
+                "row_count": head.data[0]["row_count"],
+                "statistics": results.get("statistics"),
+                "findings": results.get("findings"),
+                "analysis": results.get("analysis"),
+                "reused": True,
+                "analyzed_at": stored.get("created_at"),
+            }, ensure_ascii=False, default=str)
+        _count_analysis("misses")
 
         # Get sheet data
-        result = client.table("sheets").select("*").eq("id", sheet_id).single().execute()
+        sheet = load_sheet(client, sheet_id)
 
-        if not result.data:
+        if not sheet:
             return json.dumps({"success": False, "error": "시트를 찾을 수 없습니다."}, ensure_ascii=False)
 
-        sheet = result.data
         columns = sheet.get("columns", [])
         rows = sheet.get("rows", [])
 
@@ -289,32 +439,37 @@ def ai_sheet_analyze(
         if column_ids:
             columns = [c for c in columns if c["id"] in column_ids]
 
-        # Basic statistics for numeric columns
-        stats_by_column = {}
-        for col in columns:
-            col_id = col["id"]
-            values = _extract_column_values(rows, col_id)
-
-            if col["type"] == "number" or all(isinstance(v, (int, float)) for v in values if v is not None):
-                stats_by_column[col["name"]] = _calculate_statistics(values)
-            else:
-                # Count unique values for non-numeric
-                value_counts = {}
-                for v in values:
-                    str_v = str(v)
-                    value_counts[str_v] = value_counts.get(str_v, 0) + 1
-                stats_by_column[col["name"]] = {
-                    "type": "categorical",
-                    "unique_count": len(value_counts),
-                    "total_count": len(values),
-                    "top_values": sorted(value_counts.items(), key=lambda x: -x[1])[:5]
-                }
-
-        # Prepare data summary for AI analysis
-        data_preview = []
-        for row in rows[:20]:  # First 20 rows
-            row_data = {col["name"]: row.get(col["id"]) for col in columns}
-            data_preview.append(row_data)
+        # Basic statistics from the incrementally maintained column stats when
+        # they match this version; otherwise computed over the full sheet and
+        # persisted so later writes can keep them up to date
+        stats = IncrementalStats.load(client, sheet_id)
+        columnar = None
+        if stats.fresh and stats.version == sheet.get("version"):
+            stats_by_column = describe_from_stats(stats.stats, columns, len(rows))
+        else:
+            rebuild_column_stats(client, sheet)
+            columnar = get_columnar_sheet(sheet)
+            stats_by_column = columnar.describe([c["id"] for c in columns])
+
+        # Outliers / trends / correlations computed over every row
+        findings = None
+        if analysis_type in ("trends", "anomalies", "correlation"):
+            columnar = columnar or get_columnar_sheet(sheet)
+            findings = compute_insights(columnar, analysis_type, [c["id"] for c in columns])
+
+        # Representative rows (date/order strata + min/max rows) within the token
+        # budget, for the prompts that read raw rows rather than local findings.
+        # The strata and extreme rows need the columnar snapshot, so it is built
+        # here even when the column stats were fresh.
+        preview = {"rows": [], "sampled_rows": 0}
+        if findings is None:
+            preview = build_preview(
+                columns,
+                rows,
+                preview_token_budget(model_name(_get_llm())),
+                columnar or get_columnar_sheet(sheet),
+                seed=sheet.get("version") or 0,
+            )
 
         # AI Analysis
         prompts = {
@@ -325,7 +480,7 @@ def ai_sheet_analyze(
 총 행 수: {row_count}
 통계: {statistics}
 
-데이터 샘플 (처음 20행):
+데이터 샘플 (전체 {row_count}행 중 {sample_size}행, 구간별 추출 + 최솟값/최댓값 행, _row는 행 번호):
 {data_preview}
 
 다음 내용을 포함해 분석해주세요:
@@ -341,7 +496,7 @@ def ai_sheet_analyze(
 총 행 수: {row_count}
 기본 통계: {statistics}
 
-데이터 샘플:
+데이터 샘플 (전체 {row_count}행 중 {sample_size}행, 구간별 추출 + 최솟값/최댓값 행, _row는 행 번호):
 {data_preview}
 
 다음 내용을 분석해주세요:
@@ -357,14 +512,16 @@ def ai_sheet_analyze(
 총 행 수: {row_count}
 통계: {statistics}
 
-데이터 샘플:
-{data_preview}
+로컬 계산 결과 (전체 {row_count}행 기준):
+{findings}
 
 다음을 분석해주세요:
 1. 시간에 따른 변화 (날짜 컬럼이 있다면)
 2. 증가/감소 트렌드
 3. 패턴 및 주기성
-4. 예측 가능한 미래 트렌드""",
+4. 예측 가능한 미래 트렌드
+
+계산 결과에 있는 수치만 근거로 사용하세요.""",
 
             "anomalies": """다음 스프레드시트 데이터에서 이상치를 탐지해주세요.
 
@@ -373,14 +530,16 @@ def ai_sheet_analyze(
 총 행 수: {row_count}
 통계: {statistics}
 
-데이터 샘플:
-{data_preview}
+로컬 계산 결과 (전체 {row_count}행 기준):
+{findings}
 
 다음을 분석해주세요:
 1. 통계적 이상치 (평균에서 크게 벗어난 값)
 2. 데이터 입력 오류 가능성
 3. 비정상적인 패턴
-4. 추가 조사가 필요한 항목""",
+4. 추가 조사가 필요한 항목
+
+계산 결과에 있는 수치만 근거로 사용하세요.""",
 
             "correlation": """다음 스프레드시트 데이터에서 컬럼 간 상관관계를 분석해주세요.
 
@@ -389,41 +548,39 @@ def ai_sheet_analyze(
 총 행 수: {row_count}
 통계: {statistics}
 
-데이터 샘플:
-{data_preview}
+로컬 계산 결과 (전체 {row_count}행 기준):
+{findings}
 
 다음을 분석해주세요:
 1. 컬럼 간 상관관계
 2. 인과관계 가능성
 3. 숨겨진 패턴
-4. 비즈니스 인사이트""",
+4. 비즈니스 인사이트
+
+계산 결과에 있는 수치만 근거로 사용하세요.""",
         }
 
         prompt = ChatPromptTemplate.from_template(prompts.get(analysis_type, prompts["summary"]))
-        chain = prompt | llm
+        chain = prompt | _get_llm()
 
         analysis = chain.invoke({
             "sheet_name": sheet["name"],
             "columns": json.dumps([c["name"] for c in columns], ensure_ascii=False),
             "row_count": len(rows),
             "statistics": json.dumps(stats_by_column, ensure_ascii=False, default=str),
-            "data_preview": json.dumps(data_preview, ensure_ascii=False, default=str),
+            "data_preview": json.dumps(preview["rows"], ensure_ascii=False, default=str),
+            "sample_size": preview["sampled_rows"],
+            "findings": json.dumps(findings, ensure_ascii=False, default=str),
         })
 
-        # Save analysis result
-        try:
-            client.table("sheet_analyses").insert({
-                "sheet_id": sheet_id,
-                "analysis_type": analysis_type,
-                "query": None,
-                "results": {
-                    "analysis": analysis.content,
-                    "statistics": stats_by_column,
-                },
-                "model_used": "gpt-4o",
-            }).execute()
-        except Exception:
-            pass  # Ignore save errors
+        # Save analysis result (queued; written to sheet_analyses in the background)
+        results = {
+            "analysis": analysis.content,
+            "statistics": stats_by_column,
+            "findings": findings,
+        }
+        if sheet.get("version") is not None:
+            _store_analysis(sheet_id, sheet["version"], analysis_type, column_key, results)
 
         return json.dumps({
             "success": True,
@@ -431,7 +588,9 @@ def ai_sheet_analyze(
             "analysis_type": analysis_type,
             "row_count": len(rows),
             "statistics": stats_by_column,
+            "findings": findings,
             "analysis": analysis.content,
+            "reused": False,
         }, ensure_ascii=False, default=str)
 
     except Exception as e:
@@ -443,6 +602,10 @@ def ai_sheet_query(sheet_id: str, query: str) -> str:
     """
     Query spreadsheet data with natural language.
 
+    The question is compiled into a filter/group/aggregate/sort plan that runs
+    over every row; questions that don't fit a plan fall back to an LLM answer
+    over a representative sample of rows.
+
     Args:
         sheet_id: Sheet ID
         query: Natural language query (e.g., "매출이 가장 높은 달", "총 비용 합계")
@@ -454,52 +617,73 @@ def ai_sheet_query(sheet_id: str, query: str) -> str:
         client = get_supabase_client()
 
         # Get sheet data
-        result = client.table("sheets").select("*").eq("id", sheet_id).single().execute()
+        sheet = load_sheet(client, sheet_id)
 
-        if not result.data:
+        if not sheet:
             return json.dumps({"success": False, "error": "시트를 찾을 수 없습니다."}, ensure_ascii=False)
 
-        sheet = result.data
         columns = sheet.get("columns", [])
         rows = sheet.get("rows", [])
 
         if not rows:
             return json.dumps({"success": False, "error": "데이터가 없습니다."}, ensure_ascii=False)
 
-        # Prepare data for LLM
-        data_preview = []
-        for row in rows[:50]:  # First 50 rows
-            row_data = {col["name"]: row.get(col["id"]) for col in columns}
-            data_preview.append(row_data)
+        columnar = get_columnar_sheet(sheet)
+        plan, plan_cached = _compile_query_plan(columns, columnar, query)
+
+        if plan["answerable"]:
+            try:
+                result = columnar.execute(plan)
+                return json.dumps({
+                    "success": True,
+                    "query": query,
+                    "mode": "plan",
+                    "plan": plan,
+                    "plan_cached": plan_cached,
+                    "result": result,
+                    "data_rows_analyzed": len(rows),
+                }, ensure_ascii=False, default=str)
+            except (KeyError, ValueError) as e:
+                print(f"Sheet query plan failed, falling back to LLM: {e}")
+
+        # Fallback: let the LLM read a representative sample plus per-column summaries
+        preview = build_preview(
+            columns, rows, preview_token_budget(model_name(_get_llm())), columnar, seed=sheet.get("version") or 0
+        )
 
         prompt = ChatPromptTemplate.from_template("""다음 스프레드시트 데이터에서 질문에 답해주세요.
 
 시트 이름: {sheet_name}
 컬럼: {columns}
 총 행 수: {row_count}
+컬럼 요약 (전체 행 기준): {summary}
 
-데이터:
+데이터 샘플 (전체 {row_count}행 중 {sample_size}행, 구간별 추출 + 최솟값/최댓값 행, _row는 행 번호):
 {data}
 
 질문: {query}
 
-정확한 데이터를 기반으로 답변해주세요. 계산이 필요하면 계산 과정도 보여주세요.""")
+정확한 데이터를 기반으로 답변해주세요. 계산이 필요하면 계산 과정도 보여주세요.
+샘플은 전체 데이터의 일부이므로, 합계/개수는 컬럼 요약을 우선 사용하세요.""")
 
-        chain = prompt | llm
+        chain = prompt | _get_llm()
 
         answer = chain.invoke({
             "sheet_name": sheet["name"],
             "columns": json.dumps([{"name": c["name"], "type": c["type"]} for c in columns], ensure_ascii=False),
             "row_count": len(rows),
-            "data": json.dumps(data_preview, ensure_ascii=False, default=str),
+            "summary": json.dumps(column_summary(columnar, [c["id"] for c in columns]), ensure_ascii=False),
+            "sample_size": preview["sampled_rows"],
+            "data": json.dumps(preview["rows"], ensure_ascii=False, default=str),
             "query": query,
         })
 
         return json.dumps({
             "success": True,
             "query": query,
+            "mode": "llm_preview",
             "answer": answer.content,
-            "data_rows_analyzed": min(len(rows), 50),
+            "data_rows_analyzed": preview["sampled_rows"],
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -560,6 +744,8 @@ def ai_sheet_add_column(
         )
 
         if result.data:
+            update_cached_columns(sheet_id, columns, result.data[0].get("version"))
+            touch_column_stats(client, sheet_id, result.data[0].get("version"))
             return json.dumps({
                 "success": True,
                 "column": new_column,
@@ -587,9 +773,10 @@ def ai_sheet_list(team_id: str, include_archived: bool = False) -> str:
     try:
         client = get_supabase_client()
 
+        # Counts are maintained by triggers, so contents are never downloaded
         query = (
             client.table("sheets")
-            .select("id, name, description, created_at, updated_at, is_archived")
+            .select("id, name, description, created_at, updated_at, is_archived, row_count, column_count")
             .eq("team_id", team_id)
         )
 
@@ -598,15 +785,7 @@ def ai_sheet_list(team_id: str, include_archived: bool = False) -> str:
 
         query = query.order("updated_at", desc=True)
         result = query.execute()
-
-        # Add row/column counts
-        sheets = []
-        for sheet in (result.data or []):
-            sheet_detail = client.table("sheets").select("columns, rows").eq("id", sheet["id"]).single().execute()
-            if sheet_detail.data:
-                sheet["column_count"] = len(sheet_detail.data.get("columns", []))
-                sheet["row_count"] = len(sheet_detail.data.get("rows", []))
-            sheets.append(sheet)
+        sheets = result.data or []
 
         return json.dumps({
             "success": True,
@@ -0,0 +1,82 @@
+"""
+AI Docs API Router
+문서 대량 등록 등 에이전트 도구 외부에서 쓰는 문서 엔드포인트
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional
+import json
+
+from .ai_docs import bulk_create_documents, get_analysis_cache_stats, iter_project_documents
+from .docs_worker import get_summary_job
+
+router = APIRouter()
+
+
+class BulkDocument(BaseModel):
+    title: str
+    content: str
+    doc_type: str = "report"
+    summary: Optional[str] = None
+    tags: list[str] = []
+    source_url: Optional[str] = None
+    source_type: Optional[str] = None
+
+
+class BulkCreateRequest(BaseModel):
+    project_id: str
+    documents: list[BulkDocument]
+    summarize: bool = True
+
+
+@router.post("/bulk")
+def bulk_create(request: BulkCreateRequest):
+    """Insert many documents at once; summaries are back-filled in the background"""
+    try:
+        result = bulk_create_documents(
+            request.project_id,
+            [doc.model_dump() for doc in request.documents],
+            request.summarize,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@router.get("/bulk/{job_id}")
+async def bulk_status(job_id: str):
+    """Get per-batch progress of a summary job"""
+    job = get_summary_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+@router.get("/analysis-cache/stats")
+def analysis_cache_stats():
+    """Document analysis cache statistics"""
+    return get_analysis_cache_stats()
+
+
+@router.get("/projects/{project_id}/export")
+async def export_project_documents(
+    project_id: str,
+    doc_type: Optional[str] = None,
+    status: Optional[str] = None,
+    include_content: bool = True,
+):
+    """Stream all documents of a project as NDJSON (one document per line)"""
+
+    def generate():
+        for doc in iter_project_documents(project_id, doc_type, status, include_content):
+            yield json.dumps(doc, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="documents-{project_id}.ndjson"'},
+    )
@@ -0,0 +1,140 @@
+"""
+Local Docs Search Index - SQLite FTS5 기반 search_project_documents 대체 구현
+Supabase 없이 테스트/로컬 개발에서 ai_docs 검색 랭킹을 재현
+"""
+import json
+import math
+import re
+import sqlite3
+
+
+def _fts_query(query: str) -> str | None:
+    """Build a prefix AND query the same way the Postgres function does"""
+    tokens = [t for t in re.split(r"[^\w]+", query.lower()) if t]
+    if not tokens:
+        return None
+    return " AND ".join('"' + t.replace('"', '""') + '"*' for t in tokens)
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class LocalDocumentIndex:
+    """
+    In-memory stand-in for the search_project_documents RPC.
+
+    text_score uses FTS5 bm25() squashed to 0~1 (like ts_rank_cd with flag 32),
+    vector_score is cosine similarity over stored embeddings.
+    """
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE documents (
+                id TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                content TEXT NOT NULL,
+                doc_type TEXT,
+                tags TEXT,
+                status TEXT,
+                created_at TEXT,
+                embedding TEXT
+            );
+            CREATE VIRTUAL TABLE documents_fts USING fts5(
+                id UNINDEXED, title, summary, content, tokenize = 'unicode61'
+            );
+        """)
+
+    def upsert(self, doc: dict, embedding: list[float] | None = None) -> None:
+        """Insert or replace a project_documents-shaped row"""
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (doc["id"],))
+        self.conn.execute("DELETE FROM documents_fts WHERE id = ?", (doc["id"],))
+        self.conn.execute(
+            "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                doc["id"],
+                doc["project_id"],
+                doc["title"],
+                doc.get("summary"),
+                doc["content"],
+                doc.get("doc_type", "report"),
+                json.dumps(doc.get("tags") or []),
+                doc.get("status", "published"),
+                doc.get("created_at", ""),
+                json.dumps(embedding) if embedding else None,
+            ),
+        )
+        self.conn.execute(
+            "INSERT INTO documents_fts VALUES (?, ?, ?, ?)",
+            (doc["id"], doc["title"], doc.get("summary") or "", doc["content"]),
+        )
+
+    def search(self, params: dict) -> list[dict]:
+        """Run a search with the same parameters as the search_project_documents RPC"""
+        query = params.get("p_query") or ""
+        query_embedding = params.get("p_query_embedding")
+        doc_type = params.get("p_doc_type")
+        match_count = params.get("p_match_count", 10)
+        text_weight = params.get("p_text_weight", 0.5) if query_embedding else 1.0
+        threshold = params.get("p_match_threshold", 0.3)
+
+        filters = "d.project_id = ? AND d.status = 'published'"
+        args: list = [params["p_project_id"]]
+        if doc_type:
+            filters += " AND d.doc_type = ?"
+            args.append(doc_type)
+
+        scores: dict[str, dict] = {}
+
+        fts_query = _fts_query(query)
+        if fts_query:
+            # Column weights mirror setweight A/B/C in the migration
+            rows = self.conn.execute(
+                f"""
+                SELECT d.id, bm25(documents_fts, 0, 1.0, 0.4, 0.2) AS rank
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.id
+                WHERE documents_fts MATCH ? AND {filters}
+                ORDER BY rank LIMIT ?
+                """,
+                [fts_query, *args, match_count * 5],
+            ).fetchall()
+            for doc_id, rank in rows:
+                raw = -rank
+                scores[doc_id] = {"text_score": raw / (raw + 1), "vector_score": 0.0}
+
+        if query_embedding:
+            rows = self.conn.execute(
+                f"SELECT d.id, d.embedding FROM documents d WHERE {filters} AND d.embedding IS NOT NULL",
+                args,
+            ).fetchall()
+            similarities = [(doc_id, _cosine(query_embedding, json.loads(emb))) for doc_id, emb in rows]
+            similarities = [s for s in similarities if s[1] >= threshold]
+            for doc_id, similarity in sorted(similarities, key=lambda s: -s[1])[:match_count * 5]:
+                scores.setdefault(doc_id, {"text_score": 0.0, "vector_score": 0.0})["vector_score"] = similarity
+
+        results = []
+        for doc_id, s in scores.items():
+            row = self.conn.execute(
+                "SELECT id, title, summary, doc_type, tags, status, created_at FROM documents WHERE id = ?",
+                (doc_id,),
+            ).fetchone()
+            results.append({
+                "id": row[0],
+                "title": row[1],
+                "summary": row[2],
+                "doc_type": row[3],
+                "tags": json.loads(row[4]),
+                "status": row[5],
+                "created_at": row[6],
+                "text_score": s["text_score"],
+                "vector_score": s["vector_score"],
+                "score": text_weight * s["text_score"] + (1 - text_weight) * s["vector_score"],
+            })
+
+        results.sort(key=lambda r: (r["score"], r["created_at"]), reverse=True)
+        return results[:match_count]
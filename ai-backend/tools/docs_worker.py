@@ -0,0 +1,212 @@
+"""
+Docs Summary Worker - 대량 등록 문서 요약 백그라운드 처리
+ai_docs_bulk_create로 등록된 문서의 summary를 배치 단위로 채움
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import threading
+import uuid
+
+from config import get_settings
+from utils.embeddings import embed_texts
+from utils.hashing import content_hash
+from utils.supabase import get_supabase_client
+
+settings = get_settings()
+
+# Documents per LLM batch / concurrent LLM calls inside one batch
+SUMMARY_BATCH_SIZE = 10
+SUMMARY_MAX_CONCURRENCY = 4
+SUMMARY_INPUT_CHARS = 3000
+
+# Documents per embeddings API call
+EMBEDDING_BATCH_SIZE = 50
+
+# Finished jobs kept in memory for progress lookups
+MAX_TRACKED_JOBS = 100
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="docs-summary")
+_jobs: dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def _fallback_summary(content: str) -> str:
+    """Summary used when the LLM call fails (same rule as ai_docs_create)"""
+    return content[:200] + "..."
+
+
+def _update_job(job_id: str, **fields) -> None:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job:
+            job.update(fields)
+
+
+def _update_batch(job_id: str, index: int, **fields) -> None:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job:
+            job["batches"][index].update(fields)
+
+
+def _prune_jobs() -> None:
+    """Drop the oldest finished jobs beyond MAX_TRACKED_JOBS"""
+    finished = [j for j in _jobs.values() if j["status"] in ("completed", "failed")]
+    overflow = len(_jobs) - MAX_TRACKED_JOBS
+    for job in sorted(finished, key=lambda j: j["created_at"])[:max(overflow, 0)]:
+        _jobs.pop(job["job_id"], None)
+
+
+def _run_job(job_id: str, documents: list[dict], chain) -> None:
+    """Summarize documents batch by batch and back-fill project_documents.summary"""
+    client = get_supabase_client()
+    _update_job(job_id, status="running", started_at=datetime.now().isoformat())
+
+    completed = 0
+    failed = 0
+
+    try:
+        for index in range(0, len(documents), SUMMARY_BATCH_SIZE):
+            batch_index = index // SUMMARY_BATCH_SIZE
+            batch = documents[index:index + SUMMARY_BATCH_SIZE]
+            _update_batch(job_id, batch_index, status="running")
+
+            results = chain.batch(
+                [{"content": doc["content"][:SUMMARY_INPUT_CHARS]} for doc in batch],
+                config={"max_concurrency": SUMMARY_MAX_CONCURRENCY},
+                return_exceptions=True,
+            )
+
+            batch_completed = 0
+            batch_failed = 0
+            for doc, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    summary = _fallback_summary(doc["content"])
+                    summary_status = "fallback"
+                else:
+                    summary = result.content[:500]
+                    summary_status = "ready"
+
+                try:
+                    client.table("project_documents").update({
+                        "summary": summary,
+                        "metadata": {"summary_status": summary_status},
+                    }).eq("id", doc["id"]).execute()
+                    batch_completed += 1
+                except Exception:
+                    batch_failed += 1
+
+            completed += batch_completed
+            failed += batch_failed
+            _update_batch(
+                job_id,
+                batch_index,
+                status="completed",
+                completed=batch_completed,
+                failed=batch_failed,
+                finished_at=datetime.now().isoformat(),
+            )
+            _update_job(job_id, completed=completed, failed=failed)
+
+        _update_job(job_id, status="completed", finished_at=datetime.now().isoformat())
+
+    except Exception as e:
+        _update_job(job_id, status="failed", error=str(e), finished_at=datetime.now().isoformat())
+
+
+def submit_summary_job(project_id: str, documents: list[dict], chain) -> dict:
+    """
+    Queue background summarization for freshly inserted documents.
+
+    Args:
+        project_id: Project the documents belong to
+        documents: [{"id": ..., "content": ...}, ...]
+        chain: Runnable taking {"content": str} and returning a message
+
+    Returns:
+        Initial job snapshot
+    """
+    job_id = str(uuid.uuid4())
+    batch_count = (len(documents) + SUMMARY_BATCH_SIZE - 1) // SUMMARY_BATCH_SIZE
+
+    job = {
+        "job_id": job_id,
+        "project_id": project_id,
+        "status": "queued",
+        "total": len(documents),
+        "completed": 0,
+        "failed": 0,
+        "batches": [
+            {
+                "index": i,
+                "size": min(SUMMARY_BATCH_SIZE, len(documents) - i * SUMMARY_BATCH_SIZE),
+                "status": "pending",
+                "completed": 0,
+                "failed": 0,
+            }
+            for i in range(batch_count)
+        ],
+        "created_at": datetime.now().isoformat(),
+    }
+
+    with _jobs_lock:
+        _jobs[job_id] = job
+        _prune_jobs()
+        snapshot = _snapshot_job(job_id)
+
+    _executor.submit(_run_job, job_id, documents, chain)
+    return snapshot
+
+
+def _snapshot_job(job_id: str) -> dict | None:
+    """Copy of a job (caller holds _jobs_lock)"""
+    job = _jobs.get(job_id)
+    if not job:
+        return None
+    return {**job, "batches": [dict(b) for b in job["batches"]]}
+
+
+def get_summary_job(job_id: str) -> dict | None:
+    """Get a copy of a summarization job's progress"""
+    with _jobs_lock:
+        return _snapshot_job(job_id)
+
+
+def _refresh_embeddings(documents: list[dict]) -> None:
+    """Embed documents whose title/content changed since the last embedding"""
+    client = get_supabase_client()
+
+    stale = []
+    for doc in documents:
+        doc_hash = content_hash(doc["title"], doc["content"])
+        if doc_hash != doc.get("embedding_hash"):
+            stale.append((doc, doc_hash))
+
+    for index in range(0, len(stale), EMBEDDING_BATCH_SIZE):
+        batch = stale[index:index + EMBEDDING_BATCH_SIZE]
+        try:
+            vectors = embed_texts([f"{doc['title']}\n\n{doc['content']}" for doc, _ in batch])
+        except Exception as e:
+            print(f"Document embedding failed: {e}")
+            continue
+
+        for (doc, doc_hash), vector in zip(batch, vectors):
+            try:
+                client.table("project_documents").update({
+                    "embedding": vector,
+                    "embedding_hash": doc_hash,
+                }).eq("id", doc["id"]).execute()
+            except Exception:
+                pass  # Search falls back to full-text for this document
+
+
+def submit_embedding_refresh(documents: list[dict]) -> None:
+    """
+    Queue embedding (re)computation for created/updated documents.
+
+    Args:
+        documents: [{"id", "title", "content", "embedding_hash"}, ...]
+    """
+    if not documents or not settings.openai_api_key:
+        return
+    _executor.submit(_refresh_embeddings, documents)
@@ -3,38 +3,181 @@ Email Tool - 이메일 분석, 번역, 답장 작성 도구
 email_messages, email_drafts 테이블 연동
 """
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
 from typing import Literal, Optional
 import json
+import time
 
 from config import get_settings
+from .email_digest import (
+    DIGEST_MAX_EMAILS,
+    build_clusters,
+    fetch_inbox,
+    format_stats,
+    heuristic_digest,
+    inbox_stats,
+    reduce_summaries,
+    summarize_clusters,
+)
+from .email_text import email_body, is_translatable, join_segments, segment_hash, split_segments
+from .email_thread import build_reply_context
 from .registry import register_tool
+from utils.embeddings import embed_query
+from utils.llm import get_llm, model_name
 from utils.supabase import get_supabase_client
 
 settings = get_settings()
 
-# Use Grok for email analysis (same as frontend)
-llm = ChatOpenAI(
-    model="grok-4-1-fast",
-    temperature=0.3,
-    api_key=settings.xai_api_key,
-    base_url="https://api.x.ai/v1",
-)
 
-# Fallback to OpenAI if Grok not available
-llm_fallback = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.3,
-    api_key=settings.openai_api_key,
-)
+def _get_llm(tier: str = "default"):
+    """
+    LLM for email work: the calling agent's model, else Grok (same as
+    frontend), falling back to OpenAI when no xAI key is configured
+    """
+    return get_llm("grok-4-1-fast", temperature=0.3, tier=tier, fallback="gpt-4o")
+
+
+# Emails packed into one triage request / triage requests in flight
+TRIAGE_BATCH_SIZE = 20
+TRIAGE_MAX_CONCURRENCY = 4
+TRIAGE_BODY_CHARS = 1500
+TRIAGE_MAX_EMAILS = 1000
+
+# Results listed in the tool output (the rest are only counted)
+TRIAGE_MAX_LISTED = 50
+
+# USD per 1M (input, output) tokens, for cost reporting (default and fast-tier models;
+# other agent models report cost_usd None)
+MODEL_PRICES = {
+    "grok-4-1-fast": (0.20, 0.50),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-3-5-haiku-latest": (0.80, 4.00),
+}
+
+_PRIORITY_ORDER = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+
+class EmailTriage(BaseModel):
+    index: int = Field(description="Email number in the list")
+    priority: Literal["urgent", "high", "normal", "low"]
+    sentiment: Literal["positive", "neutral", "negative"]
+    category: str = Field(description="meeting, invoice, newsletter, personal, notification, sales, support, other")
+    action_required: bool
+    action_items: list[str] = []
+    summary: str = Field(description="One sentence summary")
 
 
-def _get_llm():
-    """Get appropriate LLM (Grok preferred, fallback to OpenAI)"""
-    if settings.xai_api_key:
-        return llm
-    return llm_fallback
+class EmailTriageBatch(BaseModel):
+    results: list[EmailTriage]
+
+
+triage_prompt = ChatPromptTemplate.from_template("""다음 이메일 {count}개를 각각 분류하세요. 모든 번호에 대해 결과를 하나씩 반환하세요.
+
+{emails}
+
+- priority: urgent/high/normal/low
+- sentiment: positive/neutral/negative
+- category: meeting, invoice, newsletter, personal, notification, sales, support, other 중 하나
+- action_required: 내가 답장하거나 조치해야 하면 true
+- action_items: 내가 해야 할 일 (없으면 빈 목록)
+- summary: 한국어 한 문장 요약""")
+
+
+def _triage_entry(index: int, email: dict) -> str:
+    body = (email.get("body_text") or email.get("snippet") or "")[:TRIAGE_BODY_CHARS]
+    return (
+        f"[{index}] 발신자: {email.get('from_name') or ''} <{email.get('from_address', '')}>\n"
+        f"제목: {email.get('subject') or '(제목 없음)'}\n"
+        f"내용:\n{body}"
+    )
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """
+    Timeouts, connection failures, rate limits (429) and server errors (5xx):
+    the provider SDK errors (openai/anthropic/google) carry status_code or a
+    response, and name their timeout/connection classes accordingly.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    name = type(error).__name__
+    return any(kind in name for kind in ("Timeout", "Connection", "RateLimit", "Overloaded", "Unavailable"))
+
+
+def triage_emails(emails: list[dict]) -> tuple[list[dict], dict]:
+    """
+    Classify emails TRIAGE_BATCH_SIZE per structured-output request, with
+    TRIAGE_MAX_CONCURRENCY requests in flight.
+
+    Emails are numbered within each request (models copy short numbers more
+    reliably than UUIDs) and mapped back to ids afterwards.
+
+    Returns:
+        ([{"id", "priority", "sentiment", "category", "action_required", "action_items", "summary"}],
+         {"llm_calls", "failed_calls", "missing", "errored_ids", "input_tokens", "output_tokens",
+          "model", "cost_usd"}) - cost_usd is None when the model has no entry in MODEL_PRICES
+        errored_ids are emails whose request raised a transient error (timeout,
+        rate limit, 5xx) rather than being answered without them; other errors
+        (context length, content filter) count as a failed call like a parse
+        failure.
+    """
+    # Priority tags are light work: cheap/fast tier
+    model = _get_llm("fast")
+    chain = (triage_prompt | model.with_structured_output(EmailTriageBatch, include_raw=True)).with_retry(
+        stop_after_attempt=3
+    )
+
+    batches = [emails[i:i + TRIAGE_BATCH_SIZE] for i in range(0, len(emails), TRIAGE_BATCH_SIZE)]
+    outputs = chain.batch(
+        [
+            {
+                "count": len(batch),
+                "emails": "\n---\n".join(_triage_entry(i + 1, email) for i, email in enumerate(batch)),
+            }
+            for batch in batches
+        ],
+        config={"max_concurrency": TRIAGE_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    results = []
+    report = {
+        "llm_calls": len(batches), "failed_calls": 0, "missing": 0, "errored_ids": [],
+        "input_tokens": 0, "output_tokens": 0,
+    }
+    for batch, output in zip(batches, outputs):
+        if isinstance(output, Exception) or output.get("parsed") is None:
+            print(f"Email triage batch failed: {output if isinstance(output, Exception) else output.get('parsing_error')}")
+            report["failed_calls"] += 1
+            report["missing"] += len(batch)
+            if isinstance(output, Exception) and _is_transient_error(output):
+                report["errored_ids"].extend(email["id"] for email in batch)
+            continue
+
+        usage = getattr(output["raw"], "usage_metadata", None) or {}
+        report["input_tokens"] += usage.get("input_tokens", 0)
+        report["output_tokens"] += usage.get("output_tokens", 0)
+
+        seen = set()
+        for triage in output["parsed"].results:
+            if not 1 <= triage.index <= len(batch) or triage.index in seen:
+                continue
+            seen.add(triage.index)
+            entry = triage.model_dump(exclude={"index"})
+            results.append({"id": batch[triage.index - 1]["id"], **entry})
+        report["missing"] += len(batch) - len(seen)
+
+    report["model"] = model_name(model)
+    prices = MODEL_PRICES.get(report["model"])
+    report["cost_usd"] = round(
+        (report["input_tokens"] * prices[0] + report["output_tokens"] * prices[1]) / 1_000_000, 6
+    ) if prices else None
+    return results, report
 
 
 @tool
@@ -174,6 +317,25 @@ def email_analyze(
             return json.dumps({"success": False, "error": "이메일을 찾을 수 없습니다."}, ensure_ascii=False)
 
         email = result.data
+
+        # Already triaged (background worker or email_triage_batch): answer from the stored fields
+        if email.get("ai_analyzed_at"):
+            stored = {
+                "summary": email.get("ai_summary"),
+                "urgency": email.get("ai_priority"),
+                "action_items": email.get("ai_action_items") if email.get("ai_action_required") else [],
+            }.get(analysis_type)
+            if stored is not None:
+                return json.dumps({
+                    "success": True,
+                    "email_id": email_id,
+                    "subject": email.get("subject"),
+                    "analysis_type": analysis_type,
+                    "analysis": stored,
+                    "analyzed_at": email.get("ai_analyzed_at"),
+                    "cached": True,
+                }, ensure_ascii=False)
+
         body = email.get("body_text") or email.get("body_html", "")[:5000]
 
         prompts = {
@@ -300,6 +462,281 @@ def email_analyze(
         return json.dumps({"success": False, "error": f"분석 오류: {str(e)}"}, ensure_ascii=False)
 
 
+@tool
+def email_triage_batch(
+    account_id: str,
+    email_ids: Optional[list[str]] = None,
+    limit: int = 500,
+) -> str:
+    """
+    Triage many emails at once: priority, sentiment, category, action items and a summary.
+
+    Emails are packed into batches, one LLM call per batch with several calls
+    running concurrently, and all results are saved with a single bulk update.
+
+    Args:
+        account_id: Email account ID
+        email_ids: Specific emails to triage (default: not yet analyzed INBOX emails, newest first)
+        limit: Max emails to triage when email_ids is not given (max 1000)
+
+    Returns:
+        Counts by priority, the most important emails, and a throughput/cost report
+    """
+    try:
+        started = time.perf_counter()
+        client = get_supabase_client()
+
+        query = (
+            client.table("email_messages")
+            .select("id, subject, from_name, from_address, snippet, body_text")
+            .eq("account_id", account_id)
+        )
+        if email_ids:
+            query = query.in_("id", email_ids[:TRIAGE_MAX_EMAILS])
+        else:
+            query = (
+                query.eq("folder", "INBOX")
+                .eq("is_trash", False)
+                .is_("ai_analyzed_at", "null")
+                .order("received_at", desc=True)
+                .limit(max(1, min(limit, TRIAGE_MAX_EMAILS)))
+            )
+        emails = query.execute().data or []
+
+        if not emails:
+            return json.dumps({
+                "success": True,
+                "triaged": 0,
+                "message": "분류할 이메일이 없습니다.",
+            }, ensure_ascii=False)
+
+        results, report = triage_emails(emails)
+        errored = report.pop("errored_ids")
+
+        # One UPDATE ... FROM jsonb_to_recordset for the whole run
+        updated = 0
+        if results:
+            updated = client.rpc("email_apply_triage", {"p_results": results}).execute().data or 0
+
+        elapsed = time.perf_counter() - started
+        subjects = {e["id"]: e.get("subject") for e in emails}
+        by_priority = {}
+        for r in results:
+            by_priority[r["priority"]] = by_priority.get(r["priority"], 0) + 1
+
+        important = sorted(
+            (r for r in results if r["priority"] in ("urgent", "high") or r["action_required"]),
+            key=lambda r: _PRIORITY_ORDER[r["priority"]],
+        )
+
+        return json.dumps({
+            "success": True,
+            "triaged": len(results),
+            "updated": updated,
+            "by_priority": by_priority,
+            "important": [
+                {
+                    "id": r["id"],
+                    "subject": subjects.get(r["id"]),
+                    "priority": r["priority"],
+                    "category": r["category"],
+                    "action_items": r["action_items"],
+                    "summary": r["summary"],
+                }
+                for r in important[:TRIAGE_MAX_LISTED]
+            ],
+            "report": {
+                **report,
+                "errored": len(errored),
+                "emails": len(emails),
+                "elapsed_seconds": round(elapsed, 2),
+                "emails_per_second": round(len(emails) / elapsed, 2) if elapsed else None,
+                "cost_per_email_usd": (
+                    round(report["cost_usd"] / len(emails), 8) if report["cost_usd"] is not None else None
+                ),
+                **({} if report["cost_usd"] is not None else {"cost_note": "모델 가격 정보가 없어 비용을 계산하지 않았습니다."}),
+            },
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"일괄 분류 오류: {str(e)}"}, ensure_ascii=False)
+
+
+LANGUAGE_NAMES = {
+    "ko": "한국어",
+    "en": "English",
+    "ja": "日本語",
+    "zh": "中文",
+    "es": "Español",
+    "fr": "Français",
+    "de": "Deutsch",
+}
+
+# Characters of body text translated per email
+TRANSLATION_MAX_CHARS = 20000
+# Segments per structured-output request / requests in flight
+TRANSLATION_BATCH_SEGMENTS = 40
+TRANSLATION_MAX_CONCURRENCY = 4
+# Hashes per translation memory lookup
+TRANSLATION_LOOKUP_CHUNK = 500
+
+
+class SegmentTranslation(BaseModel):
+    index: int = Field(description="Segment number in the list")
+    text: str = Field(description="Translated segment")
+
+
+class SegmentTranslationBatch(BaseModel):
+    translations: list[SegmentTranslation]
+
+
+segment_translate_prompt = ChatPromptTemplate.from_template("""다음 이메일 문단 {count}개를 각각 {target_language}로 번역하세요.
+모든 번호에 대해 번역문을 하나씩 반환하고, 문단 안의 줄바꿈은 유지하세요. 설명 없이 번역문만 넣으세요.
+
+{segments}""")
+
+
+def _lookup_segments(client, target_language: str, hashes: list[str]) -> dict[str, str]:
+    found = {}
+    for i in range(0, len(hashes), TRANSLATION_LOOKUP_CHUNK):
+        rows = client.rpc("email_lookup_segments", {
+            "p_target_language": target_language,
+            "p_hashes": hashes[i:i + TRANSLATION_LOOKUP_CHUNK],
+        }, coalesce=True).execute().data or []
+        found.update({row["segment_hash"]: row["translation"] for row in rows})
+    return found
+
+
+def translate_emails(client, jobs: list[tuple[dict, str]]) -> tuple[list[dict], dict]:
+    """
+    Translate emails [(email row, target language)] through the segment
+    translation memory.
+
+    Subject and body paragraphs (long ones by sentence) are looked up by hash
+    per language, so repeated newsletters, signatures and reply chains that
+    quote already translated mail cost nothing. Only unseen segments go to the
+    model, numbered, TRANSLATION_BATCH_SEGMENTS per structured-output request
+    with all requests in flight at once; new translations are stored for
+    later emails. Segments that still fail keep their original text.
+
+    Returns:
+        ([{"subject", "body", "translation", "complete"}],
+         {"segments", "cached", "translated", "failed", "llm_calls"})
+    """
+    plans = []
+    wanted: dict[str, dict[str, str]] = {}  # language -> hash -> source text
+    for email, target in jobs:
+        segments = split_segments(email_body(email)[:TRANSLATION_MAX_CHARS])
+        units = [email.get("subject") or ""] + [segment["text"] for segment in segments]
+        hashes = [segment_hash(unit) if is_translatable(unit) else None for unit in units]
+        for unit, unit_hash in zip(units, hashes):
+            if unit_hash:
+                wanted.setdefault(target, {}).setdefault(unit_hash, unit)
+        plans.append((target, segments, units, hashes))
+
+    report = {
+        "segments": sum(len(wanted_hashes) for wanted_hashes in wanted.values()),
+        "cached": 0,
+        "translated": 0,
+        "failed": 0,
+        "llm_calls": 0,
+    }
+    memory: dict[str, dict[str, str]] = {}
+    requests = []
+    for target, sources in wanted.items():
+        memory[target] = _lookup_segments(client, target, list(sources))
+        report["cached"] += len(memory[target])
+        missing = [h for h in sources if h not in memory[target]]
+        for i in range(0, len(missing), TRANSLATION_BATCH_SEGMENTS):
+            requests.append((target, missing[i:i + TRANSLATION_BATCH_SEGMENTS]))
+
+    if requests:
+        model = _get_llm()
+        chain = (
+            segment_translate_prompt | model.with_structured_output(SegmentTranslationBatch)
+        ).with_retry(stop_after_attempt=3)
+        outputs = chain.batch(
+            [
+                {
+                    "count": len(batch),
+                    "target_language": LANGUAGE_NAMES.get(target, target),
+                    "segments": "\n\n".join(
+                        f"[{i + 1}]\n{wanted[target][h]}" for i, h in enumerate(batch)
+                    ),
+                }
+                for target, batch in requests
+            ],
+            config={"max_concurrency": TRANSLATION_MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+        report["llm_calls"] = len(requests)
+
+        records = []
+        for (target, batch), output in zip(requests, outputs):
+            if isinstance(output, Exception):
+                print(f"Email segment translation failed: {output}")
+                continue
+            for item in output.translations:
+                if 1 <= item.index <= len(batch) and item.text.strip():
+                    h = batch[item.index - 1]
+                    if h not in memory[target]:
+                        memory[target][h] = item.text
+                        records.append({
+                            "target_language": target,
+                            "segment_hash": h,
+                            "translation": item.text,
+                            "model": model_name(model),
+                        })
+        report["translated"] = len(records)
+        report["failed"] = report["segments"] - report["cached"] - report["translated"]
+
+        if records:
+            try:
+                client.table("email_translation_segments").upsert(
+                    records, on_conflict="target_language,segment_hash"
+                ).execute()
+            except Exception as e:
+                print(f"Email translation memory save failed: {e}")
+
+    results = []
+    for target, segments, units, hashes in plans:
+        texts = [memory[target].get(h, unit) if h else unit for unit, h in zip(units, hashes)]
+        subject, body = texts[0], join_segments(segments, texts[1:])
+        results.append({
+            "subject": subject,
+            "body": body,
+            "translation": f"**제목**: {subject}\n\n{body}",
+            "complete": all(h is None or h in memory[target] for h in hashes),
+        })
+    return results, report
+
+
+def get_cached_translation(client, email_id: str, target_language: str) -> str | None:
+    result = (
+        client.table("email_translations")
+        .select("translation")
+        .eq("email_id", email_id)
+        .eq("target_language", target_language)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0]["translation"] if result.data else None
+
+
+def store_translations(client, records: list[dict]) -> None:
+    """Upsert [{"email_id", "target_language", "translation"}] in one request"""
+    if not records:
+        return
+    model = model_name(_get_llm())
+    try:
+        client.table("email_translations").upsert(
+            [{**record, "model": model} for record in records],
+            on_conflict="email_id,target_language",
+        ).execute()
+    except Exception as e:
+        print(f"Email translation save failed: {e}")
+
+
 @tool
 def email_translate(
     email_id: str,
@@ -330,44 +767,35 @@ def email_translate(
             return json.dumps({"success": False, "error": "이메일을 찾을 수 없습니다."}, ensure_ascii=False)
 
         email = result.data
-        body = email.get("body_text") or email.get("body_html", "")
-
-        language_names = {
-            "ko": "한국어",
-            "en": "English",
-            "ja": "日本語",
-            "zh": "中文",
-            "es": "Español",
-            "fr": "Français",
-            "de": "Deutsch",
-        }
-
-        target_name = language_names.get(target_language, target_language)
-
-        prompt = ChatPromptTemplate.from_template("""다음 이메일을 {target_language}로 번역해주세요.
-번역문만 출력하세요. 다른 설명은 하지 마세요.
 
-**제목**: {subject}
-
-**본문**:
-{body}
-
-번역 ({target_language}):""")
-
-        chain = prompt | _get_llm()
+        # Pre-translated by the inbox worker or an earlier call
+        cached = get_cached_translation(client, email_id, target_language)
+        if cached is not None:
+            return json.dumps({
+                "success": True,
+                "email_id": email_id,
+                "original_subject": email.get("subject"),
+                "target_language": target_language,
+                "translation": cached,
+                "cached": True,
+            }, ensure_ascii=False)
 
-        translation = chain.invoke({
-            "subject": email.get("subject", ""),
-            "body": body[:6000],
-            "target_language": target_name,
-        })
+        (translated,), report = translate_emails(client, [(email, target_language)])
+        if translated["complete"]:
+            store_translations(client, [{
+                "email_id": email_id,
+                "target_language": target_language,
+                "translation": translated["translation"],
+            }])
 
         return json.dumps({
             "success": True,
             "email_id": email_id,
             "original_subject": email.get("subject"),
             "target_language": target_language,
-            "translation": translation.content,
+            "translation": translated["translation"],
+            "cached": False,
+            "segments": report,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -384,6 +812,10 @@ def email_draft_reply(
     """
     Generate a reply draft for an email.
 
+    The prompt holds the email without its quoted history and signature,
+    plus one line per earlier message in the thread (stored summaries when
+    available), within a fixed token budget.
+
     Args:
         email_id: Email ID to reply to
         reply_type: Type of reply
@@ -414,7 +846,10 @@ def email_draft_reply(
             return json.dumps({"success": False, "error": "이메일을 찾을 수 없습니다."}, ensure_ascii=False)
 
         email = result.data
-        body = email.get("body_text") or email.get("body_html", "")[:3000]
+        started = time.perf_counter()
+        model = _get_llm()
+        # Earlier thread messages are summarized on the cheap/fast tier
+        body, history, context = build_reply_context(client, email, _get_llm("fast"))
 
         reply_instructions = {
             "formal": "공식적이고 비즈니스적인 톤으로 답장을 작성해주세요.",
@@ -427,7 +862,10 @@ def email_draft_reply(
 
         prompt = ChatPromptTemplate.from_template("""원본 이메일에 대한 답장을 작성해주세요.
 
-**원본 이메일**
+**이전 대화** (오래된 순)
+{history}
+
+**원본 이메일** (인용문/서명 제외)
 발신자: {from_name} <{from_address}>
 제목: {subject}
 내용:
@@ -440,7 +878,7 @@ def email_draft_reply(
 
 **답장 (제목과 본문 포함)**:""")
 
-        chain = prompt | _get_llm()
+        chain = prompt | model
 
         key_points_text = f"포함할 핵심 포인트: {key_points}" if key_points else ""
 
@@ -449,6 +887,7 @@ def email_draft_reply(
             "from_address": email.get("from_address", ""),
             "subject": email.get("subject", ""),
             "body": body,
+            "history": history or "(없음)",
             "reply_instruction": reply_instructions.get(reply_type, reply_instructions["formal"]),
             "language": "한국어" if language == "ko" else language,
             "key_points_instruction": key_points_text,
@@ -480,6 +919,7 @@ def email_draft_reply(
             "draft": reply.content,
             "to": email.get("from_address"),
             "subject": f"Re: {email.get('subject', '')}",
+            "context": {**context, "elapsed_seconds": round(time.perf_counter() - started, 2)},
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -492,38 +932,32 @@ def email_search(
     query: str,
     folder: Optional[str] = None,
     limit: int = 20,
+    semantic: bool = False,
 ) -> str:
     """
     Search emails by keyword.
+    Results are ranked by full-text relevance over subject, sender and body.
 
     Args:
         account_id: Email account ID
         query: Search keyword
         folder: Optional folder filter
         limit: Max results
+        semantic: Also rank by embedding similarity (only pre-analyzed emails have embeddings)
 
     Returns:
-        Matching emails
+        Matching emails ordered by relevance
     """
     try:
         client = get_supabase_client()
 
-        # Build search query
-        db_query = (
-            client.table("email_messages")
-            .select("id, subject, from_address, from_name, snippet, received_at, folder")
-            .eq("account_id", account_id)
-            .eq("is_trash", False)
-        )
-
-        if folder:
-            db_query = db_query.eq("folder", folder)
-
-        # Search in subject and body
-        db_query = db_query.or_(f"subject.ilike.%{query}%,body_text.ilike.%{query}%,from_address.ilike.%{query}%")
-        db_query = db_query.order("received_at", desc=True).limit(limit)
-
-        result = db_query.execute()
+        result = client.rpc("search_email_messages", {
+            "p_account_id": account_id,
+            "p_query": query,
+            "p_query_embedding": embed_query(query) if semantic else None,
+            "p_folder": folder,
+            "p_match_count": limit,
+        }, coalesce=True).execute()
 
         return json.dumps({
             "success": True,
@@ -570,80 +1004,181 @@ def email_mark_read(email_id: str, is_read: bool = True) -> str:
         return json.dumps({"success": False, "error": f"업데이트 오류: {str(e)}"}, ensure_ascii=False)
 
 
+def _bulk_update(account_id: str, filters: dict, changes: dict) -> int:
+    """One email_bulk_update RPC (a single UPDATE ... WHERE); returns changed rows"""
+    result = get_supabase_client().rpc("email_bulk_update", {
+        "p_account_id": account_id,
+        "p_email_ids": filters.get("email_ids") or None,
+        "p_sender": filters.get("sender"),
+        "p_folder": filters.get("folder"),
+        "p_category": filters.get("category"),
+        "p_received_after": filters.get("received_after"),
+        "p_received_before": filters.get("received_before"),
+        **changes,
+    }).execute()
+    return result.data or 0
+
+
 @tool
-def email_summarize_inbox(account_id: str, days: int = 7) -> str:
+def email_bulk_mark_read(
+    account_id: str,
+    is_read: bool = True,
+    email_ids: Optional[list[str]] = None,
+    sender: Optional[str] = None,
+    folder: Optional[str] = None,
+    category: Optional[str] = None,
+    received_after: Optional[str] = None,
+    received_before: Optional[str] = None,
+) -> str:
     """
-    Generate AI summary of recent inbox activity.
+    Mark many emails as read or unread in one call.
+    Select emails by id list and/or filters (all given filters must match).
 
     Args:
         account_id: Email account ID
-        days: Number of days to summarize (default: 7)
+        is_read: True to mark as read, False for unread
+        email_ids: Specific email IDs
+        sender: Sender address or name contains this (e.g. "acme.com" for a whole domain)
+        folder: Folder (e.g. INBOX)
+        category: AI category (meeting, invoice, newsletter, ...)
+        received_after: ISO date/time, inclusive
+        received_before: ISO date/time, exclusive
 
     Returns:
-        AI-generated inbox summary
+        Number of emails changed
     """
+    filters = {
+        "email_ids": email_ids,
+        "sender": sender,
+        "folder": folder,
+        "category": category,
+        "received_after": received_after,
+        "received_before": received_before,
+    }
+    if not any(filters.values()):
+        return json.dumps({"success": False, "error": "email_ids 또는 필터를 하나 이상 지정하세요."}, ensure_ascii=False)
+
     try:
-        client = get_supabase_client()
-        from datetime import datetime, timedelta
+        updated = _bulk_update(account_id, filters, {"p_is_read": is_read})
+        return json.dumps({
+            "success": True,
+            "updated": updated,
+            "message": f"{updated}개 이메일을 {'읽음' if is_read else '안읽음'}으로 표시했습니다.",
+        }, ensure_ascii=False)
 
-        # Get recent emails
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"일괄 업데이트 오류: {str(e)}"}, ensure_ascii=False)
 
-        result = (
-            client.table("email_messages")
-            .select("subject, from_name, from_address, snippet, received_at, is_read, ai_priority")
-            .eq("account_id", account_id)
-            .eq("folder", "INBOX")
-            .gte("received_at", since_date)
-            .order("received_at", desc=True)
-            .limit(50)
-            .execute()
-        )
 
-        emails = result.data or []
+@tool
+def email_bulk_label(
+    account_id: str,
+    add_labels: Optional[list[str]] = None,
+    remove_labels: Optional[list[str]] = None,
+    email_ids: Optional[list[str]] = None,
+    sender: Optional[str] = None,
+    folder: Optional[str] = None,
+    category: Optional[str] = None,
+    received_after: Optional[str] = None,
+    received_before: Optional[str] = None,
+) -> str:
+    """
+    Add and/or remove labels on many emails in one call.
+    Select emails by id list and/or filters (all given filters must match).
 
-        if not emails:
-            return json.dumps({
-                "success": True,
-                "summary": f"최근 {days}일간 수신된 이메일이 없습니다.",
-                "count": 0,
-            }, ensure_ascii=False)
+    Args:
+        account_id: Email account ID
+        add_labels: Labels to add
+        remove_labels: Labels to remove
+        email_ids: Specific email IDs
+        sender: Sender address or name contains this (e.g. "acme.com" for a whole domain)
+        folder: Folder (e.g. INBOX)
+        category: AI category (meeting, invoice, newsletter, ...)
+        received_after: ISO date/time, inclusive
+        received_before: ISO date/time, exclusive
 
-        # Prepare summary data
-        email_list = []
-        for e in emails:
-            email_list.append(f"- [{e.get('ai_priority', 'normal')}] {e.get('from_name', e['from_address'])}: {e.get('subject', '(제목 없음)')}")
+    Returns:
+        Number of emails changed
+    """
+    if not add_labels and not remove_labels:
+        return json.dumps({"success": False, "error": "add_labels 또는 remove_labels를 지정하세요."}, ensure_ascii=False)
+
+    filters = {
+        "email_ids": email_ids,
+        "sender": sender,
+        "folder": folder,
+        "category": category,
+        "received_after": received_after,
+        "received_before": received_before,
+    }
+    if not any(filters.values()):
+        return json.dumps({"success": False, "error": "email_ids 또는 필터를 하나 이상 지정하세요."}, ensure_ascii=False)
+
+    try:
+        updated = _bulk_update(account_id, filters, {
+            "p_add_labels": add_labels or None,
+            "p_remove_labels": remove_labels or None,
+        })
+        return json.dumps({
+            "success": True,
+            "updated": updated,
+            "added": add_labels or [],
+            "removed": remove_labels or [],
+        }, ensure_ascii=False)
 
-        prompt = ChatPromptTemplate.from_template("""최근 {days}일간 받은 이메일을 요약해주세요.
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"일괄 업데이트 오류: {str(e)}"}, ensure_ascii=False)
 
-총 {count}개 이메일:
-{email_list}
 
-다음 형식으로 요약해주세요:
+@tool
+def email_summarize_inbox(account_id: str, days: int = 7, fast: bool = False) -> str:
+    """
+    Generate AI summary of recent inbox activity.
 
-## 받은 편지함 요약
+    Mail is grouped per day by thread, sender and category; each group is
+    summarized (in parallel, reusing stored group summaries that have not
+    changed) and the group summaries are merged into one inbox summary.
 
-### 주요 이메일 (중요도 순)
-(가장 중요한 3-5개)
+    Args:
+        account_id: Email account ID
+        days: Number of days to summarize (default: 7)
+        fast: Counts and important/action-required lists only, without LLM calls
 
-### 카테고리별 분류
-- 업무 관련:
-- 뉴스레터/프로모션:
-- 기타:
+    Returns:
+        AI-generated inbox summary
+    """
+    try:
+        started = time.perf_counter()
+        client = get_supabase_client()
+        from datetime import datetime, timedelta, timezone
 
-### 액션 필요 항목
-(답장이 필요하거나 조치가 필요한 것들)
+        # Whole days, so stored per-day group summaries stay reusable
+        since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=max(days, 1) - 1)
+        since_date = since.isoformat()
 
-### 추천 사항
-(이메일 관리에 대한 조언)""")
+        emails = fetch_inbox(client, account_id, since_date)
 
-        chain = prompt | _get_llm()
+        if not emails:
+            return json.dumps({
+                "success": True,
+                "summary": f"최근 {days}일간 수신된 이메일이 없습니다.",
+                "count": 0,
+            }, ensure_ascii=False)
 
-        summary = chain.invoke({
-            "days": days,
-            "count": len(emails),
-            "email_list": "\n".join(email_list[:30]),
-        })
+        stats = inbox_stats(emails)
+
+        if fast:
+            summary = heuristic_digest(stats, days)
+            report = {"mode": "fast", "llm_calls": 0}
+        else:
+            clusters = build_clusters(emails)
+            # Per-cluster summaries on the cheap/fast tier, the final reduce on the main model
+            cluster_summaries, report = summarize_clusters(client, account_id, clusters, _get_llm("fast"))
+            summary, levels, failed_merges = reduce_summaries(
+                cluster_summaries, format_stats(stats), days, len(emails), _get_llm()
+            )
+            report = {"mode": "map_reduce", **report, "reduce_levels": levels, "failed_merges": failed_merges}
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 2)
 
         # Save summary
         try:
@@ -652,11 +1187,13 @@ def email_summarize_inbox(account_id: str, days: int = 7) -> str:
                 "account_id": account_id,
                 "summary_type": "custom",
                 "period_start": since_date,
-                "period_end": datetime.now().isoformat(),
-                "total_emails": len(emails),
-                "unread_count": len([e for e in emails if not e.get("is_read")]),
-                "urgent_count": len([e for e in emails if e.get("ai_priority") == "urgent"]),
-                "summary_text": summary.content,
+                "period_end": datetime.now(timezone.utc).isoformat(),
+                "total_emails": stats["total_emails"],
+                "unread_count": stats["unread_count"],
+                "urgent_count": stats["urgent_count"],
+                "summary_text": summary,
+                "key_highlights": stats["important"],
+                "categories_breakdown": stats["by_category"],
             }).execute()
         except Exception:
             pass
@@ -664,9 +1201,11 @@ def email_summarize_inbox(account_id: str, days: int = 7) -> str:
         return json.dumps({
             "success": True,
             "days": days,
-            "total_emails": len(emails),
-            "unread_count": len([e for e in emails if not e.get("is_read")]),
-            "summary": summary.content,
+            "total_emails": stats["total_emails"],
+            "unread_count": stats["unread_count"],
+            "truncated": len(emails) >= DIGEST_MAX_EMAILS,
+            "summary": summary,
+            "report": report,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -677,8 +1216,11 @@ def email_summarize_inbox(account_id: str, days: int = 7) -> str:
 register_tool(email_get)
 register_tool(email_list)
 register_tool(email_analyze)
+register_tool(email_triage_batch)
 register_tool(email_translate)
 register_tool(email_draft_reply)
 register_tool(email_search)
 register_tool(email_mark_read)
+register_tool(email_bulk_mark_read)
+register_tool(email_bulk_label)
 register_tool(email_summarize_inbox)
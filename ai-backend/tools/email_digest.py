@@ -0,0 +1,362 @@
+"""
+Email Inbox Digest - 계층적 받은 편지함 요약
+하루 단위로 스레드/발신자/카테고리 클러스터를 만들어 병렬 요약(map)한 뒤 합쳐서 최종 요약(reduce)
+클러스터 요약은 email_cluster_summaries에 저장해 새 메일이 들어온 클러스터만 다시 요약
+"""
+from collections import Counter, defaultdict
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils.hashing import content_hash
+from utils.llm import model_name
+
+DIGEST_MAX_EMAILS = 5000
+DIGEST_PAGE_SIZE = 1000
+DIGEST_COLUMNS = (
+    "id, thread_id, subject, from_name, from_address, snippet, received_at, is_read, "
+    "ai_priority, ai_category, ai_summary, ai_action_required"
+)
+
+# Threads/senders with fewer emails on a day fall into their category cluster
+CLUSTER_MIN_EMAILS = 3
+# Emails per map call (bigger clusters are split into parts)
+CLUSTER_MAX_EMAILS = 40
+CLUSTER_ENTRY_CHARS = 300
+MAP_MAX_CONCURRENCY = 6
+# Summaries per reduce call; more than this adds another reduce level
+REDUCE_FAN_IN = 30
+# Length each input of a failed merge is cut to when carried to the next level
+REDUCE_FALLBACK_CHARS = 200
+
+# Heuristic digest list sizes
+DIGEST_TOP_SENDERS = 5
+DIGEST_LISTED = 10
+
+_PRIORITY_ORDER = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+map_prompt = ChatPromptTemplate.from_template("""다음은 {day}에 받은 이메일 묶음({label}, {count}개)입니다.
+핵심 내용, 요청/마감, 내가 해야 할 조치를 한국어 2~3문장으로 요약하세요.
+
+{emails}""")
+
+merge_prompt = ChatPromptTemplate.from_template("""다음 이메일 묶음 요약들을 하나로 합쳐주세요.
+중요한 내용과 필요한 조치 위주로 한국어 5문장 이내로 정리하세요.
+
+{summaries}""")
+
+reduce_prompt = ChatPromptTemplate.from_template("""최근 {days}일간 받은 이메일을 요약해주세요.
+
+총 {count}개 이메일 통계:
+{stats}
+
+묶음별 요약:
+{summaries}
+
+다음 형식으로 요약해주세요:
+
+## 받은 편지함 요약
+
+### 주요 이메일 (중요도 순)
+(가장 중요한 3-5개)
+
+### 카테고리별 분류
+- 업무 관련:
+- 뉴스레터/프로모션:
+- 기타:
+
+### 액션 필요 항목
+(답장이 필요하거나 조치가 필요한 것들)
+
+### 추천 사항
+(이메일 관리에 대한 조언)""")
+
+
+def fetch_inbox(client, account_id: str, since: str) -> list[dict]:
+    """INBOX mail received since `since`, newest first, up to DIGEST_MAX_EMAILS"""
+    emails = []
+    while len(emails) < DIGEST_MAX_EMAILS:
+        page = (
+            client.table("email_messages")
+            .select(DIGEST_COLUMNS)
+            .eq("account_id", account_id)
+            .eq("folder", "INBOX")
+            .eq("is_trash", False)
+            .gte("received_at", since)
+            .order("received_at", desc=True)
+            .range(len(emails), len(emails) + DIGEST_PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        emails += page
+        if len(page) < DIGEST_PAGE_SIZE:
+            break
+    return emails[:DIGEST_MAX_EMAILS]
+
+
+def _day(email: dict) -> str:
+    return (email.get("received_at") or "")[:10]
+
+
+def _sender(email: dict) -> str:
+    return email.get("from_name") or email.get("from_address") or ""
+
+
+def build_clusters(emails: list[dict]) -> list[dict]:
+    """
+    Group each day's mail: a thread with CLUSTER_MIN_EMAILS+ messages that
+    day, else a sender with as many, else the (AI) category.
+
+    Returns:
+        [{"day", "key", "label", "emails", "fingerprint"}] - the fingerprint
+        changes when the cluster gains mail or its triage changes
+    """
+    by_day = defaultdict(list)
+    for email in emails:
+        by_day[_day(email)].append(email)
+
+    clusters = []
+    for day, day_emails in sorted(by_day.items()):
+        threads = Counter(e["thread_id"] for e in day_emails if e.get("thread_id"))
+        senders = Counter(e.get("from_address") for e in day_emails)
+
+        groups = defaultdict(list)
+        for email in day_emails:
+            if email.get("thread_id") and threads[email["thread_id"]] >= CLUSTER_MIN_EMAILS:
+                key = f"thread:{email['thread_id']}"
+            elif senders[email.get("from_address")] >= CLUSTER_MIN_EMAILS:
+                key = f"sender:{email.get('from_address')}"
+            else:
+                key = f"category:{email.get('ai_category') or 'other'}"
+            groups[key].append(email)
+
+        for key, members in groups.items():
+            members.sort(key=lambda e: e.get("received_at") or "")
+            kind, _, value = key.partition(":")
+            label = {
+                "thread": f"스레드 '{members[0].get('subject') or '(제목 없음)'}'",
+                "sender": f"발신자 {_sender(members[0])}",
+                "category": f"카테고리 {value}",
+            }[kind]
+            for part, start in enumerate(range(0, len(members), CLUSTER_MAX_EMAILS)):
+                chunk = members[start:start + CLUSTER_MAX_EMAILS]
+                clusters.append({
+                    "day": day,
+                    "key": key if part == 0 else f"{key}#{part + 1}",
+                    "label": label,
+                    "emails": chunk,
+                    "fingerprint": content_hash(*(f"{e['id']}:{e.get('ai_priority') or ''}" for e in chunk)),
+                })
+    return clusters
+
+
+def _entry(email: dict) -> str:
+    text = email.get("ai_summary") or email.get("snippet") or ""
+    return (
+        f"- [{email.get('ai_priority') or 'normal'}] {_sender(email)}: {email.get('subject') or '(제목 없음)'}"
+        f" — {text[:CLUSTER_ENTRY_CHARS]}"
+    )
+
+
+def _fallback_summary(cluster: dict) -> str:
+    """Cluster summary used when the map call fails (subjects only, never cached)"""
+    subjects = ", ".join(e.get("subject") or "(제목 없음)" for e in cluster["emails"][:5])
+    return f"{cluster['label']} {len(cluster['emails'])}건: {subjects}"
+
+
+def summarize_clusters(client, account_id: str, clusters: list[dict], model) -> tuple[list[dict], dict]:
+    """
+    Map step: reuse stored summaries whose fingerprint still matches and
+    summarize the rest in parallel, storing them with one upsert.
+
+    Returns:
+        ([{"day", "label", "count", "summary"}], {"clusters", "cached", "summarized", "failed"})
+    """
+    stored = {}
+    if clusters:
+        rows = (
+            client.table("email_cluster_summaries")
+            .select("day, cluster_key, fingerprint, summary")
+            .eq("account_id", account_id)
+            .gte("day", clusters[0]["day"])
+            .execute()
+        ).data or []
+        stored = {(r["day"], r["cluster_key"]): r for r in rows}
+
+    summaries = {}
+    pending = []
+    for index, cluster in enumerate(clusters):
+        hit = stored.get((cluster["day"], cluster["key"]))
+        if hit and hit["fingerprint"] == cluster["fingerprint"]:
+            summaries[index] = hit["summary"]
+        else:
+            pending.append((index, cluster))
+
+    failed = 0
+    if pending:
+        outputs = (map_prompt | model).batch(
+            [
+                {
+                    "day": cluster["day"],
+                    "label": cluster["label"],
+                    "count": len(cluster["emails"]),
+                    "emails": "\n".join(_entry(e) for e in cluster["emails"]),
+                }
+                for _, cluster in pending
+            ],
+            config={"max_concurrency": MAP_MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+
+        records = []
+        for (index, cluster), output in zip(pending, outputs):
+            if isinstance(output, Exception):
+                failed += 1
+                summaries[index] = _fallback_summary(cluster)
+                continue
+            summaries[index] = output.content
+            records.append({
+                "account_id": account_id,
+                "day": cluster["day"],
+                "cluster_key": cluster["key"],
+                "fingerprint": cluster["fingerprint"],
+                "email_count": len(cluster["emails"]),
+                "summary": output.content,
+                "model": model_name(model),
+            })
+
+        if records:
+            try:
+                client.table("email_cluster_summaries").upsert(
+                    records, on_conflict="account_id,day,cluster_key"
+                ).execute()
+            except Exception as e:
+                print(f"Email cluster summary save failed: {e}")
+
+    return (
+        [
+            {
+                "day": cluster["day"],
+                "label": cluster["label"],
+                "count": len(cluster["emails"]),
+                "summary": summaries[index],
+            }
+            for index, cluster in enumerate(clusters)
+        ],
+        {
+            "clusters": len(clusters),
+            "cached": len(clusters) - len(pending),
+            "summarized": len(pending) - failed,
+            "failed": failed,
+        },
+    )
+
+
+def reduce_summaries(summaries: list[dict], stats: str, days: int, count: int, model) -> tuple[str, int, int]:
+    """
+    Reduce step: merge cluster summaries REDUCE_FAN_IN at a time (in parallel)
+    until one final call can take them all.
+
+    Returns (summary, reduce levels, failed merge calls).
+    """
+    texts = [f"[{s['day']}] {s['label']} ({s['count']}건): {s['summary']}" for s in summaries]
+    levels = 1
+    failed = 0
+    while len(texts) > REDUCE_FAN_IN:
+        groups = [texts[i:i + REDUCE_FAN_IN] for i in range(0, len(texts), REDUCE_FAN_IN)]
+        outputs = (merge_prompt | model).batch(
+            [{"summaries": "\n".join(group)} for group in groups],
+            config={"max_concurrency": MAP_MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+        # A failed merge carries every input on, shortened, rather than dropping any
+        merged = []
+        for group, output in zip(groups, outputs):
+            if isinstance(output, Exception):
+                print(f"Email digest merge failed: {output}")
+                failed += 1
+                merged.extend(text[:REDUCE_FALLBACK_CHARS] for text in group)
+            else:
+                merged.append(output.content)
+        levels += 1
+        # Every call failed: another round would not shrink anything, so hand what we have to the final call
+        stalled = len(merged) == len(texts)
+        texts = merged
+        if stalled:
+            break
+
+    final = (reduce_prompt | model).invoke({
+        "days": days,
+        "count": count,
+        "stats": stats,
+        "summaries": "\n".join(texts),
+    })
+    return final.content, levels, failed
+
+
+def inbox_stats(emails: list[dict]) -> dict:
+    """Counts and notable mail computed without any LLM call"""
+    by_priority = Counter(e.get("ai_priority") or "unanalyzed" for e in emails)
+    by_category = Counter(e.get("ai_category") or "unanalyzed" for e in emails)
+    threads = Counter(e["thread_id"] for e in emails if e.get("thread_id"))
+    thread_subjects = {e["thread_id"]: e.get("subject") for e in emails if e.get("thread_id")}
+
+    # emails are newest first; the stable sort keeps that order within a priority
+    important = sorted(
+        (e for e in emails if e.get("ai_priority") in ("urgent", "high")),
+        key=lambda e: _PRIORITY_ORDER[e["ai_priority"]],
+    )
+    return {
+        "total_emails": len(emails),
+        "unread_count": sum(1 for e in emails if not e.get("is_read")),
+        "urgent_count": by_priority.get("urgent", 0),
+        "by_priority": dict(by_priority),
+        "by_category": dict(by_category),
+        "top_senders": [
+            {"sender": sender, "count": count}
+            for sender, count in Counter(_sender(e) for e in emails).most_common(DIGEST_TOP_SENDERS)
+        ],
+        "busiest_threads": [
+            {"subject": thread_subjects[thread_id], "count": count}
+            for thread_id, count in threads.most_common(DIGEST_TOP_SENDERS)
+            if count > 1
+        ],
+        "important": [
+            {"id": e["id"], "subject": e.get("subject"), "from": _sender(e), "priority": e["ai_priority"]}
+            for e in important[:DIGEST_LISTED]
+        ],
+        "action_required": [
+            {"id": e["id"], "subject": e.get("subject"), "from": _sender(e), "summary": e.get("ai_summary")}
+            for e in emails if e.get("ai_action_required")
+        ][:DIGEST_LISTED],
+    }
+
+
+def format_stats(stats: dict) -> str:
+    lines = [
+        f"- 읽지 않음: {stats['unread_count']}개",
+        "- 중요도: " + ", ".join(f"{k} {v}" for k, v in sorted(
+            stats["by_priority"].items(), key=lambda item: _PRIORITY_ORDER.get(item[0], 9)
+        )),
+        "- 카테고리: " + ", ".join(f"{k} {v}" for k, v in Counter(stats["by_category"]).most_common()),
+        "- 많이 보낸 발신자: " + ", ".join(f"{s['sender']}({s['count']})" for s in stats["top_senders"]),
+    ]
+    if stats["busiest_threads"]:
+        lines.append("- 활발한 스레드: " + ", ".join(f"{t['subject']}({t['count']})" for t in stats["busiest_threads"]))
+    return "\n".join(lines)
+
+
+def heuristic_digest(stats: dict, days: int) -> str:
+    """Markdown summary from inbox_stats alone (fast path)"""
+    sections = [f"## 받은 편지함 요약 (최근 {days}일, {stats['total_emails']}개)", "", format_stats(stats)]
+    if stats["important"]:
+        sections += ["", "### 주요 이메일"] + [
+            f"- [{e['priority']}] {e['from']}: {e['subject'] or '(제목 없음)'}" for e in stats["important"]
+        ]
+    if stats["action_required"]:
+        sections += ["", "### 액션 필요 항목"] + [
+            f"- {e['from']}: {e['subject'] or '(제목 없음)'}" + (f" — {e['summary']}" if e["summary"] else "")
+            for e in stats["action_required"]
+        ]
+    unanalyzed = stats["by_priority"].get("unanalyzed", 0)
+    if unanalyzed:
+        sections += ["", f"(아직 분류되지 않은 이메일 {unanalyzed}개는 중요도/액션 목록에 포함되지 않았습니다.)"]
+    return "\n".join(sections)
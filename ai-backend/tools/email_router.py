@@ -0,0 +1,18 @@
+"""
+Email API Router
+에이전트 도구 외부에서 쓰는 이메일 엔드포인트 (사전 분석 워커 상태)
+"""
+from fastapi import APIRouter, HTTPException
+
+from .email_worker import get_worker_metrics
+
+router = APIRouter()
+
+
+@router.get("/worker/metrics")
+def worker_metrics():
+    """Pre-analysis worker counters, pending queue size, queue lag and processing rate"""
+    try:
+        return get_worker_metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
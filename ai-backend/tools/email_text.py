@@ -0,0 +1,162 @@
+"""
+Email Text - 이메일 본문 분해 도구
+HTML → 텍스트, 인용(답장 체인)/서명 분리, 번역 메모리용 문단/문장 세그먼트 분할
+"""
+from html import unescape
+import re
+
+from utils.hashing import content_hash
+
+# Paragraphs longer than this are split into sentences for the translation memory
+SEGMENT_MAX_CHARS = 600
+
+_QUOTE_PREFIX_RE = re.compile(r"^((?:>\s?)+)")
+_QUOTE_HEADER_RES = [
+    re.compile(r"^On .{5,200} wrote:\s*$"),
+    re.compile(r"^.{0,200}(님이 작성|작성:)\s*$"),
+    re.compile(r"^-{2,}\s*(Original Message|Forwarded message|원본 메시지|전달된 메시지)\s*-{2,}", re.IGNORECASE),
+]
+_OUTLOOK_FROM_RE = re.compile(r"^(From|보낸 사람):\s", re.IGNORECASE)
+_OUTLOOK_NEXT_RE = re.compile(r"^(Sent|Date|To|보낸 날짜|받는 사람):\s", re.IGNORECASE)
+_SIGNATURE_RES = [
+    re.compile(r"^--\s*$"),
+    re.compile(r"^(Sent from my \w+|iPhone에서 보냄|Galaxy에서 보냄|모바일에서 보냄)", re.IGNORECASE),
+]
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*")
+_HAS_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+_URL_ONLY_RE = re.compile(r"^\s*(https?://\S+|\S+@\S+\.\S+)\s*$")
+
+_TAG_BREAK_RE = re.compile(r"<\s*/?\s*(br|p|div|tr|h[1-6]|li)\b[^>]*>", re.IGNORECASE)
+_TAG_DROP_RE = re.compile(r"<(script|style|head)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n\s*(\n\s*)+")
+
+
+def html_to_text(html: str) -> str:
+    """Rough plain text for HTML-only mail (block tags become line breaks)"""
+    text = _TAG_DROP_RE.sub("", html)
+    text = _TAG_BREAK_RE.sub("\n", text)
+    text = unescape(_TAG_RE.sub("", text))
+    text = "\n".join(line.strip() for line in text.splitlines())
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def email_body(email: dict) -> str:
+    """Plain text body of an email row (body_text, else converted body_html)"""
+    if email.get("body_text"):
+        return email["body_text"]
+    return html_to_text(email.get("body_html") or "")
+
+
+def _quote_start(lines: list[str]) -> int | None:
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if any(pattern.match(stripped) for pattern in _QUOTE_HEADER_RES):
+            return i
+        if _OUTLOOK_FROM_RE.match(stripped) and any(
+            _OUTLOOK_NEXT_RE.match(following.strip()) for following in lines[i + 1:i + 4]
+        ):
+            return i
+        # A '>' block that runs (ignoring blank lines) to the end of the mail
+        if stripped.startswith(">") and all(
+            not rest.strip() or rest.lstrip().startswith(">") for rest in lines[i:]
+        ):
+            return i
+    return None
+
+
+def split_quoted(body: str) -> tuple[str, str]:
+    """(the sender's own text, quoted reply chain) - quoted is '' when none is found"""
+    lines = body.splitlines()
+    start = _quote_start(lines)
+    if start is None:
+        return body.strip(), ""
+    return "\n".join(lines[:start]).strip(), "\n".join(lines[start:]).strip()
+
+
+def strip_signature(text: str) -> str:
+    """Drop a trailing signature block ('-- ' delimiter or a mobile client footer)"""
+    lines = text.splitlines()
+    for i in range(len(lines) - 1, -1, -1):
+        if any(pattern.match(lines[i].strip()) for pattern in _SIGNATURE_RES):
+            # Only a short trailing block counts as a signature
+            if len(lines) - i <= 10:
+                return "\n".join(lines[:i]).rstrip()
+            break
+    return text.rstrip()
+
+
+def normalize_segment(text: str) -> str:
+    """Segment text without quote markers and with collapsed whitespace (hash input)"""
+    lines = [_QUOTE_PREFIX_RE.sub("", line) for line in text.splitlines()]
+    return " ".join(" ".join(lines).split())
+
+
+def segment_hash(text: str) -> str:
+    return content_hash(normalize_segment(text))
+
+
+def is_translatable(text: str) -> bool:
+    """False for segments with no words (rules, numbers) or a bare URL/address"""
+    return bool(_HAS_WORD_RE.search(text)) and not _URL_ONLY_RE.match(text)
+
+
+def split_segments(body: str) -> list[dict]:
+    """
+    Paragraph segments (long paragraphs split into sentences), in order.
+
+    Quote markers are moved out of the text into "prefix" so a paragraph
+    quoted in a later reply gets the same hash as the original.
+
+    Returns:
+        [{"text", "prefix", "separator"}] - prefix + text + separator for each
+        segment, in order, rebuilds the body (quote markers are re-added per line)
+    """
+    segments = []
+    # Blank lines, including quoted blank lines ('>'), separate paragraphs
+    paragraphs = re.split(r"(\n[ \t>]*\n)", body.strip())
+    blocks = []
+    for index in range(0, len(paragraphs), 2):
+        paragraph = paragraphs[index]
+        separator = paragraphs[index + 1] if index + 1 < len(paragraphs) else ""
+        if not paragraph.strip():
+            continue
+        # Lines with a different quote depth ("On ... wrote:" above "> ...") are separate blocks
+        runs = []
+        for line in paragraph.splitlines():
+            match = _QUOTE_PREFIX_RE.match(line)
+            prefix = match.group(1) if match else ""
+            if runs and runs[-1][0].strip() == prefix.strip():
+                runs[-1][1].append(line[len(prefix):])
+            else:
+                runs.append((prefix, [line[len(prefix):]]))
+        for i, (prefix, lines) in enumerate(runs):
+            blocks.append((prefix, "\n".join(lines), separator if i == len(runs) - 1 else "\n"))
+
+    for prefix, text, separator in blocks:
+        if len(text) <= SEGMENT_MAX_CHARS:
+            segments.append({"text": text, "prefix": prefix, "separator": separator})
+            continue
+        sentences = [s for s in _SENTENCE_RE.split(" ".join(text.split())) if s and s.strip()]
+        for i, sentence in enumerate(sentences):
+            segments.append({
+                "text": sentence,
+                "prefix": prefix,
+                "separator": separator if i == len(sentences) - 1 else " ",
+            })
+    return segments
+
+
+def join_segments(segments: list[dict], texts: list[str]) -> str:
+    """Rebuild a body from split_segments output with replacement texts"""
+    parts = []
+    at_line_start = True
+    for segment, text in zip(segments, texts):
+        if segment["prefix"]:
+            text = "\n".join(
+                (segment["prefix"] if i or at_line_start else "") + line
+                for i, line in enumerate(text.splitlines() or [""])
+            )
+        parts.append(text + segment["separator"])
+        at_line_start = segment["separator"].endswith("\n")
+    return "".join(parts)
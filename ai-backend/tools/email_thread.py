@@ -0,0 +1,171 @@
+"""
+Email Thread - 답장 작성용 스레드 컨텍스트
+인용문/서명을 걷어낸 본문 + 이전 메시지 요약(ai_summary 재사용)으로 토큰 예산 안의 압축 컨텍스트 구성
+"""
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils.text import count_tokens, truncate_tokens
+
+from .email_text import email_body, split_quoted, strip_signature
+
+THREAD_MAX_MESSAGES = 30
+THREAD_COLUMNS = (
+    "id, from_name, from_address, subject, body_text, body_html, snippet, "
+    "received_at, sent_at, is_sent, ai_summary"
+)
+
+# Token budget for the whole reply context / share reserved for the email being answered
+REPLY_CONTEXT_TOKENS = 3000
+REPLY_EMAIL_SHARE = 0.6
+# Earlier messages this short are included as-is instead of summarized
+INLINE_MESSAGE_TOKENS = 120
+# Expected size of one summary line when planning which messages fit
+SUMMARY_TOKENS_ESTIMATE = 80
+SUMMARY_MAX_CONCURRENCY = 4
+
+message_summary_prompt = ChatPromptTemplate.from_template("""다음 이메일을 한국어 한두 문장으로 요약하세요.
+요청, 결정, 날짜/금액 같은 구체적인 내용은 남기세요.
+
+발신자: {sender}
+제목: {subject}
+내용:
+{body}""")
+
+
+def own_text(email: dict) -> str:
+    """Body without the quoted reply chain and the signature"""
+    own, _ = split_quoted(email_body(email))
+    return strip_signature(own)
+
+
+def _timestamp(email: dict) -> str:
+    return email.get("received_at") or email.get("sent_at") or ""
+
+
+def _sender(email: dict) -> str:
+    if email.get("is_sent"):
+        return "나"
+    name = email.get("from_name")
+    return f"{name} <{email.get('from_address')}>" if name else email.get("from_address") or ""
+
+
+def fetch_thread(client, email: dict) -> list[dict]:
+    """Earlier messages of the email's thread (received and sent), oldest first"""
+    if not email.get("thread_id"):
+        return []
+    rows = (
+        client.table("email_messages")
+        .select(THREAD_COLUMNS)
+        .eq("account_id", email["account_id"])
+        .eq("thread_id", email["thread_id"])
+        .neq("id", email["id"])
+        .order("received_at", desc=True)
+        .limit(THREAD_MAX_MESSAGES)
+        .execute()
+    ).data or []
+    cutoff = _timestamp(email)
+    return sorted((m for m in rows if _timestamp(m) <= cutoff), key=_timestamp)
+
+
+def _summarize(client, messages: list[dict], model) -> dict[str, str]:
+    """Summaries for messages without ai_summary, in one batch; stored for next time"""
+    outputs = (message_summary_prompt | model).batch(
+        [
+            {
+                "sender": _sender(m),
+                "subject": m.get("subject") or "",
+                "body": truncate_tokens(m["own_text"], REPLY_CONTEXT_TOKENS),
+            }
+            for m in messages
+        ],
+        config={"max_concurrency": SUMMARY_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    summaries = {
+        m["id"]: output.content.strip()
+        for m, output in zip(messages, outputs)
+        if not isinstance(output, Exception)
+    }
+    if summaries:
+        try:
+            client.rpc("email_save_summaries", {
+                "p_items": [{"id": id_, "summary": summary} for id_, summary in summaries.items()],
+            }).execute()
+        except Exception as e:
+            print(f"Email summary save failed: {e}")
+    return summaries
+
+
+def build_reply_context(client, email: dict, model, max_tokens: int = REPLY_CONTEXT_TOKENS) -> tuple[str, str, dict]:
+    """
+    Compact context for drafting a reply within max_tokens.
+
+    The email being answered keeps its own text (quotes and signature
+    removed, capped at REPLY_EMAIL_SHARE of the budget). Earlier thread
+    messages are added newest first as one line each: the stored ai_summary,
+    the text itself when short, or a fresh summary (generated in one batch
+    and saved to ai_summary). Messages that no longer fit are counted but
+    left out. Mail without a stored thread falls back to its own quoted chain.
+
+    Returns:
+        (email text, history text, {"thread_messages", "included", "summarized",
+         "stored_summaries", "omitted", "context_tokens", "original_tokens"})
+    """
+    body = own_text(email) or email.get("snippet") or ""
+    body = truncate_tokens(body, int(max_tokens * REPLY_EMAIL_SHARE))
+    remaining = max_tokens - count_tokens(body)
+    report = {
+        "thread_messages": 0,
+        "included": 0,
+        "summarized": 0,
+        "stored_summaries": 0,
+        "omitted": 0,
+        "original_tokens": count_tokens(email_body(email)),
+    }
+
+    thread = fetch_thread(client, email)
+    report["thread_messages"] = len(thread)
+
+    if not thread:
+        _, quoted = split_quoted(email_body(email))
+        history = truncate_tokens(quoted, max(remaining, 0)) if quoted and remaining > 0 else ""
+        report["context_tokens"] = count_tokens(body) + count_tokens(history)
+        return body, history, report
+
+    # Plan newest first, so the most recent messages win the budget
+    planned = []
+    to_summarize = []
+    for message in reversed(thread):
+        message["own_text"] = own_text(message) or message.get("snippet") or ""
+        if message.get("ai_summary"):
+            cost = count_tokens(message["ai_summary"])
+        elif count_tokens(message["own_text"]) <= INLINE_MESSAGE_TOKENS:
+            cost = count_tokens(message["own_text"])
+        else:
+            cost = SUMMARY_TOKENS_ESTIMATE
+            to_summarize.append(message)
+        if cost > remaining:
+            to_summarize = [m for m in to_summarize if m is not message]
+            break
+        remaining -= cost
+        planned.append(message)
+    report["omitted"] = len(thread) - len(planned)
+
+    summaries = _summarize(client, to_summarize, model) if to_summarize else {}
+    report["summarized"] = len(summaries)
+    report["stored_summaries"] = sum(1 for m in planned if m.get("ai_summary"))
+
+    lines = []
+    for message in reversed(planned):
+        text = message.get("ai_summary") or summaries.get(message["id"])
+        if text is None:
+            # Short message, or its summary failed: its own text, within the per-message cap
+            text = truncate_tokens(message["own_text"], SUMMARY_TOKENS_ESTIMATE if message in to_summarize else INLINE_MESSAGE_TOKENS)
+        lines.append(f"- [{_timestamp(message)[:16].replace('T', ' ')}] {_sender(message)}: {' '.join(text.split())}")
+    report["included"] = len(lines)
+
+    if report["omitted"]:
+        lines.insert(0, f"(이전 메시지 {report['omitted']}개 생략)")
+    history = "\n".join(lines)
+    report["context_tokens"] = count_tokens(body) + count_tokens(history)
+    return body, history, report
@@ -0,0 +1,344 @@
+"""
+Email Pre-analysis Worker - 새 메일 백그라운드 사전 분석
+ai_analyzed_at이 비어 있는 받은 편지함 메일을 오래된 순으로 가져와 우선순위/요약을 채우고
+사용자 선호 언어로 미리 번역해 email_translations에 저장 (에이전트 도구는 저장된 결과를 읽기만 함)
+
+단독 실행: python -m tools.email_worker
+"""
+from collections import deque
+from datetime import datetime, timezone
+import re
+import threading
+import time
+
+from config import get_settings
+from utils.embeddings import embed_texts
+from utils.supabase import get_supabase_client
+
+from .email import LANGUAGE_NAMES, store_translations, translate_emails, triage_emails
+
+settings = get_settings()
+
+# Emails left out of this many answered triage requests are marked failed (ai_triage_failed_at)
+# and leave the queue; requests that hit a transient error (timeout, 429, 5xx) do not count
+# as attempts, other errors (context length, content filter) do
+MAX_TRIAGE_ATTEMPTS = 3
+# Leading body characters embedded with the subject for semantic email_search
+EMBEDDING_BODY_CHARS = 2000
+# Window for the emails-per-minute rate
+RATE_WINDOW_SECONDS = 600
+
+_PENDING_COLUMNS = (
+    "id, account_id, subject, from_name, from_address, body_text, body_html, snippet, created_at"
+)
+
+# jarvis_persona.language is stored as a display name ("한국어")
+_LANGUAGE_CODES = {name: code for code, name in LANGUAGE_NAMES.items()} | {
+    "korean": "ko",
+    "english": "en",
+    "japanese": "ja",
+    "chinese": "zh",
+}
+
+_HANGUL = re.compile(r"[가-힣]")
+_KANA = re.compile(r"[぀-ヿ]")
+_HAN = re.compile(r"[一-鿿]")
+_LATIN = re.compile(r"[A-Za-z]")
+
+_attempts: dict[str, int] = {}
+_processed = deque()  # (monotonic time, emails) per run
+_metrics = {
+    "running": False,
+    "started_at": None,
+    "last_run_at": None,
+    "last_run_seconds": None,
+    "last_error": None,
+    "runs": 0,
+    "analyzed": 0,
+    "triage_failed": 0,
+    "triage_errors": 0,
+    "translated": 0,
+    "translation_failures": 0,
+    "embedded": 0,
+}
+_metrics_lock = threading.Lock()
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def detect_language(text: str) -> str | None:
+    """
+    Script-based guess: "ko", "ja", "zh", "latin" (any Latin-script language)
+    or None when there is too little text to tell.
+    """
+    sample = text[:2000]
+    counts = {
+        "ko": len(_HANGUL.findall(sample)),
+        "ja": len(_KANA.findall(sample)),
+        "zh": len(_HAN.findall(sample)),
+        "latin": len(_LATIN.findall(sample)),
+    }
+    # Japanese mixes kana with kanji; any meaningful kana share means Japanese
+    if counts["ja"] >= 10 and counts["ja"] >= counts["ko"]:
+        return "ja"
+    language, count = max(counts.items(), key=lambda item: item[1])
+    return language if count >= 10 else None
+
+
+def needs_translation(text: str, target_language: str) -> bool:
+    detected = detect_language(text)
+    if detected is None:
+        return False
+    if target_language in ("ko", "ja", "zh"):
+        return detected != target_language
+    # Latin-script targets: only CJK mail is known to be in another language
+    return detected != "latin"
+
+
+def _preferred_languages(client, account_ids: list[str]) -> dict[str, str]:
+    """account_id -> language code from the owner's user_settings"""
+    accounts = (
+        client.table("email_accounts")
+        .select("id, user_id")
+        .in_("id", account_ids)
+        .execute()
+    ).data or []
+    user_ids = list({a["user_id"] for a in accounts})
+    rows = (
+        client.table("user_settings")
+        .select("user_id, jarvis_persona, preferences")
+        .in_("user_id", user_ids)
+        .execute()
+    ).data if user_ids else []
+
+    by_user = {}
+    for row in rows or []:
+        preferences = row.get("preferences") or {}
+        language = preferences.get("email_language") or (row.get("jarvis_persona") or {}).get("language")
+        if language:
+            by_user[row["user_id"]] = _LANGUAGE_CODES.get(language.lower(), _LANGUAGE_CODES.get(language, language))
+
+    return {
+        a["id"]: by_user.get(a["user_id"], settings.email_default_language)
+        for a in accounts
+    }
+
+
+def _pending_query(client, columns: str, **kwargs):
+    return (
+        client.table("email_messages")
+        .select(columns, **kwargs)
+        .is_("ai_analyzed_at", "null")
+        .is_("ai_triage_failed_at", "null")
+        .eq("folder", "INBOX")
+        .eq("is_trash", False)
+    )
+
+
+def _mark_triage_failed(client, email_ids: list[str]) -> None:
+    """
+    Take mail the model keeps leaving out of the queue without storing a
+    made-up result: ai_analyzed_at stays empty, so email_analyze analyzes it live
+    """
+    client.table("email_messages").update({
+        "ai_triage_failed_at": datetime.now(timezone.utc).isoformat(),
+    }).in_("id", email_ids).execute()
+
+
+def _translate(client, emails: list[dict], languages: dict[str, str]) -> tuple[int, int]:
+    """Pre-translate mail not already in its owner's language; returns (translated, failed)"""
+    jobs = []
+    for email in emails:
+        target = languages.get(email["account_id"], settings.email_default_language)
+        text = f"{email.get('subject') or ''}\n{email.get('body_text') or email.get('snippet') or ''}"
+        if needs_translation(text, target):
+            jobs.append((email, target))
+    if not jobs:
+        return 0, 0
+
+    # One translation memory pass for the whole batch: segments shared across
+    # these emails (newsletters, quoted chains) are translated once
+    results, _ = translate_emails(client, jobs)
+    records = [
+        {"email_id": email["id"], "target_language": target, "translation": result["translation"]}
+        for (email, target), result in zip(jobs, results)
+        if result["complete"]
+    ]
+    store_translations(client, records)
+    return len(records), len(jobs) - len(records)
+
+
+def _embed(client, emails: list[dict]) -> int:
+    """Store search embeddings for a batch in one embeddings call and one RPC"""
+    if not settings.openai_api_key:
+        return 0
+    try:
+        vectors = embed_texts([
+            f"{email.get('subject') or ''}\n\n{(email.get('body_text') or email.get('snippet') or '')[:EMBEDDING_BODY_CHARS]}"
+            for email in emails
+        ])
+        result = client.rpc("email_save_embeddings", {
+            "p_items": [{"id": email["id"], "embedding": vector} for email, vector in zip(emails, vectors)],
+        }).execute()
+        return result.data or 0
+    except Exception as e:
+        print(f"Email embedding failed: {e}")
+        return 0
+
+
+def run_once(batch_size: int | None = None) -> dict:
+    """
+    Analyze one batch of the oldest pending inbox mail.
+
+    Returns:
+        {"emails", "analyzed", "triage_failed", "triage_errors", "translated",
+         "translation_failures", "embedded", "seconds"}
+        triage_errors counts emails whose triage request hit a transient error;
+        they are retried on a later run without using up an attempt.
+    """
+    started = time.monotonic()
+    client = get_supabase_client()
+    emails = (
+        _pending_query(client, _PENDING_COLUMNS)
+        .order("created_at")
+        .limit(batch_size or settings.email_worker_batch_size)
+        .execute()
+    ).data or []
+    if not emails:
+        return {
+            "emails": 0, "analyzed": 0, "triage_failed": 0, "triage_errors": 0, "translated": 0,
+            "translation_failures": 0, "embedded": 0, "seconds": 0.0,
+        }
+
+    results, report = triage_emails(emails)
+    analyzed = {r["id"] for r in results}
+    errored = set(report["errored_ids"])
+    failed = []
+    for email in emails:
+        if email["id"] in analyzed:
+            _attempts.pop(email["id"], None)
+            continue
+        # The request never got an answer (outage, rate limit): not the email's fault.
+        # Errors that would repeat for this batch (context length, content filter) count
+        if email["id"] in errored:
+            continue
+        _attempts[email["id"]] = _attempts.get(email["id"], 0) + 1
+        if _attempts[email["id"]] >= MAX_TRIAGE_ATTEMPTS:
+            _attempts.pop(email["id"])
+            failed.append(email["id"])
+
+    if results:
+        client.rpc("email_apply_triage", {"p_results": results}).execute()
+    if failed:
+        _mark_triage_failed(client, failed)
+
+    # Mail still waiting for a triage retry comes back next run; translate/embed it then
+    applied = analyzed | set(failed)
+    done = [e for e in emails if e["id"] in applied]
+    languages = _preferred_languages(client, list({e["account_id"] for e in done})) if done else {}
+    translated, translation_failures = _translate(client, done, languages)
+    embedded = _embed(client, done) if done else 0
+
+    return {
+        "emails": len(emails),
+        "analyzed": len(results),
+        "triage_failed": len(failed),
+        "triage_errors": len(errored),
+        "translated": translated,
+        "translation_failures": translation_failures,
+        "embedded": embedded,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def _record_run(run: dict) -> None:
+    now = time.monotonic()
+    with _metrics_lock:
+        _metrics["runs"] += 1
+        _metrics["last_run_at"] = datetime.now().isoformat()
+        _metrics["last_run_seconds"] = run["seconds"]
+        for key in ("analyzed", "triage_failed", "triage_errors", "translated", "translation_failures", "embedded"):
+            _metrics[key] += run[key]
+        done = run["analyzed"] + run["triage_failed"]
+        if done:
+            _processed.append((now, done))
+        while _processed and now - _processed[0][0] > RATE_WINDOW_SECONDS:
+            _processed.popleft()
+
+
+def _loop() -> None:
+    while not _stop.is_set():
+        try:
+            run = run_once()
+            _record_run(run)
+            with _metrics_lock:
+                _metrics["last_error"] = None
+        except Exception as e:
+            print(f"Email worker run failed: {e}")
+            run = {"emails": 0}
+            with _metrics_lock:
+                _metrics["last_error"] = str(e)
+        # A full batch means more is waiting: go again right away, unless the
+        # model is failing requests, then back off for an interval
+        if run["emails"] < settings.email_worker_batch_size or run.get("triage_errors"):
+            _stop.wait(settings.email_worker_interval_seconds)
+
+
+def start_worker() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="email-preanalysis", daemon=True)
+    _thread.start()
+    with _metrics_lock:
+        _metrics["running"] = True
+        _metrics["started_at"] = datetime.now().isoformat()
+
+
+def stop_worker(timeout: float = 5.0) -> None:
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+    with _metrics_lock:
+        _metrics["running"] = False
+
+
+def get_worker_metrics() -> dict:
+    """
+    Counters plus live queue state: pending emails, queue lag (age of the
+    oldest pending email) and emails processed per minute.
+    """
+    client = get_supabase_client()
+    # Planner estimate on large tables, exact count on small ones
+    pending = _pending_query(client, "id", count="estimated").limit(1).execute()
+    oldest = _pending_query(client, "created_at").order("created_at").limit(1).execute()
+
+    lag_seconds = 0.0
+    if oldest.data:
+        created_at = datetime.fromisoformat(oldest.data[0]["created_at"].replace("Z", "+00:00"))
+        lag_seconds = round((datetime.now(timezone.utc) - created_at).total_seconds(), 1)
+
+    with _metrics_lock:
+        window = RATE_WINDOW_SECONDS
+        if _processed:
+            window = min(window, max(time.monotonic() - _processed[0][0], settings.email_worker_interval_seconds))
+        per_minute = sum(count for _, count in _processed) * 60 / window
+        return {
+            **_metrics,
+            "pending": pending.count or 0,
+            "queue_lag_seconds": lag_seconds,
+            "emails_per_minute": round(per_minute, 2),
+            "retrying": len(_attempts),
+        }
+
+
+if __name__ == "__main__":
+    print("Email pre-analysis worker running (Ctrl+C to stop)")
+    with _metrics_lock:
+        _metrics["running"] = True
+        _metrics["started_at"] = datetime.now().isoformat()
+    try:
+        _loop()
+    except KeyboardInterrupt:
+        pass
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from utils.write_behind import get_write_behind_stats
+
 from .registry import list_tools_info, get_tool
 
 router = APIRouter()
@@ -39,6 +41,12 @@ async def execute_tool(request: ToolExecuteRequest):
         return ToolExecuteResponse(result=str(e), success=False)
 
 
+@router.get("/write-behind/stats")
+async def write_behind_stats():
+    """Per-table write-behind queue counters (pending, written, failed, dropped, batches)"""
+    return {"queues": get_write_behind_stats()}
+
+
 @router.get("/{tool_name}")
 async def get_tool_info(tool_name: str):
     """Get information about a specific tool"""
@@ -0,0 +1,416 @@
+"""
+Sheet Engine - 시트 데이터 컬럼형(NumPy) 표현과 벡터화 집계
+시트 버전마다 한 번 만들어 ai_sheet 도구들이 공유
+"""
+from typing import Any
+
+import numpy as np
+
+from config import get_settings
+from utils.cache import LRUCache
+
+settings = get_settings()
+
+# Columnar snapshots kept per process, keyed by (sheet_id, version)
+_columnar_cache = LRUCache(
+    max_entries=64,
+    max_bytes=settings.sheet_cache_max_mb * 1024 * 1024,
+    sizeof=lambda columnar: columnar.nbytes,
+)
+
+# Rough per-cell footprint of a Python string held in an object array
+OBJECT_CELL_BYTES = 64
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parse_date(value: str):
+    """ISO date prefix (YYYY-MM-DD) as datetime64[D], or None"""
+    try:
+        return np.datetime64(str(value)[:10], "D")
+    except ValueError:
+        return None
+
+
+def to_python(value: Any, integral: bool = False) -> Any:
+    """Convert a NumPy scalar to a JSON-friendly Python value"""
+    value = value.item() if hasattr(value, "item") else value
+    if integral and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class Column:
+    """
+    One sheet column.
+
+    Numeric columns hold float64 values with NaN for missing cells,
+    categorical columns hold values as strings; valid marks non-null cells.
+    """
+
+    def __init__(self, definition: dict, raw: list[Any]):
+        self.id = definition["id"]
+        self.name = definition.get("name", self.id)
+        self.type = definition.get("type", "text")
+        self._dates: np.ndarray | None = None
+
+        present = [v for v in raw if v is not None]
+        # Same rule the analyze tool has always used: declared number type
+        # or every present value is numeric
+        self.is_numeric = self.type == "number" or (bool(present) and all(_is_number(v) for v in present))
+
+        if self.is_numeric:
+            self.valid = np.fromiter((_is_number(v) for v in raw), dtype=bool, count=len(raw))
+            self.values = np.fromiter(
+                (v if _is_number(v) else np.nan for v in raw), dtype=np.float64, count=len(raw)
+            )
+            self.integral = all(isinstance(v, int) for v in present if _is_number(v))
+        else:
+            self.valid = np.fromiter((v is not None for v in raw), dtype=bool, count=len(raw))
+            self.values = np.array(["" if v is None else str(v) for v in raw], dtype=object)
+            self.integral = False
+
+    def dates(self) -> np.ndarray | None:
+        """
+        Values parsed as datetime64[D] (NaT where unparseable), or None if the
+        column doesn't look like a date column. Parsed once and memoized.
+        """
+        if self._dates is not None or self.is_numeric:
+            return self._dates
+
+        present = self.present
+        if not present.size:
+            return None
+        if self.type != "date":
+            sample = present[:50]
+            if sum(_parse_date(v) is not None for v in sample) < 0.9 * sample.size:
+                return None
+
+        try:
+            parsed = np.array([v[:10] for v in self.values], dtype="datetime64[D]")
+            parsed[~self.valid] = np.datetime64("NaT")
+        except ValueError:
+            parsed = np.array(
+                [_parse_date(v) if ok else np.datetime64("NaT") for v, ok in zip(self.values, self.valid)],
+                dtype="datetime64[D]",
+            )
+        self._dates = parsed
+        return parsed
+
+    @property
+    def nbytes(self) -> int:
+        if self.is_numeric:
+            return self.values.nbytes + self.valid.nbytes
+        return self.values.size * OBJECT_CELL_BYTES + self.valid.nbytes
+
+    @property
+    def present(self) -> np.ndarray:
+        """Non-null values"""
+        return self.values[self.valid]
+
+    def numeric_stats(self) -> dict:
+        """count/sum/mean/median/min/max/stdev plus quartiles, computed vectorized"""
+        values = self.present
+        if not values.size:
+            return {"error": "No numeric values found"}
+
+        p25, median, p75 = np.quantile(values, [0.25, 0.5, 0.75])
+        return {
+            "count": int(values.size),
+            "null_count": int(self.valid.size - values.size),
+            "sum": to_python(values.sum(), self.integral),
+            "mean": to_python(values.mean()),
+            "median": to_python(median),
+            "min": to_python(values.min(), self.integral),
+            "max": to_python(values.max(), self.integral),
+            "stdev": to_python(values.std(ddof=1)) if values.size > 1 else 0,
+            "p25": to_python(p25),
+            "p75": to_python(p75),
+        }
+
+    def top_values(self, k: int = 5) -> list[tuple[str, int]]:
+        """Most frequent values with their counts"""
+        values, counts = np.unique(self.present.astype(str), return_counts=True)
+        if not values.size:
+            return []
+        k = min(k, values.size)
+        top = np.argpartition(-counts, k - 1)[:k]
+        top = top[np.lexsort((values[top], -counts[top]))]
+        return [(str(values[i]), int(counts[i])) for i in top]
+
+    def categorical_stats(self, k: int = 5) -> dict:
+        present = self.present
+        return {
+            "type": "categorical",
+            "unique_count": int(np.unique(present.astype(str)).size) if present.size else 0,
+            "total_count": int(present.size),
+            "top_values": self.top_values(k),
+        }
+
+    def stats(self) -> dict:
+        return self.numeric_stats() if self.is_numeric else self.categorical_stats()
+
+    def mask(self, op: str, value: Any = None) -> np.ndarray:
+        """Boolean row mask for one filter condition"""
+        if op == "is_null":
+            return ~self.valid
+        if op == "not_null":
+            return self.valid.copy()
+
+        if op == "in":
+            options = value if isinstance(value, list) else [value]
+            if self.is_numeric:
+                return self.valid & np.isin(self.values, [float(v) for v in options])
+            return self.valid & np.isin(self.values, [str(v) for v in options])
+
+        if op == "contains":
+            needle = str(value).lower()
+            return self.valid & np.fromiter(
+                (needle in str(v).lower() for v in self.values), dtype=bool, count=self.values.size
+            )
+
+        target = float(value) if self.is_numeric else str(value)
+        values = self.values
+        with np.errstate(invalid="ignore"):
+            if op == "eq":
+                result = values == target
+            elif op == "ne":
+                result = values != target
+            elif op == "gt":
+                result = values > target
+            elif op == "gte":
+                result = values >= target
+            elif op == "lt":
+                result = values < target
+            elif op == "lte":
+                result = values <= target
+            else:
+                raise ValueError(f"unsupported filter operator: {op}")
+        return self.valid & np.asarray(result, dtype=bool)
+
+
+class ColumnarSheet:
+    """Column-oriented snapshot of a sheet's rows"""
+
+    def __init__(self, columns: list[dict], rows: list[dict]):
+        self.row_count = len(rows)
+        self.row_ids = [row.get("id") for row in rows]
+        self.columns: dict[str, Column] = {}
+        for definition in columns:
+            col_id = definition["id"]
+            self.columns[col_id] = Column(definition, [row.get(col_id) for row in rows])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def select(self, column_ids: list[str] | None = None) -> list[Column]:
+        if column_ids is None:
+            return list(self.columns.values())
+        return [self.columns[c] for c in column_ids if c in self.columns]
+
+    def describe(self, column_ids: list[str] | None = None) -> dict:
+        """Per-column statistics keyed by column name"""
+        return {col.name: col.stats() for col in self.select(column_ids)}
+
+    def filter(self, filters: list[dict]) -> np.ndarray:
+        """Row mask matching every filter ({"column", "op", "value"})"""
+        mask = np.ones(self.row_count, dtype=bool)
+        for condition in filters:
+            mask &= self._column(condition["column"]).mask(condition["op"], condition.get("value"))
+        return mask
+
+    def _column(self, column_id: str) -> Column:
+        column = self.columns.get(column_id)
+        if column is None:
+            # Plans may reference a column by display name
+            column = next((c for c in self.columns.values() if c.name == column_id), None)
+        if column is None:
+            raise KeyError(f"unknown column: {column_id}")
+        return column
+
+    def execute(self, plan: dict) -> dict:
+        """
+        Run a query plan over all rows.
+
+        plan: {
+            "filters": [{"column", "op", "value"}],
+            "group_by": [column ids],
+            "aggregates": [{"func", "column"}],
+            "select": [column ids], "sort_by": column id or aggregate alias,
+            "descending": bool, "limit": int
+        }
+
+        Returns:
+            {"columns": [...], "rows": [[...], ...], "matched_rows": int, "total_groups"?: int}
+        """
+        mask = self.filter(plan.get("filters") or [])
+        indices = np.flatnonzero(mask)
+        aggregates = plan.get("aggregates") or []
+        group_by = [self._column(c) for c in plan.get("group_by") or []]
+
+        if not aggregates and not group_by:
+            selected = [self._column(c) for c in plan.get("select") or []] or list(self.columns.values())
+            sort_by = plan.get("sort_by")
+            if sort_by:
+                indices = _sorted_indices(self._column(sort_by), indices, plan.get("descending", True))
+            return {
+                "columns": [c.name for c in selected],
+                "rows": [[_cell(column, i) for column in selected] for i in indices[: _limit(plan)]],
+                "matched_rows": int(indices.size),
+            }
+
+        header, table = self._aggregate(indices, group_by, aggregates)
+        sort_by = plan.get("sort_by")
+        if sort_by:
+            key = _header_index(header, sort_by, self)
+            present = [row for row in table if row[key] is not None]
+            missing = [row for row in table if row[key] is None]
+            present.sort(key=lambda row: row[key], reverse=plan.get("descending", True))
+            table = present + missing
+
+        return {
+            "columns": header,
+            "rows": table[: _limit(plan)],
+            "matched_rows": int(indices.size),
+            "total_groups": len(table),
+        }
+
+    def _aggregate(self, indices: np.ndarray, group_by: list[Column], aggregates: list[dict]):
+        targets = [
+            (spec["func"], self._column(spec["column"]) if spec.get("column") else None)
+            for spec in aggregates
+        ] or [("count", None)]
+        header = [c.name for c in group_by] + [
+            func if column is None else f"{func}_{column.name}" for func, column in targets
+        ]
+
+        if group_by:
+            keys = np.array(
+                ["\x1f".join(str(column.values[i]) if column.valid[i] else "" for column in group_by) for i in indices],
+                dtype=object,
+            )
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            boundaries = np.flatnonzero(np.diff(inverse[order])) + 1
+            groups = np.split(indices[order], boundaries)
+            representatives = indices[first]
+        else:
+            groups = [indices]
+            representatives = [None]
+
+        table = []
+        for representative, rows in zip(representatives, groups):
+            key_cells = [_cell(column, representative) for column in group_by] if group_by else []
+            table.append(key_cells + [_aggregate_value(func, column, rows) for func, column in targets])
+        return header, table
+
+
+def _header_index(header: list[str], name: str, sheet: ColumnarSheet) -> int:
+    """
+    Position of a sort key: output name ('<func>_<column name>', 'count'),
+    '<func>_<column id>', or a group-by column id/name.
+
+    Raises:
+        ValueError: The key matches no output column
+    """
+    if name in header:
+        return header.index(name)
+    column = sheet.columns.get(name)
+    if column is not None and column.name in header:
+        return header.index(column.name)
+    # '<func>_<column id>' (funcs and ids may both contain '_', so try every split)
+    for split in (i for i, char in enumerate(name) if char == "_"):
+        column = sheet.columns.get(name[split + 1:])
+        if column is not None and f"{name[:split]}_{column.name}" in header:
+            return header.index(f"{name[:split]}_{column.name}")
+    raise ValueError(f"unknown sort key: {name}")
+
+
+def _limit(plan: dict) -> int:
+    limit = plan.get("limit") or 20
+    return max(1, min(int(limit), 1000))
+
+
+def _cell(column: Column, index) -> Any:
+    if index is None or not column.valid[index]:
+        return None
+    return to_python(column.values[index], column.integral)
+
+
+def _sorted_indices(column: Column, indices: np.ndarray, descending: bool) -> np.ndarray:
+    values = column.values[indices]
+    valid = column.valid[indices]
+    if column.is_numeric:
+        order = np.argsort(-values if descending else values, kind="stable")
+    else:
+        order = np.argsort(values.astype(str), kind="stable")
+        if descending:
+            order = order[::-1]
+    # Missing values always go last
+    order = np.concatenate([order[valid[order]], order[~valid[order]]])
+    return indices[order]
+
+
+def _aggregate_value(func: str, column: Column | None, rows: np.ndarray) -> Any:
+    if column is None:
+        if func != "count":
+            raise ValueError(f"{func} needs a column")
+        return int(rows.size)
+
+    valid = rows[column.valid[rows]]
+    if func == "count":
+        return int(valid.size)
+    if func == "count_distinct":
+        return int(np.unique(column.values[valid].astype(str)).size)
+    if not column.is_numeric:
+        if func in ("min", "max") and valid.size:
+            values = column.values[valid]
+            return min(values) if func == "min" else max(values)
+        raise ValueError(f"{func} needs a numeric column: {column.name}")
+
+    values = column.values[valid]
+    if not values.size:
+        return None
+    if func == "sum":
+        return to_python(values.sum(), column.integral)
+    if func == "mean":
+        return to_python(values.mean())
+    if func == "median":
+        return to_python(np.median(values))
+    if func == "min":
+        return to_python(values.min(), column.integral)
+    if func == "max":
+        return to_python(values.max(), column.integral)
+    if func == "stdev":
+        return to_python(values.std(ddof=1)) if values.size > 1 else 0
+    raise ValueError(f"unsupported aggregate: {func}")
+
+
+def get_columnar_sheet(sheet: dict, build: bool = True) -> ColumnarSheet | None:
+    """
+    Columnar snapshot of a loaded sheet, built once per sheet version.
+
+    Falls back to updated_at as the version key for sheets that predate
+    the version column. With build=False only a cached snapshot is returned
+    (None if there is none).
+    """
+    version = sheet.get("version") or sheet.get("updated_at")
+    key = (sheet.get("id"), version)
+    if key[0] is not None and version is not None:
+        cached = _columnar_cache.get(key)
+        if cached is not None:
+            return cached
+    if not build:
+        return None
+
+    columnar = ColumnarSheet(sheet.get("columns") or [], sheet.get("rows") or [])
+    if key[0] is not None and version is not None:
+        _columnar_cache.set(key, columnar)
+    return columnar
+
+
+def get_columnar_cache_stats() -> dict:
+    return _columnar_cache.stats()
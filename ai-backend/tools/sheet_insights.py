@@ -0,0 +1,239 @@
+"""
+Sheet Insights - 이상치/트렌드/상관관계 로컬 계산
+전체 행에 대해 NumPy로 계산한 결과만 LLM에 전달 (ai_sheet_analyze)
+"""
+import numpy as np
+
+from .sheet_engine import Column, ColumnarSheet, to_python
+
+Z_THRESHOLD = 3.0
+IQR_FACTOR = 1.5
+MAX_EXAMPLES = 5
+MAX_CORRELATION_COLUMNS = 30
+MAX_CORRELATION_PAIRS = 10
+MIN_PAIRED_VALUES = 3
+SEASONAL_ACF_THRESHOLD = 0.5
+# Seasonal profile must explain this share of the series variance (trend included)
+SEASONAL_MIN_VARIANCE_SHARE = 0.1
+TREND_MIN_CHANGE = 0.05
+
+# Seasonal lag per bucket unit (weekly for days, yearly for months/weeks)
+SEASONAL_LAGS = {"D": 7, "W": 52, "M": 12}
+
+
+def _round(value, digits: int = 4):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _numeric(columnar: ColumnarSheet, column_ids: list[str] | None) -> list[Column]:
+    return [c for c in columnar.select(column_ids) if c.is_numeric and c.present.size]
+
+
+def detect_outliers(columnar: ColumnarSheet, column_ids: list[str] | None = None) -> dict:
+    """
+    z-score (|z| > 3) and IQR (1.5 × IQR fences) outliers per numeric column.
+
+    Returns:
+        {column name: {"z_outliers", "iqr_outliers", "bounds", "examples": [...]}}
+    """
+    findings = {}
+    for column in _numeric(columnar, column_ids):
+        indices = np.flatnonzero(column.valid)
+        values = column.values[indices]
+        if values.size < 4:
+            continue
+
+        mean = values.mean()
+        std = values.std(ddof=1)
+        z = (values - mean) / std if std > 0 else np.zeros_like(values)
+        q1, q3 = np.quantile(values, [0.25, 0.75])
+        low, high = q1 - IQR_FACTOR * (q3 - q1), q3 + IQR_FACTOR * (q3 - q1)
+
+        z_mask = np.abs(z) > Z_THRESHOLD
+        iqr_mask = (values < low) | (values > high)
+        if not z_mask.any() and not iqr_mask.any():
+            continue
+
+        flagged = np.flatnonzero(z_mask | iqr_mask)
+        top = flagged[np.argsort(-np.abs(z[flagged]))[:MAX_EXAMPLES]]
+        findings[column.name] = {
+            "count": int(values.size),
+            "z_outliers": int(z_mask.sum()),
+            "iqr_outliers": int(iqr_mask.sum()),
+            "bounds": {"iqr_low": _round(low), "iqr_high": _round(high), "mean": _round(mean), "stdev": _round(std)},
+            "examples": [
+                {
+                    "row_id": columnar.row_ids[indices[i]],
+                    "value": to_python(values[i], column.integral),
+                    "z": _round(z[i], 2),
+                }
+                for i in top
+            ],
+        }
+    return findings
+
+
+def _bucket_unit(span_days: int) -> str:
+    if span_days > 180:
+        return "M"
+    if span_days > 30:
+        return "W"
+    return "D"
+
+
+def _autocorrelation(series: np.ndarray, lag: int) -> float | None:
+    if series.size <= lag + 2:
+        return None
+    a, b = series[:-lag], series[lag:]
+    if a.std() == 0 or b.std() == 0:
+        return None
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def _series_trend(buckets: np.ndarray, values: np.ndarray, unit: str) -> dict:
+    """Trend of one numeric column aggregated (mean) per date bucket"""
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    sums = np.bincount(inverse, weights=values)
+    counts = np.bincount(inverse)
+    series = sums / counts
+
+    x = np.arange(series.size, dtype=np.float64)
+    slope, intercept = np.polyfit(x, series, 1) if series.size >= 2 else (0.0, series[0])
+    # Fitted change across the whole range relative to the average level
+    baseline = np.abs(series).mean()
+    relative_change = slope * (series.size - 1) / baseline if baseline else 0.0
+
+    window = min(3, series.size)
+    result = {
+        "periods": int(series.size),
+        "period_unit": {"D": "day", "W": "week", "M": "month"}[unit],
+        "first_period": str(keys[0]),
+        "last_period": str(keys[-1]),
+        "first_value": _round(series[0]),
+        "last_value": _round(series[-1]),
+        "change_pct": _round((series[-1] - series[0]) / abs(series[0]) * 100, 2) if series[0] else None,
+        "slope_per_period": _round(slope),
+        "direction": (
+            "increasing" if relative_change > TREND_MIN_CHANGE
+            else "decreasing" if relative_change < -TREND_MIN_CHANGE
+            else "flat"
+        ),
+        "rolling_mean_last": _round(series[-window:].mean()),
+        "peak_period": str(keys[int(series.argmax())]),
+        "trough_period": str(keys[int(series.argmin())]),
+    }
+
+    # Seasonality: needs two full periods, autocorrelation of the detrended
+    # series at the seasonal lag, and a per-phase profile large enough to matter
+    lag = SEASONAL_LAGS[unit]
+    if series.size >= 2 * lag:
+        detrended = series - (slope * x + intercept)
+        acf = _autocorrelation(detrended, lag)
+        if acf is not None:
+            phase = np.arange(series.size) % lag
+            profile = np.bincount(phase, weights=detrended, minlength=lag) / np.bincount(phase, minlength=lag)
+            seasonal = profile[phase]
+            variance = series.var()
+            share = seasonal.var() / variance if variance else 0.0
+            amplitude = (profile.max() - profile.min()) / 2
+            remainder_std = (detrended - seasonal).std()
+            result["seasonality"] = {
+                "lag": lag,
+                "autocorrelation": _round(acf, 3),
+                "variance_share": _round(share, 3),
+                "amplitude": _round(amplitude),
+                "seasonal": bool(
+                    acf > SEASONAL_ACF_THRESHOLD
+                    and share >= SEASONAL_MIN_VARIANCE_SHARE
+                    and amplitude > remainder_std
+                ),
+            }
+    return result
+
+
+def detect_trends(columnar: ColumnarSheet, column_ids: list[str] | None = None) -> dict:
+    """
+    Per-period trend of every numeric column against the first date column.
+
+    Returns:
+        {"date_column", "trends": {column name: {...}}} or {"date_column": None}
+    """
+    date_column = next((c for c in columnar.columns.values() if c.dates() is not None), None)
+    if date_column is None:
+        return {"date_column": None, "trends": {}}
+
+    dates = date_column.dates()
+    has_date = ~np.isnat(dates)
+    if not has_date.any():
+        return {"date_column": date_column.name, "trends": {}}
+
+    span_days = int((dates[has_date].max() - dates[has_date].min()).astype(int))
+    unit = _bucket_unit(span_days)
+    buckets = dates.astype(f"datetime64[{unit}]")
+
+    trends = {}
+    for column in _numeric(columnar, column_ids):
+        mask = has_date & column.valid
+        if mask.sum() < 2:
+            continue
+        trends[column.name] = _series_trend(buckets[mask], column.values[mask], unit)
+
+    return {"date_column": date_column.name, "span_days": span_days, "trends": trends}
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    """Ranks with ties averaged (for Spearman correlation)"""
+    order = np.argsort(values, kind="mergesort")
+    ranks = np.empty(values.size, dtype=np.float64)
+    ranks[order] = np.arange(1, values.size + 1)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=ranks)
+    return (sums / counts)[inverse]
+
+
+def _pearson(a: np.ndarray, b: np.ndarray) -> float | None:
+    if a.std() == 0 or b.std() == 0:
+        return None
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def correlation_matrix(columnar: ColumnarSheet, column_ids: list[str] | None = None) -> dict:
+    """
+    Pairwise Pearson/Spearman correlation over rows where both values exist.
+
+    Returns:
+        {"columns": [...], "pairs": strongest pairs by |r|}
+    """
+    columns = _numeric(columnar, column_ids)[:MAX_CORRELATION_COLUMNS]
+    pairs = []
+    for i, left in enumerate(columns):
+        for right in columns[i + 1:]:
+            mask = left.valid & right.valid
+            n = int(mask.sum())
+            if n < MIN_PAIRED_VALUES:
+                continue
+            a, b = left.values[mask], right.values[mask]
+            pearson = _pearson(a, b)
+            spearman = _pearson(_rank(a), _rank(b))
+            if pearson is None and spearman is None:
+                continue
+            pairs.append({
+                "columns": [left.name, right.name],
+                "n": n,
+                "pearson": _round(pearson, 3),
+                "spearman": _round(spearman, 3),
+            })
+
+    pairs.sort(key=lambda p: -max(abs(p["pearson"] or 0), abs(p["spearman"] or 0)))
+    return {"columns": [c.name for c in columns], "pairs": pairs[:MAX_CORRELATION_PAIRS]}
+
+
+def compute_insights(columnar: ColumnarSheet, analysis_type: str, column_ids: list[str] | None = None) -> dict | None:
+    """Local findings for analysis types that have them, else None"""
+    if analysis_type == "anomalies":
+        return {"outliers": detect_outliers(columnar, column_ids)}
+    if analysis_type == "trends":
+        return detect_trends(columnar, column_ids)
+    if analysis_type == "correlation":
+        return correlation_matrix(columnar, column_ids)
+    return None
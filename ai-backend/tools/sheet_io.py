@@ -0,0 +1,296 @@
+"""
+Sheet Import/Export - CSV/XLSX 스트리밍 가져오기/내보내기
+파일을 한 번에 메모리에 올리지 않고 행 단위로 파싱, 배치로 sheet_rows에 적재
+"""
+from datetime import date, datetime
+from itertools import chain, islice
+import csv
+import io
+import math
+import tempfile
+import time
+
+from openpyxl import Workbook, load_workbook
+
+from .sheet_stats import IncrementalStats
+from .sheet_store import append_rows, invalidate_sheet, iter_sheet_rows, load_sheet, set_storage_mode, update_cached_columns
+
+# Rows buffered to infer column types before the first insert
+INFER_SAMPLE_ROWS = 1000
+
+# Rows per sheet_append_rows call
+IMPORT_BATCH_SIZE = 1000
+
+# Rows per yielded CSV export chunk / bytes per XLSX read
+EXPORT_CHUNK_ROWS = 500
+EXPORT_READ_BYTES = 64 * 1024
+
+_TRUE = {"true", "yes", "y", "1", "o", "예"}
+_FALSE = {"false", "no", "n", "0", "x", "아니오"}
+
+
+def iter_csv_rows(fileobj, encoding: str = "utf-8-sig"):
+    """Yield CSV records from a binary file object without reading it whole"""
+    yield from csv.reader(io.TextIOWrapper(fileobj, encoding=encoding, newline=""))
+
+
+def iter_xlsx_rows(fileobj, worksheet: str | None = None):
+    """Yield rows of an XLSX worksheet (read-only mode streams the sheet XML)"""
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        ws = workbook[worksheet] if worksheet else workbook.worksheets[0]
+        for row in ws.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    text = str(value).strip().replace(",", "")
+    if len(text) > 1 and text[0] == "0" and text[1] != ".":
+        return None  # Zip codes, phone numbers, ids keep their leading zeros
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    # "nan"/"inf"/"infinity" parse as floats but are not valid JSON numbers for PostgREST
+    if not math.isfinite(number):
+        return None
+    return int(number) if number.is_integer() and "." not in text and "e" not in text.lower() else number
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    return None
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value).strip()
+    try:
+        return date.fromisoformat(text[:10]).isoformat() if len(text) == 10 else datetime.fromisoformat(text).isoformat()
+    except ValueError:
+        return None
+
+
+_PARSERS = {"number": _parse_number, "checkbox": _parse_bool, "date": _parse_date}
+
+
+def infer_column_type(values: list) -> str:
+    """Most specific type every non-empty sample value parses as"""
+    present = [v for v in values if not _is_empty(v)]
+    if not present:
+        return "text"
+    # Numbers first: "1"/"0" columns are numeric rather than checkboxes
+    for column_type in ("number", "checkbox", "date"):
+        parser = _PARSERS[column_type]
+        if all(parser(v) is not None for v in present):
+            return column_type
+    return "text"
+
+
+def convert_value(value, column_type: str):
+    """Cell value for a column type; values that don't parse are kept as text"""
+    if _is_empty(value):
+        return None
+    parser = _PARSERS.get(column_type)
+    if parser:
+        parsed = parser(value)
+        if parsed is not None:
+            return parsed
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+def plan_columns(header: list, sample: list[list], existing: list[dict]) -> tuple[list[dict], list[tuple[str, str]]]:
+    """
+    Match file headers to sheet columns (by name), adding new columns as needed.
+
+    A header repeated within the file is renamed "Name (2)", "Name (3)", ...
+    before matching, so each file column keeps its own sheet column.
+
+    Returns:
+        (updated column definitions, [(column id, type) per file column])
+    """
+    columns = [dict(c) for c in existing]
+    by_name = {c["name"]: c for c in columns}
+    mapping = []
+    seen = set()
+
+    for index, name in enumerate(header):
+        name = str(name).strip() if not _is_empty(name) else f"Column {index + 1}"
+        # Repeated headers in one file get their own column: "Amount", "Amount (2)", ...
+        base, copy = name, 1
+        while name in seen:
+            copy += 1
+            name = f"{base} ({copy})"
+        seen.add(name)
+        column = by_name.get(name)
+        if column is None:
+            column_type = infer_column_type([row[index] if index < len(row) else None for row in sample])
+            column = {"id": f"col_{len(columns) + 1}", "name": name, "type": column_type, "width": 150}
+            columns.append(column)
+            by_name[name] = column
+        mapping.append((column["id"], column.get("type", "text")))
+
+    return columns, mapping
+
+
+def convert_rows(records, mapping: list[tuple[str, str]]):
+    """Yield sheet row dicts (empty cells omitted) from raw records"""
+    for record in records:
+        row = {}
+        for (column_id, column_type), value in zip(mapping, record):
+            converted = convert_value(value, column_type)
+            if converted is not None:
+                row[column_id] = converted
+        if row:
+            yield row
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_records(client, sheet_id: str, records) -> dict:
+    """
+    Stream parsed records (header first) into a sheet.
+
+    The sheet is switched to row storage so each batch is an insert-only
+    append instead of a rewrite of the rows blob.
+
+    Returns:
+        {"imported_rows", "batches", "columns", "total_rows", "elapsed_seconds", "rows_per_second"}
+    """
+    started = time.perf_counter()
+    records = iter(records)
+    header = next(records, None)
+    if not header:
+        raise ValueError("empty file")
+
+    result = client.table("sheets").select("id, columns").eq("id", sheet_id).limit(1).execute()
+    if not result.data:
+        raise LookupError("sheet not found")
+    sheet = result.data[0]
+
+    set_storage_mode(client, sheet_id, "rows")
+    stats = IncrementalStats.load(client, sheet_id)
+
+    sample = list(islice(records, INFER_SAMPLE_ROWS))
+    columns, mapping = plan_columns(header, sample, sheet.get("columns") or [])
+    if columns != sheet.get("columns"):
+        result = client.table("sheets").update({"columns": columns}).eq("id", sheet_id).execute()
+        if result.data:
+            update_cached_columns(sheet_id, columns, result.data[0].get("version"))
+            stats.touch(result.data[0].get("version"))
+
+    imported = 0
+    batches = 0
+    total_rows = None
+    for batch in _batches(convert_rows(chain(sample, records), mapping), IMPORT_BATCH_SIZE):
+        result = append_rows(client, sheet_id, batch)
+        stats.append(batch, result["version"])
+        total_rows = result["total_rows"]
+        imported += len(batch)
+        batches += 1
+
+    # Column stats accumulated batch by batch, written once
+    stats.save(client)
+    invalidate_sheet(sheet_id)
+    elapsed = time.perf_counter() - started
+    return {
+        "imported_rows": imported,
+        "batches": batches,
+        "columns": [{"id": column_id, "type": column_type} for column_id, column_type in mapping],
+        "total_rows": total_rows,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed) if elapsed else None,
+    }
+
+
+def open_export(client, sheet_id: str) -> tuple[dict, object]:
+    """(sheet, row iterator); rows-mode sheets are paged instead of loaded whole"""
+    result = client.table("sheets").select("id, name, columns, storage_mode").eq("id", sheet_id).limit(1).execute()
+    if not result.data:
+        raise LookupError("sheet not found")
+    sheet = result.data[0]
+    if sheet.get("storage_mode") == "rows":
+        return sheet, iter_sheet_rows(client, sheet_id)
+    return sheet, iter(load_sheet(client, sheet_id).get("rows") or [])
+
+
+def _export_cell(value):
+    if isinstance(value, (list, dict)):
+        return ", ".join(map(str, value)) if isinstance(value, list) else str(value)
+    return value
+
+
+def iter_csv_export(sheet: dict, rows):
+    """Yield CSV text chunks (header first, then EXPORT_CHUNK_ROWS rows each)"""
+    columns = sheet.get("columns") or []
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel opens UTF-8 (Korean) text correctly
+    buffer.write("\ufeff")
+    writer.writerow([c["name"] for c in columns])
+    for batch in _batches(rows, EXPORT_CHUNK_ROWS):
+        for row in batch:
+            writer.writerow([_export_cell(row.get(c["id"])) for c in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_xlsx_export(sheet: dict, rows):
+    """
+    Write rows to a temporary XLSX file with a write-only workbook.
+
+    Returns:
+        Open temporary file positioned at the start
+    """
+    columns = sheet.get("columns") or []
+    workbook = Workbook(write_only=True)
+    ws = workbook.create_sheet(title=(sheet.get("name") or "Sheet")[:31])
+    ws.append([c["name"] for c in columns])
+    for row in rows:
+        ws.append([_export_cell(row.get(c["id"])) for c in columns])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def iter_file(fileobj):
+    """Yield a file's bytes in chunks and close it afterwards"""
+    try:
+        while chunk := fileobj.read(EXPORT_READ_BYTES):
+            yield chunk
+    finally:
+        fileobj.close()
@@ -0,0 +1,180 @@
+"""
+Sheet Preview - LLM 프롬프트용 대표 샘플 행 선택
+앞부분 N행 대신 날짜/행 순서 구간별 층화 추출 + 컬럼별 최솟값/최댓값 행을 토큰 예산 안에서 선택
+"""
+import json
+
+import numpy as np
+
+from config import get_settings
+from utils.text import count_tokens
+
+from .sheet_engine import ColumnarSheet
+
+settings = get_settings()
+
+# Context window per model; the preview gets a small fixed share of it
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4.1-mini": 1_000_000,
+}
+PREVIEW_CONTEXT_SHARE = 1 / 32
+
+MIN_PREVIEW_ROWS = 5
+MAX_PREVIEW_ROWS = 200
+MAX_EXTREME_ROWS = 10
+MAX_COVERED_CATEGORIES = 10
+
+
+def preview_token_budget(model: str) -> int:
+    """Tokens the preview may use for a model (a share of its context, capped by the setting if set)"""
+    budget = int(MODEL_CONTEXT_TOKENS.get(model, 128_000) * PREVIEW_CONTEXT_SHARE)
+    if settings.sheet_preview_max_tokens > 0:
+        budget = min(budget, settings.sheet_preview_max_tokens)
+    return budget
+
+
+def _spread_order(n: int) -> np.ndarray:
+    """
+    0..n-1 in bit-reversed (van der Corput) order, so every prefix of the
+    order is spread evenly over the whole range.
+    """
+    if n <= 1:
+        return np.arange(n)
+    bits = int(n - 1).bit_length()
+    keys = np.array([int(format(i, f"0{bits}b")[::-1], 2) for i in range(n)])
+    return np.argsort(keys, kind="stable")
+
+
+def _ordering(columnar: ColumnarSheet | None, row_count: int) -> tuple[np.ndarray, str]:
+    """Row order to stratify over: by the first date column if any, else sheet order"""
+    if columnar is not None:
+        for column in columnar.columns.values():
+            dates = column.dates()
+            if dates is not None and (~np.isnat(dates)).any():
+                # NaT sorts last
+                return np.argsort(dates, kind="stable"), column.name
+    return np.arange(row_count), None
+
+
+def _stratified(order: np.ndarray, strata: int, rng: np.random.Generator) -> list[int]:
+    """One random row from each of `strata` equal slices of the order, evenly spread first"""
+    strata = min(strata, order.size)
+    if not strata:
+        return []
+    edges = np.linspace(0, order.size, strata + 1).astype(int)
+    picks = [order[rng.integers(edges[i], edges[i + 1])] for i in range(strata) if edges[i + 1] > edges[i]]
+    return [int(picks[i]) for i in _spread_order(len(picks))]
+
+
+def _extremes(columnar: ColumnarSheet, column_ids: list[str]) -> list[int]:
+    """Rows holding the min/max of each numeric column"""
+    picks = []
+    for column in columnar.select(column_ids):
+        if not column.is_numeric or not column.valid.any():
+            continue
+        indices = np.flatnonzero(column.valid)
+        values = column.values[indices]
+        picks += [int(indices[values.argmin()]), int(indices[values.argmax()])]
+    return picks[:MAX_EXTREME_ROWS]
+
+
+def _category_cover(columnar: ColumnarSheet, column_ids: list[str], rng: np.random.Generator) -> list[int]:
+    """One random row per value of the lowest-cardinality categorical column"""
+    best = None
+    for column in columnar.select(column_ids):
+        if column.is_numeric or not column.valid.any():
+            continue
+        values = np.unique(column.present.astype(str))
+        if 1 < values.size <= MAX_COVERED_CATEGORIES and (best is None or values.size < best[1].size):
+            best = (column, values)
+    if best is None:
+        return []
+
+    column, values = best
+    picks = []
+    for value in values:
+        matches = np.flatnonzero(column.valid & (column.values == value))
+        picks.append(int(matches[rng.integers(matches.size)]))
+    return picks
+
+
+def column_summary(columnar: ColumnarSheet, column_ids: list[str]) -> dict:
+    """Compact one-line description per column, keyed by column name"""
+    summary = {}
+    for column in columnar.select(column_ids):
+        nulls = int(column.valid.size - column.valid.sum())
+        if column.is_numeric:
+            stats = column.numeric_stats()
+            if "error" in stats:
+                summary[column.name] = "number (empty)"
+                continue
+            summary[column.name] = (
+                f"number {stats['min']}~{stats['max']}, mean {stats['mean']:.4g}, median {stats['median']:.4g}"
+                + (f", {nulls} empty" if nulls else "")
+            )
+        elif column.dates() is not None and (~np.isnat(column.dates())).any():
+            dates = column.dates()[~np.isnat(column.dates())]
+            summary[column.name] = f"date {dates.min()}~{dates.max()}" + (f", {nulls} empty" if nulls else "")
+        else:
+            top = ", ".join(f"{value}({count})" for value, count in column.top_values(3))
+            summary[column.name] = f"{column.type} top: {top}" + (f", {nulls} empty" if nulls else "")
+    return summary
+
+
+def build_preview(
+    columns: list[dict],
+    rows: list[dict],
+    max_tokens: int,
+    columnar: ColumnarSheet | None = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Representative rows for an LLM prompt, within a token budget.
+
+    Min/max rows of numeric columns and one row per category (of the
+    lowest-cardinality column) come first, then rows drawn from equal slices
+    of the date order (or sheet order) until the budget is used. Without a
+    columnar snapshot only the slice sampling is done. The same seed gives
+    the same sample.
+
+    Returns:
+        {"rows": [{"_row": row number, column name: value, ...}],
+         "sampled_rows", "total_rows", "strategy", "ordered_by"}
+    """
+    rng = np.random.default_rng(seed)
+    column_ids = [c["id"] for c in columns]
+    order, ordered_by = _ordering(columnar, len(rows))
+
+    candidates = []
+    if columnar is not None:
+        candidates += _extremes(columnar, column_ids)
+        candidates += _category_cover(columnar, column_ids, rng)
+    candidates += _stratified(order, MAX_PREVIEW_ROWS, rng)
+
+    chosen = []
+    seen = set()
+    used = 0
+    for index in candidates:
+        if index in seen:
+            continue
+        seen.add(index)
+        row = {"_row": index + 1, **{c["name"]: rows[index].get(c["id"]) for c in columns}}
+        cost = count_tokens(json.dumps(row, ensure_ascii=False, default=str))
+        if used + cost > max_tokens and len(chosen) >= MIN_PREVIEW_ROWS:
+            break
+        chosen.append((index, row))
+        used += cost
+        if len(chosen) >= MAX_PREVIEW_ROWS:
+            break
+
+    chosen.sort(key=lambda item: item[0])
+    return {
+        "rows": [row for _, row in chosen],
+        "sampled_rows": len(chosen),
+        "total_rows": len(rows),
+        "strategy": "all" if len(chosen) == len(rows) else "stratified",
+        "ordered_by": ordered_by,
+    }
@@ -0,0 +1,105 @@
+"""
+AI Sheet API Router
+시트 저장 방식 전환, 파일 가져오기/내보내기 등 에이전트 도구 외부에서 쓰는 시트 엔드포인트
+"""
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+from .ai_sheet import get_analysis_reuse_stats, get_plan_cache_stats
+from .sheet_engine import get_columnar_cache_stats
+from .sheet_io import (
+    import_records,
+    iter_csv_export,
+    iter_csv_rows,
+    iter_file,
+    iter_xlsx_rows,
+    open_export,
+    write_xlsx_export,
+)
+from .sheet_store import get_snapshot_cache_stats, set_storage_mode
+from utils.supabase import get_supabase_client
+
+router = APIRouter()
+
+
+class StorageModeRequest(BaseModel):
+    mode: Literal["blob", "rows"]
+
+
+@router.get("/cache/stats")
+async def sheet_cache_stats():
+    """Sheet snapshot, columnar, query plan and stored analysis cache statistics"""
+    return {
+        "snapshots": get_snapshot_cache_stats(),
+        "columnar": get_columnar_cache_stats(),
+        "query_plans": get_plan_cache_stats(),
+        "analyses": get_analysis_reuse_stats(),
+    }
+
+
+@router.post("/{sheet_id}/storage")
+def change_storage_mode(sheet_id: str, request: StorageModeRequest):
+    """Move a sheet's rows between the JSON blob and the sheet_rows table"""
+    try:
+        moved = set_storage_mode(get_supabase_client(), sheet_id, request.mode)
+    except Exception as e:
+        if "not found" in str(e):
+            raise HTTPException(status_code=404, detail=f"Sheet '{sheet_id}' not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"sheet_id": sheet_id, "storage_mode": request.mode, "moved_rows": moved}
+
+
+@router.post("/{sheet_id}/import")
+def import_sheet_file(
+    sheet_id: str,
+    file: UploadFile = File(...),
+    worksheet: Optional[str] = Form(None),
+):
+    """
+    Stream a CSV/XLSX file into a sheet (header row → columns, types inferred).
+
+    The sheet is switched to row storage; rows are inserted in batches.
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        records = iter_xlsx_rows(file.file, worksheet)
+    elif filename.endswith(".csv") or file.content_type == "text/csv":
+        records = iter_csv_rows(file.file)
+    else:
+        raise HTTPException(status_code=400, detail="Only .csv and .xlsx files are supported")
+
+    try:
+        result = import_records(get_supabase_client(), sheet_id, records)
+    except LookupError:
+        raise HTTPException(status_code=404, detail=f"Sheet '{sheet_id}' not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"sheet_id": sheet_id, **result}
+
+
+@router.get("/{sheet_id}/export")
+def export_sheet_file(sheet_id: str, format: Literal["csv", "xlsx"] = "csv"):
+    """Stream a sheet as CSV (chunked) or XLSX (write-only workbook)"""
+    try:
+        sheet, rows = open_export(get_supabase_client(), sheet_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail=f"Sheet '{sheet_id}' not found")
+
+    if format == "xlsx":
+        return StreamingResponse(
+            iter_file(write_xlsx_export(sheet, rows)),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": f'attachment; filename="sheet-{sheet_id}.xlsx"'},
+        )
+
+    return StreamingResponse(
+        iter_csv_export(sheet, rows),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="sheet-{sheet_id}.csv"'},
+    )
@@ -0,0 +1,334 @@
+"""
+Sheet Stats - 컬럼별 누적 통계 증분 유지
+count/sum/m2/min/max, 분위수 스케치(t-digest), 상위 값(Misra-Gries)을 sheet_column_stats에 저장하고
+행 추가/셀 수정 시 전체 행을 다시 읽지 않고 갱신 → ai_sheet_analyze 기본 통계를 O(컬럼 수)로 응답
+"""
+from typing import Any
+
+import numpy as np
+
+from .sheet_engine import to_python
+
+# t-digest compression (roughly compression / 2 centroids per column)
+DIGEST_COMPRESSION = 200
+
+# Misra-Gries counters kept per column
+HEAVY_HITTERS = 64
+
+# Values removed from a digest (cell edits) before its quantiles are rebuilt
+MAX_DIGEST_DRIFT = 0.1
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compress(means: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Merge centroids so each spans at most one unit of the k1 scale
+    (small near the tails, wide in the middle). Fully vectorized.
+
+    Returns:
+        [[mean, weight], ...] sorted by mean
+    """
+    if not means.size:
+        return np.empty((0, 2))
+    order = np.argsort(means, kind="mergesort")
+    means, weights = means[order], weights[order]
+    cumulative = np.cumsum(weights)
+    q = (cumulative - weights / 2) / cumulative[-1]
+    k = np.floor(DIGEST_COMPRESSION / (2 * np.pi) * np.arcsin(2 * q - 1))
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return np.column_stack([merged_means, merged_weights])
+
+
+def _digest_quantiles(stats: dict, qs: list[float]) -> list[float]:
+    digest = np.asarray(stats["digest"], dtype=np.float64).reshape(-1, 2)
+    means, weights = digest[:, 0], digest[:, 1]
+    total = weights.sum()
+    centres = np.cumsum(weights) - weights / 2
+    positions = np.r_[0.0, centres, total]
+    values = np.r_[stats["min"], means, stats["max"]]
+    # Ranks of np.quantile's linear interpolation: q * (n - 1) + 0.5
+    return [float(np.interp(q * (total - 1) + 0.5, positions, values)) for q in qs]
+
+
+def _top_counts(strings: list[str]) -> tuple[dict, int]:
+    """Misra-Gries summary of a batch: ({value: count}, undercount bound)"""
+    if not strings:
+        return {}, 0
+    values, counts = np.unique(np.array(strings, dtype=object).astype(str), return_counts=True)
+    return _trim_top(dict(zip(values.tolist(), counts.tolist())))
+
+
+def _trim_top(counts: dict) -> tuple[dict, int]:
+    """Keep HEAVY_HITTERS counters, subtracting the (k+1)-th count from all (mergeable Misra-Gries)"""
+    if len(counts) <= HEAVY_HITTERS:
+        return counts, 0
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    cut = ranked[HEAVY_HITTERS][1]
+    return {value: count - cut for value, count in ranked[:HEAVY_HITTERS] if count > cut}, cut
+
+
+def column_stats(raw: list[Any]) -> dict:
+    """Running aggregates of one column's cell values"""
+    present = [v for v in raw if v is not None]
+    numbers = np.fromiter((v for v in present if _is_number(v)), dtype=np.float64)
+    top, top_error = _top_counts([str(v) for v in present])
+
+    stats = {
+        "count": len(present),
+        "num_count": int(numbers.size),
+        "integral": all(isinstance(v, int) for v in present if _is_number(v)),
+        "sum": 0.0,
+        "m2": 0.0,
+        "min": None,
+        "max": None,
+        "digest": [],
+        "removed": 0,
+        "top": top,
+        "top_error": top_error,
+    }
+    if numbers.size:
+        mean = numbers.mean()
+        stats.update(
+            sum=float(numbers.sum()),
+            m2=float(((numbers - mean) ** 2).sum()),
+            min=float(numbers.min()),
+            max=float(numbers.max()),
+            digest=_compress(numbers, np.ones(numbers.size)).tolist(),
+        )
+    return stats
+
+
+def merge_column_stats(a: dict | None, b: dict | None) -> dict | None:
+    """Combine the stats of two disjoint sets of cells"""
+    if not a:
+        return b
+    if not b:
+        return a
+
+    n_a, n_b = a["num_count"], b["num_count"]
+    n = n_a + n_b
+    m2 = a["m2"] + b["m2"]
+    if n_a and n_b:
+        # Chan et al. parallel variance
+        delta = b["sum"] / n_b - a["sum"] / n_a
+        m2 += delta * delta * n_a * n_b / n
+
+    digest = np.asarray(a["digest"] + b["digest"], dtype=np.float64).reshape(-1, 2)
+    counts = dict(a["top"])
+    for value, count in b["top"].items():
+        counts[value] = counts.get(value, 0) + count
+    top, cut = _trim_top(counts)
+    bounds = [x for x in (a["min"], b["min"], a["max"], b["max"]) if x is not None]
+
+    return {
+        "count": a["count"] + b["count"],
+        "num_count": n,
+        "integral": a["integral"] and b["integral"],
+        "sum": a["sum"] + b["sum"],
+        "m2": m2,
+        "min": min(bounds) if bounds else None,
+        "max": max(bounds) if bounds else None,
+        "digest": _compress(digest[:, 0], digest[:, 1]).tolist(),
+        "removed": a["removed"] + b["removed"],
+        "top": top,
+        "top_error": a["top_error"] + b["top_error"] + cut,
+    }
+
+
+def _remove_value(stats: dict, value: Any) -> dict | None:
+    """
+    Stats without one previous cell value, or None when they can no longer be
+    kept exact enough (removed a min/max, or too many digest removals).
+    """
+    if value is None:
+        return stats
+    stats = {**stats, "count": stats["count"] - 1, "top": dict(stats["top"])}
+
+    key = str(value)
+    if key in stats["top"]:
+        stats["top"][key] -= 1
+        if stats["top"][key] <= 0:
+            del stats["top"][key]
+
+    if not _is_number(value):
+        return stats
+
+    x = float(value)
+    if x <= stats["min"] or x >= stats["max"]:
+        return None
+    n = stats["num_count"]
+    mean = stats["sum"] / n
+    new_mean = (stats["sum"] - x) / (n - 1)
+    stats.update(
+        num_count=n - 1,
+        sum=stats["sum"] - x,
+        m2=max(stats["m2"] - (x - mean) * (x - new_mean), 0.0),
+        removed=stats["removed"] + 1,
+    )
+    # The digest can't forget values; rebuild once it drifts too far
+    if stats["removed"] > MAX_DIGEST_DRIFT * stats["num_count"]:
+        return None
+    return stats
+
+
+def build_sheet_stats(columns: list[dict], rows: list[dict]) -> dict:
+    """{column id: column stats} over the given rows"""
+    return {c["id"]: column_stats([row.get(c["id"]) for row in rows]) for c in columns}
+
+
+def merge_sheet_stats(stats: dict, other: dict) -> dict:
+    merged = dict(stats)
+    for column_id, column in other.items():
+        merged[column_id] = merge_column_stats(stats.get(column_id), column)
+    return merged
+
+
+def describe_from_stats(stats: dict, columns: list[dict], row_count: int) -> dict:
+    """
+    Per-column statistics keyed by column name, in the same shape as
+    ColumnarSheet.describe; quartiles come from the digest and are approximate.
+    """
+    described = {}
+    for definition in columns:
+        column = stats.get(definition["id"]) or column_stats([])
+        name = definition.get("name", definition["id"])
+        # Same numeric rule as sheet_engine.Column
+        is_numeric = definition.get("type", "text") == "number" or (
+            column["count"] > 0 and column["num_count"] == column["count"]
+        )
+
+        if is_numeric:
+            n = column["num_count"]
+            if not n:
+                described[name] = {"error": "No numeric values found"}
+                continue
+            p25, median, p75 = _digest_quantiles(column, [0.25, 0.5, 0.75])
+            integral = column["integral"]
+            described[name] = {
+                "count": n,
+                "null_count": row_count - n,
+                "sum": to_python(column["sum"], integral),
+                "mean": column["sum"] / n,
+                "median": median,
+                "min": to_python(column["min"], integral),
+                "max": to_python(column["max"], integral),
+                "stdev": (column["m2"] / (n - 1)) ** 0.5 if n > 1 else 0,
+                "p25": p25,
+                "p75": p75,
+            }
+            if len(column["digest"]) < n + column["removed"]:
+                described[name]["approximate"] = ["median", "p25", "p75"]
+            continue
+
+        top = sorted(column["top"].items(), key=lambda item: (-item[1], item[0]))[:5]
+        described[name] = {
+            "type": "categorical",
+            "unique_count": len(column["top"]),
+            "total_count": column["count"],
+            "top_values": top,
+        }
+        if column["top_error"]:
+            # More distinct values than counters: counts are undercounted by at most top_error
+            del described[name]["unique_count"]
+            described[name]["unique_count_min"] = HEAVY_HITTERS + 1
+            described[name]["top_count_error"] = column["top_error"]
+            described[name]["approximate"] = ["unique_count", "top_values"]
+    return described
+
+
+class IncrementalStats:
+    """
+    Persisted column stats of one sheet, advanced alongside writes.
+
+    Load before writing; every write must move the sheet exactly one version
+    ahead of the stats, otherwise someone else wrote in between and the stats
+    are dropped (rebuilt lazily by the next full read).
+    """
+
+    def __init__(self, sheet_id: str, stats: dict | None, version: int | None):
+        self.sheet_id = sheet_id
+        self.stats = stats
+        self.version = version
+        self.dirty = False
+
+    @classmethod
+    def load(cls, client, sheet_id: str) -> "IncrementalStats":
+        result = client.rpc("sheet_get_column_stats", {"p_sheet_id": sheet_id}).execute()
+        if not result.data:
+            return cls(sheet_id, None, None)
+
+        record = result.data[0]
+        if record["row_count"] == 0 and record["stats_version"] != record["sheet_version"]:
+            # Nothing to scan: stats of an empty sheet are known
+            return cls(sheet_id, {}, record["sheet_version"])
+        if record["stats_version"] != record["sheet_version"]:
+            return cls(sheet_id, None, record["sheet_version"])
+        return cls(sheet_id, record["stats"] or {}, record["stats_version"])
+
+    @property
+    def fresh(self) -> bool:
+        return self.stats is not None
+
+    def _advance(self, new_version: int | None) -> bool:
+        if self.stats is None or new_version is None or self.version is None or new_version != self.version + 1:
+            self.stats = None
+            return False
+        self.version = new_version
+        self.dirty = True
+        return True
+
+    def append(self, rows: list[dict], new_version: int | None) -> None:
+        if self._advance(new_version):
+            # Columns absent from every appended row gain no values
+            column_ids = {key for row in rows for key in row if key != "id"}
+            self.stats = merge_sheet_stats(self.stats, build_sheet_stats([{"id": c} for c in column_ids], rows))
+
+    def update_cell(self, column_id: str, old_value: Any, new_value: Any, new_version: int | None) -> None:
+        if not self._advance(new_version):
+            return
+        column = self.stats.get(column_id)
+        if column is not None:
+            column = _remove_value(column, old_value)
+            if column is None:
+                self.stats = None
+                return
+        self.stats = {**self.stats, column_id: merge_column_stats(column, column_stats([new_value]))}
+
+    def touch(self, new_version: int | None) -> None:
+        """Record a write that changed no cell values (e.g. a new column)"""
+        self._advance(new_version)
+
+    def save(self, client) -> bool:
+        """Persist if the stats still describe the sheet's current version"""
+        if self.stats is None or not self.dirty:
+            return False
+        result = client.rpc("sheet_save_column_stats", {
+            "p_sheet_id": self.sheet_id,
+            "p_stats": self.stats,
+            "p_version": self.version,
+        }).execute()
+        self.dirty = False
+        return bool(result.data)
+
+
+def touch_column_stats(client, sheet_id: str, new_version: int | None) -> None:
+    """Carry stats across a write that changed no cell values, without loading them"""
+    if new_version is not None:
+        client.rpc("sheet_touch_column_stats", {"p_sheet_id": sheet_id, "p_version": new_version}).execute()
+
+
+def rebuild_column_stats(client, sheet: dict) -> dict:
+    """Full recompute from a loaded sheet, persisted for later incremental updates"""
+    stats = build_sheet_stats(sheet.get("columns") or [], sheet.get("rows") or [])
+    tracker = IncrementalStats(sheet["id"], stats, sheet.get("version"))
+    tracker.dirty = True
+    try:
+        tracker.save(client)
+    except Exception as e:
+        print(f"Column stats save failed: {e}")
+    return stats
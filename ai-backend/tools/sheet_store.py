@@ -0,0 +1,278 @@
+"""
+Sheet Store - 시트 행 데이터 접근 계층
+storage_mode('blob' | 'rows')에 관계없이 시트 행을 읽고, 추가/셀 수정은 서버 측 RPC로 처리
+읽은 시트는 버전 확인 후 재사용하는 프로세스 캐시에 보관
+"""
+import json
+import uuid
+
+from config import get_settings
+from utils.cache import LRUCache
+
+settings = get_settings()
+
+# sheet_rows rows fetched per request (PostgREST max-rows)
+ROW_PAGE_SIZE = 1000
+
+# Times a 'rows' mode sheet is re-read when its version moves while the rows are paged
+SNAPSHOT_FETCH_ATTEMPTS = 3
+
+# Rows serialized to estimate a snapshot's size
+SIZE_SAMPLE_ROWS = 100
+
+# sheet_id -> (sheet, estimated bytes); validated against sheets.version on every read
+_snapshot_cache = LRUCache(
+    max_entries=1024,
+    max_bytes=settings.sheet_cache_max_mb * 1024 * 1024,
+    sizeof=lambda entry: entry[1],
+)
+
+
+class SheetConflictError(Exception):
+    """Raised when expected_version does not match the stored version"""
+
+    def __init__(self, current_version: int | None):
+        super().__init__(f"version conflict (current version: {current_version})")
+        self.current_version = current_version
+
+
+def new_row_id() -> str:
+    """Short row id used by the sheet editor"""
+    return str(uuid.uuid4())[:8]
+
+
+def _row_from_record(record: dict) -> dict:
+    return {"id": record["row_key"], **(record.get("cells") or {})}
+
+
+def iter_sheet_rows(client, sheet_id: str):
+    """
+    Yield rows of a 'rows' mode sheet in insertion order.
+
+    Uses keyset pagination on position so large sheets are streamed page by page.
+    """
+    last_position = None
+    while True:
+        query = (
+            client.table("sheet_rows")
+            .select("row_key, position, cells")
+            .eq("sheet_id", sheet_id)
+            .order("position")
+            .limit(ROW_PAGE_SIZE)
+        )
+        if last_position is not None:
+            query = query.gt("position", last_position)
+
+        records = query.execute().data or []
+        for record in records:
+            yield _row_from_record(record)
+
+        if len(records) < ROW_PAGE_SIZE:
+            return
+        last_position = records[-1]["position"]
+
+
+def _estimate_bytes(value) -> int:
+    """Approximate JSON size, extrapolated from a sample of rows"""
+    if isinstance(value, list):
+        if not value:
+            return 2
+        step = max(1, len(value) // SIZE_SAMPLE_ROWS)
+        sample = value[::step][:SIZE_SAMPLE_ROWS]
+        return int(len(json.dumps(sample, default=str)) / len(sample) * len(value))
+    rows = value.get("rows") or []
+    meta = {k: v for k, v in value.items() if k != "rows"}
+    return len(json.dumps(meta, default=str)) + _estimate_bytes(rows)
+
+
+def _fetch_sheet(client, sheet_id: str) -> tuple[dict | None, bool]:
+    """
+    (sheet, consistent) - consistent is False when the rows could not be read
+    at a single version (writes kept landing while paging); such a sheet has
+    no version/updated_at and must not be cached.
+    """
+    for _ in range(SNAPSHOT_FETCH_ATTEMPTS):
+        result = client.table("sheets").select("*").eq("id", sheet_id).limit(1).execute()
+        if not result.data:
+            return None, True
+
+        sheet = result.data[0]
+        if sheet.get("storage_mode") != "rows":
+            return sheet, True
+
+        sheet["rows"] = list(iter_sheet_rows(client, sheet_id))
+        # Rows are paged in separate requests: a write in between would put newer rows under the old version
+        head = client.table("sheets").select("version").eq("id", sheet_id).limit(1).execute()
+        if not head.data:
+            return None, True
+        if head.data[0]["version"] == sheet.get("version"):
+            return sheet, True
+
+    # No version tag, so nothing downstream caches or keys results by it
+    sheet["version"] = None
+    sheet["updated_at"] = None
+    return sheet, False
+
+
+def load_sheet(client, sheet_id: str) -> dict | None:
+    """
+    Load a sheet with its rows assembled into the blob format.
+
+    A cached snapshot is returned when a version-only query shows the sheet
+    is unchanged; the returned dict is shared and must not be mutated.
+
+    Returns:
+        Sheet dict with "rows" as [{"id": ..., "col1": ...}, ...], or None if missing
+    """
+    cached = _snapshot_cache.get(sheet_id)
+    if cached is not None:
+        head = client.table("sheets").select("version").eq("id", sheet_id).limit(1).execute()
+        if not head.data:
+            _snapshot_cache.pop(sheet_id)
+            return None
+        if head.data[0]["version"] == cached[0].get("version"):
+            return cached[0]
+
+    sheet, consistent = _fetch_sheet(client, sheet_id)
+    if sheet is None or not consistent:
+        _snapshot_cache.pop(sheet_id)
+        return sheet
+
+    _snapshot_cache.set(sheet_id, (sheet, _estimate_bytes(sheet)))
+    return sheet
+
+
+def _patch_snapshot(sheet_id: str, new_version: int | None, patch, added_bytes: int = 0) -> None:
+    """
+    Apply a write to the cached snapshot instead of dropping it.
+
+    Only applied when the write moved the sheet exactly one version ahead of
+    the snapshot; otherwise someone else wrote in between and the entry is dropped.
+    """
+    cached = _snapshot_cache.get(sheet_id)
+    if cached is None:
+        return
+
+    sheet, size = cached
+    if new_version is None or sheet.get("version") != new_version - 1:
+        _snapshot_cache.pop(sheet_id)
+        return
+
+    patched = patch(sheet)
+    if patched is None:
+        _snapshot_cache.pop(sheet_id)
+        return
+
+    patched["version"] = new_version
+    _snapshot_cache.set(sheet_id, (patched, size + added_bytes))
+
+
+def invalidate_sheet(sheet_id: str) -> None:
+    """Drop a cached snapshot"""
+    _snapshot_cache.pop(sheet_id)
+
+
+def update_cached_columns(sheet_id: str, columns: list[dict], new_version: int | None) -> None:
+    """Record a column definition change made outside this module"""
+    _patch_snapshot(sheet_id, new_version, lambda sheet: {**sheet, "columns": columns})
+
+
+def get_snapshot_cache_stats() -> dict:
+    return _snapshot_cache.stats()
+
+
+def append_rows(client, sheet_id: str, rows: list[dict]) -> dict:
+    """
+    Append rows without reading the existing ones.
+
+    Rows without an "id" get one assigned in place.
+
+    Returns:
+        {"total_rows": int, "version": int}
+    """
+    for row in rows:
+        if "id" not in row:
+            row["id"] = new_row_id()
+
+    result = client.rpc("sheet_append_rows", {"p_sheet_id": sheet_id, "p_rows": rows}).execute()
+    outcome = result.data[0] if result.data else {"status": "sheet_not_found"}
+    if outcome["status"] == "sheet_not_found":
+        invalidate_sheet(sheet_id)
+        raise LookupError("sheet not found")
+
+    _patch_snapshot(
+        sheet_id,
+        outcome["version"],
+        lambda sheet: {**sheet, "rows": sheet["rows"] + rows},
+        _estimate_bytes(rows),
+    )
+    return {"total_rows": outcome["total_rows"], "version": outcome["version"]}
+
+
+def update_cell(
+    client,
+    sheet_id: str,
+    row_id: str,
+    column_id: str,
+    value,
+    expected_version: int | None = None,
+) -> dict:
+    """
+    Update a single cell with jsonb_set on the server.
+
+    Args:
+        expected_version: Sheet version from a previous read (load_sheet()["version"]),
+            in both storage modes; the update is rejected if the sheet changed since
+
+    Returns:
+        {"version": new sheet version, "sheet_version": int, "old_value": previous cell value}
+
+    Raises:
+        LookupError: Sheet or row not found
+        SheetConflictError: expected_version is stale
+    """
+    result = client.rpc("sheet_update_cell", {
+        "p_sheet_id": sheet_id,
+        "p_row_key": row_id,
+        "p_column_id": column_id,
+        "p_value": value,
+        "p_expected_version": expected_version,
+    }).execute()
+    outcome = result.data[0] if result.data else {"status": "sheet_not_found", "version": None}
+
+    if outcome["status"] == "conflict":
+        invalidate_sheet(sheet_id)
+        raise SheetConflictError(outcome["version"])
+    if outcome["status"] == "sheet_not_found":
+        invalidate_sheet(sheet_id)
+        raise LookupError("sheet not found")
+    if outcome["status"] == "row_not_found":
+        raise LookupError("row not found")
+
+    def patch(sheet: dict) -> dict | None:
+        rows = list(sheet["rows"])
+        for index, row in enumerate(rows):
+            if row.get("id") == row_id:
+                rows[index] = {**row, column_id: value}
+                return {**sheet, "rows": rows}
+        return None
+
+    _patch_snapshot(sheet_id, outcome.get("sheet_version"), patch)
+    return {
+        "version": outcome["version"],
+        "sheet_version": outcome.get("sheet_version"),
+        "old_value": outcome.get("old_value"),
+    }
+
+
+def set_storage_mode(client, sheet_id: str, mode: str) -> int:
+    """
+    Convert a sheet between 'blob' and 'rows' storage.
+
+    Returns:
+        Number of rows moved (0 if already in the requested mode)
+    """
+    function = "sheet_migrate_to_rows" if mode == "rows" else "sheet_migrate_to_blob"
+    result = client.rpc(function, {"p_sheet_id": sheet_id}).execute()
+    invalidate_sheet(sheet_id)
+    return result.data or 0
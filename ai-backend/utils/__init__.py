@@ -1,3 +1,4 @@
 from .supabase import get_supabase_client
+from .hashing import content_hash
 
-__all__ = ["get_supabase_client"]
+__all__ = ["get_supabase_client", "content_hash"]
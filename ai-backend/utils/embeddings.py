@@ -0,0 +1,38 @@
+from functools import lru_cache
+from langchain_openai import OpenAIEmbeddings
+
+from config import get_settings
+
+settings = get_settings()
+
+# Same model/dimension as the frontend knowledge base (vector(1536))
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Character cap per input to stay under the embedding model's token limit
+EMBEDDING_INPUT_CHARS = 6000
+
+
+@lru_cache()
+def get_embeddings() -> OpenAIEmbeddings:
+    """Get shared embeddings client"""
+    return OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        api_key=settings.openai_api_key,
+    )
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed many texts in one API call"""
+    if not texts:
+        return []
+    return get_embeddings().embed_documents([t[:EMBEDDING_INPUT_CHARS] for t in texts])
+
+
+def embed_query(text: str) -> list[float] | None:
+    """Embed a search query, or None when embeddings are unavailable"""
+    if not settings.openai_api_key or not text.strip():
+        return None
+    try:
+        return get_embeddings().embed_query(text[:EMBEDDING_INPUT_CHARS])
+    except Exception:
+        return None
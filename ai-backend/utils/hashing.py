@@ -0,0 +1,10 @@
+import hashlib
+
+
+def content_hash(*parts: str | None) -> str:
+    """Stable SHA-256 hex digest over one or more text parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Literal
+
+from langchain_anthropic import ChatAnthropic
+from langchain_openai import ChatOpenAI
+
+from config import get_settings
+
+settings = get_settings()
+
+# Model of the agent whose tool call is running (set by the executor around tool execution)
+_agent_model: ContextVar[str | None] = ContextVar("agent_model", default=None)
+
+# Cheaper, faster model per provider for light work (summaries, priority tags)
+FAST_MODELS = {
+    "openai": "gpt-4o-mini",
+    "anthropic": "claude-3-5-haiku-latest",
+    "xai": "grok-4-1-fast",
+}
+
+
+def provider(model: str) -> str:
+    if model.startswith("claude"):
+        return "anthropic"
+    if model.startswith("grok"):
+        return "xai"
+    if model.startswith("ollama"):
+        return "ollama"
+    return "openai"
+
+
+def is_available(model: str) -> bool:
+    """Whether the model's provider has an API key configured"""
+    return {
+        "anthropic": bool(settings.anthropic_api_key),
+        "xai": bool(settings.xai_api_key),
+        "ollama": True,
+        "openai": bool(settings.openai_api_key),
+    }[provider(model)]
+
+
+def model_name(llm) -> str:
+    """Model id of a chat model (ChatAnthropic exposes it as .model)"""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", "")
+
+
+@lru_cache(maxsize=32)
+def _client(model: str, temperature: float) -> ChatOpenAI | ChatAnthropic:
+    """One non-streaming client per (model, temperature), created on first use"""
+    kind = provider(model)
+    if kind == "anthropic":
+        return ChatAnthropic(model=model, temperature=temperature, api_key=settings.anthropic_api_key)
+    if kind == "xai":
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=settings.xai_api_key,
+            base_url="https://api.x.ai/v1",
+        )
+    if kind == "ollama":
+        return ChatOpenAI(
+            model=model.replace("ollama/", ""),
+            temperature=temperature,
+            base_url="http://localhost:11434/v1",
+            api_key="ollama",
+        )
+    return ChatOpenAI(model=model, temperature=temperature, api_key=settings.openai_api_key)
+
+
+def get_llm(
+    default: str,
+    temperature: float = 0.3,
+    tier: Literal["default", "fast"] = "default",
+    fallback: str | None = None,
+) -> ChatOpenAI | ChatAnthropic:
+    """
+    Shared chat model for tool code.
+
+    Uses the model of the calling agent when a tool runs inside one, else
+    `default`. The "fast" tier swaps in the provider's cheaper model
+    (settings.fast_model when set). When the chosen provider has no API key,
+    `fallback` (or settings.default_model) is used instead.
+    """
+    model = _agent_model.get() or default
+    if tier == "fast":
+        model = settings.fast_model or FAST_MODELS.get(provider(model), model)
+    if not is_available(model):
+        model = fallback or settings.default_model
+    return _client(model, temperature)
+
+
+@contextmanager
+def use_agent_model(model: str):
+    """Make get_llm() follow `model` for code run inside this block"""
+    token = _agent_model.set(model)
+    try:
+        yield
+    finally:
+        _agent_model.reset(token)
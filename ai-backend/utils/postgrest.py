@@ -0,0 +1,514 @@
+import asyncio
+import json
+import threading
+from typing import Any
+
+import httpx
+
+# Connections kept open to PostgREST (shared by every tool, worker and endpoint)
+POOL_MAX_CONNECTIONS = 20
+POOL_KEEPALIVE_CONNECTIONS = 10
+REQUEST_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+# Chat-history inserts are held this long (or until this many are queued) and written together
+CHAT_BATCH_INTERVAL = 0.05
+CHAT_BATCH_SIZE = 100
+
+_IN_RESERVED = set(',.:()"\\ ')
+
+
+class APIError(Exception):
+    """Non-2xx PostgREST response"""
+
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        self.body = body
+        if isinstance(body, dict):
+            self.code = body.get("code")
+            message = body.get("message") or str(body)
+        else:
+            self.code = None
+            message = str(body)
+        super().__init__(f"{status} {message}")
+
+
+class APIResponse:
+    def __init__(self, data: Any, count: int | None = None):
+        self.data = data
+        self.count = count
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _format_in(values) -> str:
+    items = []
+    for value in values:
+        text = _format_value(value)
+        if any(c in _IN_RESERVED for c in text):
+            text = '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        items.append(text)
+    return f"in.({','.join(items)})"
+
+
+def _parse_count(content_range: str | None) -> int | None:
+    # "0-24/3573", "*/3573" or "0-24/*"
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+class _Raw:
+    """Response fields needed to build an APIResponse (shared between coalesced callers)"""
+
+    __slots__ = ("status", "text", "content_range")
+
+    def __init__(self, response: httpx.Response):
+        self.status = response.status_code
+        self.text = response.text
+        self.content_range = response.headers.get("content-range")
+
+    def parse(self) -> APIResponse:
+        # Parsed per caller, so callers that shared one request never share (and mutate) the same rows
+        try:
+            body = json.loads(self.text) if self.text else None
+        except ValueError:
+            if self.status < 400:
+                raise
+            body = self.text
+        if self.status >= 400:
+            raise APIError(self.status, body)
+        return APIResponse([] if body is None else body, _parse_count(self.content_range))
+
+
+class RequestCoalescer:
+    """
+    Single-flight reads: while a request is in flight, identical requests
+    wait for its response instead of sending their own. Runs on the client's
+    event loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def run(self, key: tuple, send) -> _Raw:
+        self.requests += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            raw = await send()
+            future.set_result(raw)
+            return raw
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a read nobody joined does not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+class InsertBatcher:
+    """
+    Awaitable batched inserts into one table.
+
+    Each submit() resolves to the inserted row once its batch is written:
+    records arriving within `interval` seconds (up to `max_batch`) go out as
+    one bulk insert. Unlike utils.write_behind, callers get the row back (None
+    if PostgREST returned no rows) and see insert errors.
+    """
+
+    def __init__(self, client: "PostgrestClient", table: str, interval: float = CHAT_BATCH_INTERVAL, max_batch: int = CHAT_BATCH_SIZE):
+        self.client = client
+        self.table = table
+        self.interval = interval
+        self.max_batch = max_batch
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._writes: set[asyncio.Task] = set()
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    async def _submit(self, record: dict) -> dict | None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        self.submitted += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._flush_pending)
+        return await future
+
+    async def submit(self, record: dict) -> dict | None:
+        return await self.client.run(self._submit(record))
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._write(batch))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            rows = (await self.client.table(self.table).insert([record for record, _ in batch]).aexecute()).data
+        except Exception as e:
+            print(f"Batched insert into {self.table} failed ({len(batch)} records): {e}")
+            self.failed += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+        if not rows:
+            # Written, but no representation came back (null/empty body) to hand out
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            return
+        # PostgREST returns bulk-inserted rows in input order
+        for (_, future), row in zip(batch, rows):
+            if not future.done():
+                future.set_result(row)
+        if len(rows) < len(batch):
+            error = APIError(200, f"insert into {self.table} returned {len(rows)} of {len(batch)} rows")
+            for _, future in batch[len(rows):]:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _flush(self) -> None:
+        self._flush_pending()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    async def flush(self) -> None:
+        """Write everything queued now and wait for in-flight batches"""
+        await self.client.run(self._flush())
+
+    def stats(self) -> dict:
+        return {
+            "table": self.table,
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+class _Request:
+    """Chainable PostgREST request; execute() blocks, aexecute() awaits"""
+
+    def __init__(self, client: "PostgrestClient", method: str, path: str, body: Any = None, coalesce: bool = False):
+        self._client = client
+        self._method = method
+        self._path = path
+        self._body = body
+        self._coalesce = coalesce
+        self._params: list[tuple[str, str]] = []
+        self._headers: dict[str, str] = {}
+
+    def execute(self) -> APIResponse:
+        return self._client.run_sync(self._send()).parse()
+
+    async def aexecute(self) -> APIResponse:
+        return (await self._client.run(self._send())).parse()
+
+    async def _send(self) -> _Raw:
+        return await self._client._request(
+            self._method, self._path, self._params, self._headers, self._body, self._coalesce
+        )
+
+
+class QueryBuilder(_Request):
+    """The subset of the supabase-py query builder used in this codebase"""
+
+    def __init__(self, client: "PostgrestClient", table: str):
+        super().__init__(client, "GET", f"/{table}")
+        self._order: list[str] = []
+
+    def _prefer(self, *values: str) -> None:
+        current = self._headers.get("Prefer")
+        self._headers["Prefer"] = ",".join(([current] if current else []) + list(values))
+
+    def _write(self, method: str, body: Any = None) -> "QueryBuilder":
+        self._method = method
+        self._body = body
+        self._coalesce = False
+        self._prefer("return=representation")
+        return self
+
+    def coalesce(self) -> "QueryBuilder":
+        """
+        Let identical reads in flight at the same time share one request.
+
+        Only for reads that may lag a concurrent write by one round trip
+        (searches, config lookups) - never for reads that check a version
+        or follow the caller's own write.
+        """
+        if self._method in ("GET", "HEAD"):
+            self._coalesce = True
+        return self
+
+    def select(self, columns: str = "*", count: str | None = None, head: bool = False) -> "QueryBuilder":
+        self._params.append(("select", "".join(columns.split())))
+        if count:
+            self._prefer(f"count={count}")
+        if head:
+            self._method = "HEAD"
+        return self
+
+    def insert(self, rows: dict | list[dict]) -> "QueryBuilder":
+        self._write("POST", rows)
+        if isinstance(rows, list) and rows:
+            # Rows may not all have the same keys: with ?columns= PostgREST would insert NULL
+            # for the missing ones, missing=default gives them the column default instead
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+            self._params.append(("columns", ",".join(columns)))
+            self._prefer("missing=default")
+        return self
+
+    def upsert(self, rows: dict | list[dict], on_conflict: str | None = None) -> "QueryBuilder":
+        self.insert(rows)
+        self._prefer("resolution=merge-duplicates")
+        if on_conflict:
+            self._params.append(("on_conflict", on_conflict))
+        return self
+
+    def update(self, values: dict) -> "QueryBuilder":
+        return self._write("PATCH", values)
+
+    def delete(self) -> "QueryBuilder":
+        return self._write("DELETE")
+
+    def _filter(self, column: str, operator: str, value: Any) -> "QueryBuilder":
+        self._params.append((column, f"{operator}.{_format_value(value)}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "lte", value)
+
+    def ilike(self, column: str, pattern: str) -> "QueryBuilder":
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values) -> "QueryBuilder":
+        self._params.append((column, _format_in(values)))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "QueryBuilder":
+        self._order.append(f"{column}.{'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, count: int) -> "QueryBuilder":
+        self._params.append(("limit", str(count)))
+        return self
+
+    def range(self, start: int, end: int) -> "QueryBuilder":
+        self._params.append(("offset", str(start)))
+        self._params.append(("limit", str(end - start + 1)))
+        return self
+
+    def single(self) -> "QueryBuilder":
+        """Return one row as a dict (error unless exactly one row matches)"""
+        self._headers["Accept"] = "application/vnd.pgrst.object+json"
+        return self
+
+    async def _send(self) -> _Raw:
+        if self._order:
+            self._params = [p for p in self._params if p[0] != "order"] + [("order", ",".join(self._order))]
+        return await super()._send()
+
+
+class PostgrestClient:
+    """
+    Pooled async PostgREST client.
+
+    One httpx.AsyncClient (keep-alive pool of POOL_MAX_CONNECTIONS) lives on a
+    private event loop thread, so every caller shares the same connections:
+    async code awaits aexecute(), sync tool and worker code (which runs in
+    threads) blocks on execute(). Reads that opt in (QueryBuilder.coalesce(),
+    rpc(..., coalesce=True)) share one request with identical reads already
+    in flight (RequestCoalescer); everything else always goes out.
+    """
+
+    def __init__(self, url: str, key: str):
+        self.base_url = f"{url.rstrip('/')}/rest/v1"
+        self.key = key
+        self.coalescer = RequestCoalescer()
+        self._http: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._batchers: dict[str, InsertBatcher] = {}
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, name)
+
+    def rpc(self, name: str, params: dict | None = None, coalesce: bool = False) -> _Request:
+        """
+        Call a Postgres function. coalesce=True lets identical concurrent calls
+        share one request - only for read-only functions whose callers accept
+        a result that may predate a write completing at the same time.
+        """
+        return _Request(self, "POST", f"/rpc/{name}", params or {}, coalesce=coalesce)
+
+    def batcher(self, table: str) -> InsertBatcher:
+        """Shared awaitable insert batcher for a table"""
+        with self._lock:
+            if table not in self._batchers:
+                self._batchers[table] = InsertBatcher(self, table)
+            return self._batchers[table]
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="postgrest", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def run(self, coro):
+        """Await a coroutine on the client's loop from any event loop"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def run_sync(self, coro):
+        """Run a coroutine on the client's loop and block until it finishes"""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Blocking PostgREST call on the client loop; use aexecute()")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created on the client loop on first request
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "apikey": self.key,
+                    "Authorization": f"Bearer {self.key}",
+                    "Content-Type": "application/json",
+                },
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=REQUEST_TIMEOUT,
+            )
+        return self._http
+
+    async def _request(self, method: str, path: str, params: list, headers: dict, body: Any, coalesce: bool) -> _Raw:
+        async def send() -> _Raw:
+            response = await self._client().request(
+                method,
+                path,
+                params=params,
+                headers=headers,
+                content=None if body is None else json.dumps(body, ensure_ascii=False, default=str),
+            )
+            return _Raw(response)
+
+        if not coalesce:
+            return await send()
+        key = (
+            method,
+            path,
+            tuple(params),
+            tuple(sorted(headers.items())),
+            None if body is None else json.dumps(body, sort_keys=True, default=str),
+        )
+        return await self.coalescer.run(key, send)
+
+    def stats(self) -> dict:
+        with self._lock:
+            batchers = list(self._batchers.values())
+        return {
+            "coalescer": self.coalescer.stats(),
+            "batchers": [batcher.stats() for batcher in batchers],
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush batched inserts and close the connection pool (used at shutdown)"""
+        with self._lock:
+            loop = self._loop
+            batchers = list(self._batchers.values())
+        if loop is None:
+            return
+
+        async def shutdown():
+            for batcher in batchers:
+                await batcher._flush()
+            if self._http is not None:
+                await self._http.aclose()
+                self._http = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+        except Exception as e:
+            print(f"PostgREST client shutdown failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        with self._lock:
+            self._loop = None
+            self._thread = None
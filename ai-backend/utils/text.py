@@ -0,0 +1,101 @@
+from functools import lru_cache
+import re
+
+import tiktoken
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+@lru_cache()
+def _encoding():
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (o200k_base, used by gpt-4o family)"""
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """First max_tokens tokens of text ('…' appended when cut)"""
+    tokens = _encoding().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding().decode(tokens[:max_tokens]) + "…"
+
+
+def split_sections(content: str) -> list[dict]:
+    """
+    Split markdown content into heading-delimited sections.
+
+    Returns:
+        [{"heading": str | None, "level": int, "start": int, "end": int, "text": str}, ...]
+        Text before the first heading becomes a section with heading None.
+    """
+    matches = list(_HEADING_RE.finditer(content))
+    sections = []
+
+    if not matches or matches[0].start() > 0:
+        end = matches[0].start() if matches else len(content)
+        if content[:end].strip():
+            sections.append({"heading": None, "level": 0, "start": 0, "end": end, "text": content[:end]})
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        sections.append({
+            "heading": match.group(2),
+            "level": len(match.group(1)),
+            "start": match.start(),
+            "end": end,
+            "text": content[match.start():end],
+        })
+
+    return sections
+
+
+def _split_oversized(text: str, max_tokens: int) -> list[str]:
+    """Split one oversized block by paragraphs, then by raw token windows"""
+    pieces = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if count_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if count_tokens(paragraph) <= max_tokens:
+            current = paragraph
+        else:
+            tokens = _encoding().encode(paragraph, disallowed_special=())
+            for start in range(0, len(tokens), max_tokens):
+                pieces.append(_encoding().decode(tokens[start:start + max_tokens]))
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_document(content: str, max_tokens: int) -> list[str]:
+    """
+    Split content into chunks of at most max_tokens that follow heading sections.
+
+    Each section becomes its own chunk (split by paragraphs when oversized);
+    only very small sections are folded into the preceding chunk. Boundaries
+    therefore stay put when other sections are edited, which keeps per-chunk
+    caches effective.
+    """
+    min_tokens = max_tokens // 8
+    chunks: list[str] = []
+    for section in split_sections(content) or [{"text": content}]:
+        text = section["text"].strip()
+        if not text:
+            continue
+        tokens = count_tokens(text)
+        if tokens > max_tokens:
+            chunks.extend(_split_oversized(text, max_tokens))
+        elif chunks and tokens < min_tokens and count_tokens(chunks[-1]) + tokens <= max_tokens:
+            chunks[-1] = f"{chunks[-1]}\n\n{text}"
+        else:
+            chunks.append(text)
+    return chunks
@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+
+from .supabase import get_supabase_client
+
+
+class WriteBehindQueue:
+    """
+    Buffered inserts into one table.
+
+    A daemon thread starts on the first submit and writes up to max_batch
+    records per insert, at least every flush_interval seconds. When
+    max_pending records are already waiting, new ones are dropped (and
+    counted) rather than blocking the caller.
+    """
+
+    def __init__(self, table: str, max_batch: int = 100, flush_interval: float = 1.0, max_pending: int = 10000):
+        self.table = table
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Signalled when every submitted record has been written (or failed)
+        self._idle = threading.Condition(self._lock)
+        # Records queued or taken by the writer thread but not yet written
+        self._unwritten = 0
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def submit(self, record: dict) -> bool:
+        """Queue a record for insert; False if the queue is full"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+            self._unwritten += 1
+        return True
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"write-behind-{self.table}", daemon=True
+                )
+                self._thread.start()
+
+    def _drain(self, first=None) -> list[dict]:
+        records = [] if first is None else [first]
+        while len(records) < self.max_batch:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first))
+
+    def _write(self, records: list[dict]) -> None:
+        if not records:
+            return
+        try:
+            get_supabase_client().table(self.table).insert(records).execute()
+            with self._lock:
+                self.written += len(records)
+                self.batches += 1
+        except Exception as e:
+            print(f"Write-behind insert into {self.table} failed ({len(records)} records): {e}")
+            with self._lock:
+                self.failed += len(records)
+        finally:
+            with self._lock:
+                self._unwritten -= len(records)
+                if not self._unwritten:
+                    self._idle.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Write everything still queued from the calling thread and wait for a
+        batch the writer thread is already sending (used at shutdown)
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            records = self._drain()
+            if not records:
+                break
+            self._write(records)
+        with self._idle:
+            while self._unwritten and (remaining := deadline - time.monotonic()) > 0:
+                self._idle.wait(remaining)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "table": self.table,
+                "pending": self._queue.qsize(),
+                "submitted": self.submitted,
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "batches": self.batches,
+            }
+
+
+_queues: dict[str, WriteBehindQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_behind(table: str) -> WriteBehindQueue:
+    """Shared queue for a table"""
+    with _queues_lock:
+        if table not in _queues:
+            _queues[table] = WriteBehindQueue(table)
+        return _queues[table]
+
+
+def flush_all(timeout: float = 5.0) -> None:
+    with _queues_lock:
+        queues = list(_queues.values())
+    for write_queue in queues:
+        write_queue.flush(timeout)
+
+
+def get_write_behind_stats() -> list[dict]:
+    with _queues_lock:
+        queues = list(_queues.values())
+    return [write_queue.stats() for write_queue in queues]
@@ -0,0 +1,45 @@
+-- Document Analysis Cache
+-- ai_docs_analyze 결과를 문서 내용 해시 기준으로 저장해 동일 문서 재분석 시 LLM 호출 생략
+-- 쓰기(insert/upsert/delete)는 백엔드(service role) 전용: SELECT 정책만 두고 쓰기 정책은 없음
+
+-- ============================================
+-- Document Analyses Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS document_analyses (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  document_id UUID NOT NULL REFERENCES project_documents(id) ON DELETE CASCADE,
+
+  -- Cache key
+  content_hash TEXT NOT NULL, -- SHA-256 of title + content + doc_type at analysis time
+  analysis_type TEXT NOT NULL, -- summary, key_points, action_items, sentiment, full
+  model TEXT NOT NULL,
+  mode TEXT NOT NULL DEFAULT 'single', -- single, map_reduce
+
+  -- Result
+  analysis TEXT NOT NULL,
+  metadata JSONB DEFAULT '{}', -- chunks_total, map_rounds, etc.
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+
+  CONSTRAINT document_analyses_cache_key UNIQUE (document_id, content_hash, analysis_type, model, mode)
+);
+
+-- ============================================
+-- Indexes
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_document_analyses_document_id ON document_analyses(document_id);
+
+-- ============================================
+-- RLS Policies
+-- ============================================
+ALTER TABLE document_analyses ENABLE ROW LEVEL SECURITY;
+
+-- Select: anyone who can see the document (project_documents RLS applies)
+-- No insert/update/delete policies: the AI backend writes with the service role key
+CREATE POLICY "document_analyses_select" ON document_analyses
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM project_documents d
+      WHERE d.id = document_analyses.document_id
+    )
+  );
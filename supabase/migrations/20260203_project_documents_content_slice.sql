@@ -0,0 +1,21 @@
+-- Project Documents Content Slice
+-- ai_docs_get이 긴 문서 본문 전체 대신 필요한 구간만 가져오도록 하는 함수
+
+CREATE OR REPLACE FUNCTION get_project_document_content(
+  p_doc_id UUID,
+  p_offset INTEGER DEFAULT 0,
+  p_length INTEGER DEFAULT 4000
+)
+RETURNS TABLE (
+  content TEXT,
+  content_length INTEGER
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    substring(d.content FROM GREATEST(p_offset, 0) + 1 FOR GREATEST(p_length, 0)) AS content,
+    char_length(d.content) AS content_length
+  FROM project_documents d
+  WHERE d.id = p_doc_id;
+$$;
@@ -0,0 +1,62 @@
+-- Project Documents Keyset Pagination
+-- (created_at, id) 커서 기반 목록 조회, 목록에서는 content를 읽지 않음
+
+-- ============================================
+-- Keyset Index
+-- 고정 크기 키 컬럼만 사용 (summary/tags 같은 무제한 컬럼을 INCLUDE 하면
+-- btree 튜플 한도 ~2704바이트를 넘는 문서의 INSERT/UPDATE가 실패)
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_project_documents_project_keyset
+  ON project_documents (project_id, created_at DESC, id DESC);
+
+-- project_id 단일 인덱스는 위 인덱스의 선두 컬럼으로 대체
+DROP INDEX IF EXISTS idx_project_documents_project_id;
+
+-- ============================================
+-- Keyset List Function
+-- p_cursor_created_at/p_cursor_id: 이전 페이지 마지막 행 (NULL이면 첫 페이지)
+-- ============================================
+CREATE OR REPLACE FUNCTION list_project_documents(
+  p_project_id UUID,
+  p_doc_type TEXT DEFAULT NULL,
+  p_status TEXT DEFAULT NULL,
+  p_cursor_created_at TIMESTAMPTZ DEFAULT NULL,
+  p_cursor_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 20,
+  p_include_content BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  summary TEXT,
+  doc_type TEXT,
+  tags TEXT[],
+  status TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  content TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    d.id,
+    d.title,
+    d.summary,
+    d.doc_type,
+    d.tags,
+    d.status,
+    d.created_at,
+    d.updated_at,
+    CASE WHEN p_include_content THEN d.content ELSE NULL END AS content
+  FROM project_documents d
+  WHERE d.project_id = p_project_id
+    AND (p_doc_type IS NULL OR d.doc_type = p_doc_type)
+    AND (p_status IS NULL OR d.status = p_status)
+    AND (
+      p_cursor_created_at IS NULL
+      OR (d.created_at, d.id) < (p_cursor_created_at, p_cursor_id)
+    )
+  ORDER BY d.created_at DESC, d.id DESC
+  LIMIT p_limit;
+$$;
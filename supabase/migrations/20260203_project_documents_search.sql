@@ -0,0 +1,138 @@
+-- Project Documents Search Index
+-- ilike 순차 스캔을 tsvector + trigram + pgvector 하이브리드 검색으로 대체
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- ============================================
+-- Search Columns
+-- ============================================
+ALTER TABLE project_documents
+  -- 제목(A) > 요약(B) > 본문(C) 가중치. tsvector 1MB 제한 때문에 본문은 앞부분만 색인
+  ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(summary, '')), 'B') ||
+    setweight(to_tsvector('simple', left(coalesce(content, ''), 500000)), 'C')
+  ) STORED,
+  -- text-embedding-3-small (title + content), 백엔드에서 생성/갱신
+  ADD COLUMN IF NOT EXISTS embedding vector(1536),
+  -- embedding 생성 시점의 title/content 해시 (변경 없으면 재계산 생략)
+  ADD COLUMN IF NOT EXISTS embedding_hash TEXT;
+
+-- ============================================
+-- Indexes
+-- ============================================
+-- 050에서 만든 표현식 인덱스는 search_vector 인덱스로 대체
+DROP INDEX IF EXISTS idx_project_documents_content_search;
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_search_vector
+  ON project_documents USING gin(search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_title_trgm
+  ON project_documents USING gin(title gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_embedding
+  ON project_documents USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+
+-- ============================================
+-- Hybrid Search Function
+-- text_score: ts_rank_cd (문서 길이 정규화, 0~1) 또는 제목 trigram 유사도 중 큰 값
+-- vector_score: 코사인 유사도 (임베딩이 주어진 경우)
+-- score = p_text_weight * text_score + (1 - p_text_weight) * vector_score
+-- ============================================
+CREATE OR REPLACE FUNCTION search_project_documents(
+  p_project_id UUID,
+  p_query TEXT,
+  p_query_embedding vector(1536) DEFAULT NULL,
+  p_doc_type TEXT DEFAULT NULL,
+  p_match_count INTEGER DEFAULT 10,
+  p_text_weight FLOAT DEFAULT 0.5,
+  p_match_threshold FLOAT DEFAULT 0.3
+)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  summary TEXT,
+  doc_type TEXT,
+  tags TEXT[],
+  status TEXT,
+  created_at TIMESTAMPTZ,
+  text_score FLOAT,
+  vector_score FLOAT,
+  score FLOAT
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_tsquery tsquery;
+  v_text_weight FLOAT;
+BEGIN
+  -- 검색어를 어절 단위 접두사 AND 쿼리로 변환 ('문서' → '문서':* 로 '문서를'도 매칭)
+  SELECT to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' & '))
+  INTO v_tsquery
+  FROM unnest(tsvector_to_array(to_tsvector('simple', coalesce(p_query, '')))) AS lexeme;
+
+  -- 임베딩이 없으면 텍스트 점수만 사용
+  v_text_weight := CASE WHEN p_query_embedding IS NULL THEN 1.0 ELSE p_text_weight END;
+
+  RETURN QUERY
+  WITH text_hits AS (
+    SELECT
+      d.id,
+      GREATEST(
+        CASE WHEN v_tsquery IS NOT NULL AND d.search_vector @@ v_tsquery
+          THEN ts_rank_cd(d.search_vector, v_tsquery, 1 | 32) ELSE 0 END,
+        similarity(d.title, p_query)
+      )::FLOAT AS text_score
+    FROM project_documents d
+    WHERE d.project_id = p_project_id
+      AND d.status = 'published'
+      AND (p_doc_type IS NULL OR d.doc_type = p_doc_type)
+      AND (
+        (v_tsquery IS NOT NULL AND d.search_vector @@ v_tsquery)
+        OR d.title % p_query
+      )
+    ORDER BY text_score DESC
+    LIMIT p_match_count * 5
+  ),
+  vector_hits AS (
+    SELECT
+      d.id,
+      (1 - (d.embedding <=> p_query_embedding))::FLOAT AS vector_score
+    FROM project_documents d
+    WHERE p_query_embedding IS NOT NULL
+      AND d.project_id = p_project_id
+      AND d.status = 'published'
+      AND d.embedding IS NOT NULL
+      AND (p_doc_type IS NULL OR d.doc_type = p_doc_type)
+      AND 1 - (d.embedding <=> p_query_embedding) >= p_match_threshold
+    ORDER BY d.embedding <=> p_query_embedding
+    LIMIT p_match_count * 5
+  ),
+  candidates AS (
+    SELECT
+      coalesce(t.id, v.id) AS id,
+      coalesce(t.text_score, 0) AS text_score,
+      coalesce(v.vector_score, 0) AS vector_score
+    FROM text_hits t
+    FULL OUTER JOIN vector_hits v ON v.id = t.id
+  )
+  SELECT
+    d.id,
+    d.title,
+    d.summary,
+    d.doc_type,
+    d.tags,
+    d.status,
+    d.created_at,
+    c.text_score,
+    c.vector_score,
+    (v_text_weight * c.text_score + (1 - v_text_weight) * c.vector_score)::FLOAT AS score
+  FROM candidates c
+  JOIN project_documents d ON d.id = c.id
+  ORDER BY score DESC, d.created_at DESC
+  LIMIT p_match_count;
+END;
+$$;
@@ -0,0 +1,15 @@
+-- Sheet Analyses Reuse
+-- ai_sheet_analyze 결과를 (sheet_id, sheet_version, analysis_type, column_key, model_used)로 조회해
+-- 데이터가 바뀌지 않았으면 LLM 호출 없이 재사용
+
+-- ============================================
+-- Lookup Columns
+-- ============================================
+ALTER TABLE sheet_analyses
+  -- sheets.version the analysis was computed from
+  ADD COLUMN IF NOT EXISTS sheet_version INTEGER,
+  -- Sorted analyzed column ids joined by ',' ('' = all columns)
+  ADD COLUMN IF NOT EXISTS column_key TEXT NOT NULL DEFAULT '';
+
+CREATE INDEX IF NOT EXISTS idx_sheet_analyses_lookup
+  ON sheet_analyses(sheet_id, sheet_version, analysis_type, column_key, model_used, created_at DESC);
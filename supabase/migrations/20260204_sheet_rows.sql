@@ -0,0 +1,314 @@
+-- Sheet Row Storage
+-- sheets.rows JSON 배열 통째 읽기/쓰기 대신 행 단위 저장(sheet_rows) + 버전 기반 낙관적 동시성 제어
+-- storage_mode = 'blob' : 기존 방식 (sheets.rows), 'rows' : sheet_rows 테이블
+
+-- ============================================
+-- Sheets: storage mode + version
+-- ============================================
+ALTER TABLE sheets
+  ADD COLUMN IF NOT EXISTS storage_mode TEXT NOT NULL DEFAULT 'blob' CHECK (storage_mode IN ('blob', 'rows')),
+  -- rows/columns 변경 시마다 증가 (캐시 무효화, blob 모드 낙관적 잠금)
+  ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION bump_sheet_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.rows IS DISTINCT FROM OLD.rows OR NEW.columns IS DISTINCT FROM OLD.columns THEN
+    NEW.version := OLD.version + 1;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_sheets_version ON sheets;
+CREATE TRIGGER bump_sheets_version
+  BEFORE UPDATE ON sheets
+  FOR EACH ROW EXECUTE FUNCTION bump_sheet_version();
+
+-- ============================================
+-- Sheet Rows Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS sheet_rows (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  sheet_id UUID NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+
+  -- Row identity (same value as the "id" key in blob rows)
+  row_key TEXT NOT NULL,
+  -- Insertion order
+  position BIGINT GENERATED BY DEFAULT AS IDENTITY,
+
+  -- Cell values keyed by column id
+  cells JSONB NOT NULL DEFAULT '{}',
+  -- Format: {"col1": "value", "col2": 123, ...}
+
+  -- Optimistic concurrency
+  version INTEGER NOT NULL DEFAULT 1,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+  CONSTRAINT sheet_rows_sheet_row_key UNIQUE (sheet_id, row_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sheet_rows_sheet_position ON sheet_rows(sheet_id, position);
+
+-- ============================================
+-- RLS Policies (same access as the parent sheet)
+-- ============================================
+ALTER TABLE sheet_rows ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "sheet_rows_select" ON sheet_rows
+  FOR SELECT USING (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_rows.sheet_id)
+  );
+
+CREATE POLICY "sheet_rows_insert" ON sheet_rows
+  FOR INSERT WITH CHECK (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_rows.sheet_id)
+  );
+
+CREATE POLICY "sheet_rows_update" ON sheet_rows
+  FOR UPDATE USING (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_rows.sheet_id)
+  );
+
+CREATE POLICY "sheet_rows_delete" ON sheet_rows
+  FOR DELETE USING (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_rows.sheet_id)
+  );
+
+-- ============================================
+-- Triggers
+-- ============================================
+CREATE TRIGGER update_sheet_rows_updated_at
+  BEFORE UPDATE ON sheet_rows
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- sheet_rows 변경 시 부모 sheets.version/updated_at 갱신 (문장 단위로 한 번만)
+CREATE OR REPLACE FUNCTION bump_sheet_version_from_rows()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE sheets s
+  SET version = s.version + 1, updated_at = NOW()
+  WHERE s.id IN (SELECT DISTINCT sheet_id FROM changed_rows);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sheet_rows_bump_version_insert
+  AFTER INSERT ON sheet_rows
+  REFERENCING NEW TABLE AS changed_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_sheet_version_from_rows();
+
+CREATE TRIGGER sheet_rows_bump_version_update
+  AFTER UPDATE ON sheet_rows
+  REFERENCING NEW TABLE AS changed_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_sheet_version_from_rows();
+
+CREATE TRIGGER sheet_rows_bump_version_delete
+  AFTER DELETE ON sheet_rows
+  REFERENCING OLD TABLE AS changed_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_sheet_version_from_rows();
+
+-- ============================================
+-- Append Rows (both storage modes, no read-modify-write)
+-- p_rows: [{"id": "row1", "col1": "value", ...}, ...]
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_append_rows(
+  p_sheet_id UUID,
+  p_rows JSONB
+)
+RETURNS TABLE (
+  status TEXT,
+  total_rows INTEGER,
+  version INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_mode TEXT;
+  v_total INTEGER;
+  v_version INTEGER;
+BEGIN
+  SELECT s.storage_mode INTO v_mode FROM sheets s WHERE s.id = p_sheet_id;
+  IF NOT FOUND THEN
+    RETURN QUERY SELECT 'sheet_not_found'::TEXT, NULL::INTEGER, NULL::INTEGER;
+    RETURN;
+  END IF;
+
+  IF v_mode = 'rows' THEN
+    INSERT INTO sheet_rows (sheet_id, row_key, cells)
+    SELECT p_sheet_id, e.elem->>'id', e.elem - 'id'
+    FROM jsonb_array_elements(p_rows) WITH ORDINALITY AS e(elem, ord)
+    ORDER BY e.ord;
+
+    SELECT count(*) INTO v_total FROM sheet_rows r WHERE r.sheet_id = p_sheet_id;
+    SELECT s.version INTO v_version FROM sheets s WHERE s.id = p_sheet_id;
+  ELSE
+    UPDATE sheets s
+    SET rows = s.rows || p_rows
+    WHERE s.id = p_sheet_id
+    RETURNING jsonb_array_length(s.rows), s.version INTO v_total, v_version;
+  END IF;
+
+  RETURN QUERY SELECT 'appended'::TEXT, v_total, v_version;
+END;
+$$;
+
+-- ============================================
+-- Update Cell (both storage modes)
+-- rows 모드: p_expected_version은 행 버전, blob 모드: 시트 버전
+-- status: updated | conflict | row_not_found | sheet_not_found
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_update_cell(
+  p_sheet_id UUID,
+  p_row_key TEXT,
+  p_column_id TEXT,
+  p_value JSONB,
+  p_expected_version INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+  status TEXT,
+  version INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_mode TEXT;
+  v_sheet_version INTEGER;
+  v_index INTEGER;
+  v_version INTEGER;
+BEGIN
+  IF p_value IS NULL THEN
+    p_value := 'null'::JSONB;
+  END IF;
+
+  SELECT s.storage_mode, s.version INTO v_mode, v_sheet_version
+  FROM sheets s WHERE s.id = p_sheet_id;
+  IF NOT FOUND THEN
+    RETURN QUERY SELECT 'sheet_not_found'::TEXT, NULL::INTEGER;
+    RETURN;
+  END IF;
+
+  IF v_mode = 'rows' THEN
+    UPDATE sheet_rows r
+    SET cells = jsonb_set(r.cells, ARRAY[p_column_id], p_value),
+        version = r.version + 1
+    WHERE r.sheet_id = p_sheet_id
+      AND r.row_key = p_row_key
+      AND (p_expected_version IS NULL OR r.version = p_expected_version)
+    RETURNING r.version INTO v_version;
+
+    IF FOUND THEN
+      RETURN QUERY SELECT 'updated'::TEXT, v_version;
+      RETURN;
+    END IF;
+
+    SELECT r.version INTO v_version FROM sheet_rows r
+    WHERE r.sheet_id = p_sheet_id AND r.row_key = p_row_key;
+    RETURN QUERY SELECT (CASE WHEN v_version IS NULL THEN 'row_not_found' ELSE 'conflict' END)::TEXT, v_version;
+    RETURN;
+  END IF;
+
+  -- blob 모드: 시트 행 잠금 후 배열 위치를 찾아 해당 셀만 jsonb_set
+  SELECT s.version INTO v_sheet_version FROM sheets s WHERE s.id = p_sheet_id FOR UPDATE;
+
+  IF p_expected_version IS NOT NULL AND p_expected_version <> v_sheet_version THEN
+    RETURN QUERY SELECT 'conflict'::TEXT, v_sheet_version;
+    RETURN;
+  END IF;
+
+  SELECT (e.ord - 1)::INTEGER INTO v_index
+  FROM sheets s, jsonb_array_elements(s.rows) WITH ORDINALITY AS e(elem, ord)
+  WHERE s.id = p_sheet_id AND e.elem->>'id' = p_row_key
+  LIMIT 1;
+
+  IF v_index IS NULL THEN
+    RETURN QUERY SELECT 'row_not_found'::TEXT, v_sheet_version;
+    RETURN;
+  END IF;
+
+  UPDATE sheets s
+  SET rows = jsonb_set(s.rows, ARRAY[v_index::TEXT, p_column_id], p_value)
+  WHERE s.id = p_sheet_id
+  RETURNING s.version INTO v_version;
+
+  RETURN QUERY SELECT 'updated'::TEXT, v_version;
+END;
+$$;
+
+-- ============================================
+-- Storage Migration
+-- blob → rows: 배열 순서를 position으로 보존, 중복/누락된 row id는 보정
+-- rows → blob: 되돌리기 (프론트엔드가 sheets.rows를 직접 읽어야 하는 경우)
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_migrate_to_rows(p_sheet_id UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_mode TEXT;
+  v_count INTEGER;
+BEGIN
+  SELECT s.storage_mode INTO v_mode FROM sheets s WHERE s.id = p_sheet_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'sheet % not found', p_sheet_id;
+  END IF;
+  IF v_mode = 'rows' THEN
+    RETURN 0;
+  END IF;
+
+  INSERT INTO sheet_rows (sheet_id, row_key, cells)
+  SELECT
+    p_sheet_id,
+    CASE
+      WHEN e.elem->>'id' IS NULL THEN 'r' || e.ord
+      WHEN count(*) OVER (PARTITION BY e.elem->>'id') > 1 THEN (e.elem->>'id') || '_' || e.ord
+      ELSE e.elem->>'id'
+    END,
+    e.elem - 'id'
+  FROM sheets s, jsonb_array_elements(s.rows) WITH ORDINALITY AS e(elem, ord)
+  WHERE s.id = p_sheet_id
+  ORDER BY e.ord;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+
+  UPDATE sheets SET storage_mode = 'rows', rows = '[]' WHERE id = p_sheet_id;
+
+  RETURN v_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sheet_migrate_to_blob(p_sheet_id UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_mode TEXT;
+  v_rows JSONB;
+BEGIN
+  SELECT s.storage_mode INTO v_mode FROM sheets s WHERE s.id = p_sheet_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'sheet % not found', p_sheet_id;
+  END IF;
+  IF v_mode = 'blob' THEN
+    RETURN 0;
+  END IF;
+
+  SELECT coalesce(jsonb_agg(jsonb_build_object('id', r.row_key) || r.cells ORDER BY r.position), '[]')
+  INTO v_rows
+  FROM sheet_rows r WHERE r.sheet_id = p_sheet_id;
+
+  UPDATE sheets SET storage_mode = 'blob', rows = v_rows WHERE id = p_sheet_id;
+  DELETE FROM sheet_rows WHERE sheet_id = p_sheet_id;
+
+  RETURN jsonb_array_length(v_rows);
+END;
+$$;
+
+-- ============================================
+-- Enable Realtime
+-- ============================================
+ALTER PUBLICATION supabase_realtime ADD TABLE sheet_rows;
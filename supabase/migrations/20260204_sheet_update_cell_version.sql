@@ -0,0 +1,94 @@
+-- Sheet Update Cell: return sheet version
+-- 백엔드 시트 스냅샷 캐시가 셀 수정 후 캐시를 제자리 갱신할 수 있도록
+-- 행 버전과 함께 갱신된 시트 버전(sheets.version)도 반환
+
+DROP FUNCTION IF EXISTS sheet_update_cell(UUID, TEXT, TEXT, JSONB, INTEGER);
+
+-- ============================================
+-- Update Cell (both storage modes)
+-- rows 모드: p_expected_version은 행 버전, blob 모드: 시트 버전
+-- status: updated | conflict | row_not_found | sheet_not_found
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_update_cell(
+  p_sheet_id UUID,
+  p_row_key TEXT,
+  p_column_id TEXT,
+  p_value JSONB,
+  p_expected_version INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+  status TEXT,
+  version INTEGER,
+  sheet_version INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_mode TEXT;
+  v_sheet_version INTEGER;
+  v_index INTEGER;
+  v_version INTEGER;
+BEGIN
+  IF p_value IS NULL THEN
+    p_value := 'null'::JSONB;
+  END IF;
+
+  SELECT s.storage_mode, s.version INTO v_mode, v_sheet_version
+  FROM sheets s WHERE s.id = p_sheet_id;
+  IF NOT FOUND THEN
+    RETURN QUERY SELECT 'sheet_not_found'::TEXT, NULL::INTEGER, NULL::INTEGER;
+    RETURN;
+  END IF;
+
+  IF v_mode = 'rows' THEN
+    UPDATE sheet_rows r
+    SET cells = jsonb_set(r.cells, ARRAY[p_column_id], p_value),
+        version = r.version + 1
+    WHERE r.sheet_id = p_sheet_id
+      AND r.row_key = p_row_key
+      AND (p_expected_version IS NULL OR r.version = p_expected_version)
+    RETURNING r.version INTO v_version;
+
+    IF FOUND THEN
+      -- sheet_rows 트리거가 sheets.version을 올린 뒤의 값
+      SELECT s.version INTO v_sheet_version FROM sheets s WHERE s.id = p_sheet_id;
+      RETURN QUERY SELECT 'updated'::TEXT, v_version, v_sheet_version;
+      RETURN;
+    END IF;
+
+    SELECT r.version INTO v_version FROM sheet_rows r
+    WHERE r.sheet_id = p_sheet_id AND r.row_key = p_row_key;
+    RETURN QUERY SELECT
+      (CASE WHEN v_version IS NULL THEN 'row_not_found' ELSE 'conflict' END)::TEXT,
+      v_version,
+      v_sheet_version;
+    RETURN;
+  END IF;
+
+  -- blob 모드: 시트 행 잠금 후 배열 위치를 찾아 해당 셀만 jsonb_set
+  SELECT s.version INTO v_sheet_version FROM sheets s WHERE s.id = p_sheet_id FOR UPDATE;
+
+  IF p_expected_version IS NOT NULL AND p_expected_version <> v_sheet_version THEN
+    RETURN QUERY SELECT 'conflict'::TEXT, v_sheet_version, v_sheet_version;
+    RETURN;
+  END IF;
+
+  SELECT (e.ord - 1)::INTEGER INTO v_index
+  FROM sheets s, jsonb_array_elements(s.rows) WITH ORDINALITY AS e(elem, ord)
+  WHERE s.id = p_sheet_id AND e.elem->>'id' = p_row_key
+  LIMIT 1;
+
+  IF v_index IS NULL THEN
+    RETURN QUERY SELECT 'row_not_found'::TEXT, v_sheet_version, v_sheet_version;
+    RETURN;
+  END IF;
+
+  UPDATE sheets s
+  SET rows = jsonb_set(s.rows, ARRAY[v_index::TEXT, p_column_id], p_value)
+  WHERE s.id = p_sheet_id
+  RETURNING s.version INTO v_version;
+
+  RETURN QUERY SELECT 'updated'::TEXT, v_version, v_version;
+END;
+$$;
@@ -0,0 +1,68 @@
+-- Email Bulk Update
+-- 읽음 표시/라벨 변경을 id 목록 또는 필터로 한 번의 UPDATE로 처리 (email_bulk_mark_read, email_bulk_label)
+
+-- ============================================
+-- Labels Column
+-- ============================================
+ALTER TABLE email_messages
+  ADD COLUMN IF NOT EXISTS labels TEXT[] DEFAULT '{}'; -- ['청구서', '보관', ...]
+
+CREATE INDEX IF NOT EXISTS idx_email_messages_labels
+  ON email_messages USING gin(labels);
+
+-- ============================================
+-- Bulk Update
+-- 필터는 모두 AND. 실제로 값이 바뀌는 행만 갱신하고 그 수를 반환
+-- p_sender: 발신자 주소/이름 부분 일치 ('acme.com'으로 도메인 전체)
+-- ============================================
+CREATE OR REPLACE FUNCTION email_bulk_update(
+  p_account_id UUID,
+  p_email_ids UUID[] DEFAULT NULL,
+  p_sender TEXT DEFAULT NULL,
+  p_folder TEXT DEFAULT NULL,
+  p_category TEXT DEFAULT NULL,
+  p_received_after TIMESTAMPTZ DEFAULT NULL,
+  p_received_before TIMESTAMPTZ DEFAULT NULL,
+  p_is_read BOOLEAN DEFAULT NULL,
+  p_add_labels TEXT[] DEFAULT NULL,
+  p_remove_labels TEXT[] DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_sender TEXT;
+  v_updated INTEGER;
+BEGIN
+  -- LIKE 와일드카드 이스케이프
+  v_sender := '%' || replace(replace(replace(p_sender, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+
+  UPDATE email_messages m
+  SET
+    is_read = COALESCE(p_is_read, m.is_read),
+    labels = CASE
+      WHEN p_add_labels IS NULL AND p_remove_labels IS NULL THEN m.labels
+      ELSE ARRAY(
+        SELECT DISTINCT l
+        FROM unnest(COALESCE(m.labels, '{}') || COALESCE(p_add_labels, '{}')) AS l
+        WHERE l <> ALL(COALESCE(p_remove_labels, '{}'))
+        ORDER BY l
+      )
+    END
+  WHERE m.account_id = p_account_id
+    AND (p_email_ids IS NULL OR m.id = ANY(p_email_ids))
+    AND (p_sender IS NULL OR m.from_address ILIKE v_sender OR m.from_name ILIKE v_sender)
+    AND (p_folder IS NULL OR m.folder = p_folder)
+    AND (p_category IS NULL OR m.ai_category = p_category)
+    AND (p_received_after IS NULL OR m.received_at >= p_received_after)
+    AND (p_received_before IS NULL OR m.received_at < p_received_before)
+    AND (
+      (p_is_read IS NOT NULL AND m.is_read IS DISTINCT FROM p_is_read)
+      OR (p_add_labels IS NOT NULL AND NOT COALESCE(m.labels, '{}') @> p_add_labels)
+      OR (p_remove_labels IS NOT NULL AND COALESCE(m.labels, '{}') && p_remove_labels)
+    );
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
@@ -0,0 +1,40 @@
+-- Email Cluster Summaries
+-- email_summarize_inbox의 하루 단위 클러스터(스레드/발신자/카테고리) 요약 캐시
+-- fingerprint(포함된 메일 id + 중요도)가 같으면 LLM 호출 없이 재사용
+
+-- ============================================
+-- Email Cluster Summaries Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS email_cluster_summaries (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  account_id UUID NOT NULL REFERENCES email_accounts(id) ON DELETE CASCADE,
+
+  -- received_at 날짜 (UTC)
+  day DATE NOT NULL,
+  -- 'thread:<thread_id>', 'sender:<address>', 'category:<name>' (+ '#2' for split parts)
+  cluster_key TEXT NOT NULL,
+  fingerprint TEXT NOT NULL,
+
+  email_count INTEGER DEFAULT 0,
+  summary TEXT NOT NULL,
+  model TEXT,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+
+  CONSTRAINT email_cluster_summaries_key UNIQUE (account_id, day, cluster_key)
+);
+
+-- ============================================
+-- RLS Policies (same access as the parent account)
+-- ============================================
+ALTER TABLE email_cluster_summaries ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own email cluster summaries"
+  ON email_cluster_summaries FOR SELECT
+  USING (
+    EXISTS (
+      SELECT 1 FROM email_accounts
+      WHERE email_accounts.id = email_cluster_summaries.account_id
+      AND email_accounts.user_id = auth.uid()
+    )
+  );
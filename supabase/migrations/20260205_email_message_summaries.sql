@@ -0,0 +1,36 @@
+-- Email Message Summaries
+-- email_draft_reply가 스레드의 이전 메시지를 요약으로 압축할 때 만든 요약을 ai_summary에 일괄 저장
+
+-- ============================================
+-- Thread Lookup Index (account별 스레드 메시지 시간순)
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_email_messages_account_thread
+  ON email_messages(account_id, thread_id, received_at)
+  WHERE thread_id IS NOT NULL;
+
+-- ============================================
+-- Save Summaries (bulk)
+-- p_items: [{"id", "summary"}, ...] - 이미 요약이 있는 메시지는 그대로 둠
+-- ============================================
+CREATE OR REPLACE FUNCTION email_save_summaries(
+  p_items JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE email_messages m
+  SET ai_summary = r.summary
+  FROM jsonb_to_recordset(p_items) AS r(
+    id UUID,
+    summary TEXT
+  )
+  WHERE m.id = r.id
+    AND m.ai_summary IS NULL;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
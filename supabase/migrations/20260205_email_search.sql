@@ -0,0 +1,171 @@
+-- Email Search Index
+-- email_search의 subject/body_text/from_address ilike 순차 스캔을 tsvector + trigram (+ 선택적 pgvector) 검색 함수로 대체
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- ============================================
+-- Search Columns
+-- ============================================
+ALTER TABLE email_messages
+  -- 제목(A) > 발신자(B) > 본문(C) 가중치. 'simple' 설정은 한국어 어절을 그대로 보존하고
+  -- 검색 시 접두사 매칭('회의':*)으로 조사가 붙은 어절('회의를')도 찾음
+  ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(subject, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(from_name, '') || ' ' || coalesce(from_address, '')), 'B') ||
+    setweight(to_tsvector('simple', left(coalesce(body_text, ''), 100000)), 'C')
+  ) STORED,
+  -- text-embedding-3-small (subject + body 앞부분), 사전 분석 워커가 채움
+  ADD COLUMN IF NOT EXISTS embedding vector(1536);
+
+-- ============================================
+-- Indexes
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_email_messages_search_vector
+  ON email_messages USING gin(search_vector);
+
+-- 제목/발신자 부분 문자열 검색 ('acme' → billing@acme.com, '주간회의')
+CREATE INDEX IF NOT EXISTS idx_email_messages_subject_trgm
+  ON email_messages USING gin(subject gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_email_messages_from_trgm
+  ON email_messages USING gin(from_address gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_email_messages_embedding
+  ON email_messages USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+
+-- ============================================
+-- Search Function
+-- text_score: ts_rank_cd (0~1), 제목 word_similarity, 발신자 부분 일치(0.5) 중 큰 값
+-- vector_score: 코사인 유사도 (임베딩이 주어진 경우)
+-- score = p_text_weight * text_score + (1 - p_text_weight) * vector_score
+-- 검색어는 인자로만 전달되므로 PostgREST 필터 문법과 무관
+-- ============================================
+CREATE OR REPLACE FUNCTION search_email_messages(
+  p_account_id UUID,
+  p_query TEXT,
+  p_query_embedding vector(1536) DEFAULT NULL,
+  p_folder TEXT DEFAULT NULL,
+  p_match_count INTEGER DEFAULT 20,
+  p_text_weight FLOAT DEFAULT 0.5,
+  p_match_threshold FLOAT DEFAULT 0.3
+)
+RETURNS TABLE (
+  id UUID,
+  subject TEXT,
+  from_address TEXT,
+  from_name TEXT,
+  snippet TEXT,
+  received_at TIMESTAMPTZ,
+  folder TEXT,
+  text_score FLOAT,
+  vector_score FLOAT,
+  score FLOAT
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_tsquery tsquery;
+  v_pattern TEXT;
+  v_text_weight FLOAT;
+BEGIN
+  -- 검색어를 어절 단위 접두사 AND 쿼리로 변환
+  SELECT to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' & '))
+  INTO v_tsquery
+  FROM unnest(tsvector_to_array(to_tsvector('simple', coalesce(p_query, '')))) AS lexeme;
+
+  -- LIKE 와일드카드 이스케이프 (검색어 안의 %, _는 문자 그대로)
+  v_pattern := '%' || replace(replace(replace(coalesce(p_query, ''), '\', '\\'), '%', '\%'), '_', '\_') || '%';
+
+  v_text_weight := CASE WHEN p_query_embedding IS NULL THEN 1.0 ELSE p_text_weight END;
+
+  RETURN QUERY
+  WITH text_hits AS (
+    SELECT
+      m.id,
+      GREATEST(
+        CASE WHEN v_tsquery IS NOT NULL AND m.search_vector @@ v_tsquery
+          THEN ts_rank_cd(m.search_vector, v_tsquery, 1 | 32) ELSE 0 END,
+        word_similarity(p_query, coalesce(m.subject, '')),
+        CASE WHEN m.from_address ILIKE v_pattern THEN 0.5 ELSE 0 END
+      )::FLOAT AS text_score
+    FROM email_messages m
+    WHERE m.account_id = p_account_id
+      AND m.is_trash = false
+      AND (p_folder IS NULL OR m.folder = p_folder)
+      AND length(trim(coalesce(p_query, ''))) > 0
+      AND (
+        (v_tsquery IS NOT NULL AND m.search_vector @@ v_tsquery)
+        OR m.subject ILIKE v_pattern
+        OR m.from_address ILIKE v_pattern
+      )
+    ORDER BY text_score DESC, m.received_at DESC
+    LIMIT p_match_count * 5
+  ),
+  vector_hits AS (
+    SELECT
+      m.id,
+      (1 - (m.embedding <=> p_query_embedding))::FLOAT AS vector_score
+    FROM email_messages m
+    WHERE p_query_embedding IS NOT NULL
+      AND m.account_id = p_account_id
+      AND m.is_trash = false
+      AND m.embedding IS NOT NULL
+      AND (p_folder IS NULL OR m.folder = p_folder)
+      AND 1 - (m.embedding <=> p_query_embedding) >= p_match_threshold
+    ORDER BY m.embedding <=> p_query_embedding
+    LIMIT p_match_count * 5
+  ),
+  candidates AS (
+    SELECT
+      coalesce(t.id, v.id) AS id,
+      coalesce(t.text_score, 0) AS text_score,
+      coalesce(v.vector_score, 0) AS vector_score
+    FROM text_hits t
+    FULL OUTER JOIN vector_hits v ON v.id = t.id
+  )
+  SELECT
+    m.id,
+    m.subject,
+    m.from_address,
+    m.from_name,
+    m.snippet,
+    m.received_at,
+    m.folder,
+    c.text_score,
+    c.vector_score,
+    (v_text_weight * c.text_score + (1 - v_text_weight) * c.vector_score)::FLOAT AS score
+  FROM candidates c
+  JOIN email_messages m ON m.id = c.id
+  ORDER BY score DESC, m.received_at DESC
+  LIMIT p_match_count;
+END;
+$$;
+
+-- ============================================
+-- Save Embeddings (bulk)
+-- p_items: [{"id", "embedding": [1536 floats]}, ...]
+-- ============================================
+CREATE OR REPLACE FUNCTION email_save_embeddings(
+  p_items JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE email_messages m
+  SET embedding = (r.embedding::TEXT)::vector
+  FROM jsonb_to_recordset(p_items) AS r(
+    id UUID,
+    embedding JSONB
+  )
+  WHERE m.id = r.id;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
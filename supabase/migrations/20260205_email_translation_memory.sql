@@ -0,0 +1,40 @@
+-- Email Translation Memory
+-- 문단/문장 단위 번역 캐시: 같은 뉴스레터, 서명, 답장에 인용된 이전 메일은 LLM 없이 재사용
+-- 해시는 인용 표시('>')와 공백을 정규화한 원문 기준 (원문을 가진 사용자만 같은 해시를 만들 수 있음)
+
+-- ============================================
+-- Segment Translations Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS email_translation_segments (
+  target_language TEXT NOT NULL,
+  -- SHA-256 of the normalized source segment
+  segment_hash TEXT NOT NULL,
+  translation TEXT NOT NULL,
+  model TEXT,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+
+  PRIMARY KEY (target_language, segment_hash)
+);
+
+-- 백엔드(service role) 전용: 정책 없이 RLS만 활성화
+ALTER TABLE email_translation_segments ENABLE ROW LEVEL SECURITY;
+
+-- ============================================
+-- Lookup (POST body로 해시 목록 전달 - GET in() URL 길이 제한 회피)
+-- ============================================
+CREATE OR REPLACE FUNCTION email_lookup_segments(
+  p_target_language TEXT,
+  p_hashes TEXT[]
+)
+RETURNS TABLE (
+  segment_hash TEXT,
+  translation TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT s.segment_hash, s.translation
+  FROM email_translation_segments s
+  WHERE s.target_language = p_target_language
+    AND s.segment_hash = ANY(p_hashes);
+$$;
@@ -0,0 +1,44 @@
+-- Email Translations
+-- 백그라운드 워커가 미리 번역한 결과 저장 (email_translate는 먼저 여기서 조회)
+
+-- ============================================
+-- Email Translations Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS email_translations (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  email_id UUID NOT NULL REFERENCES email_messages(id) ON DELETE CASCADE,
+
+  -- Target language code (ko, en, ja, ...)
+  target_language TEXT NOT NULL,
+
+  -- Translated subject + body as one text (same output as email_translate)
+  translation TEXT NOT NULL,
+
+  model TEXT,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+
+  CONSTRAINT email_translations_email_language UNIQUE (email_id, target_language)
+);
+
+-- ============================================
+-- RLS Policies (same access as the parent message)
+-- ============================================
+ALTER TABLE email_translations ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own email translations"
+  ON email_translations FOR SELECT
+  USING (
+    EXISTS (
+      SELECT 1 FROM email_messages m
+      JOIN email_accounts a ON a.id = m.account_id
+      WHERE m.id = email_translations.email_id
+      AND a.user_id = auth.uid()
+    )
+  );
+
+-- ============================================
+-- Worker Queue Index (oldest unanalyzed first, across accounts)
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_email_messages_pending_analysis
+  ON email_messages(created_at)
+  WHERE ai_analyzed_at IS NULL;
@@ -0,0 +1,51 @@
+-- Email Batch Triage
+-- 여러 이메일을 한 번의 LLM 호출로 분류한 결과를 한 번의 UPDATE로 반영 (email_triage_batch)
+
+-- ============================================
+-- Action Items Column
+-- ============================================
+ALTER TABLE email_messages
+  ADD COLUMN IF NOT EXISTS ai_action_items JSONB DEFAULT '[]'; -- ["회신: 견적서 검토", ...]
+
+-- 미분석 메일 조회 (account별 최신순)
+CREATE INDEX IF NOT EXISTS idx_email_messages_unanalyzed
+  ON email_messages(account_id, received_at DESC)
+  WHERE ai_analyzed_at IS NULL;
+
+-- ============================================
+-- Apply Triage Results (bulk)
+-- p_results: [{"id", "priority", "sentiment", "category", "action_required", "action_items", "summary"}, ...]
+-- ============================================
+CREATE OR REPLACE FUNCTION email_apply_triage(
+  p_results JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE email_messages m
+  SET
+    ai_priority = r.priority,
+    ai_sentiment = r.sentiment,
+    ai_category = r.category,
+    ai_action_required = COALESCE(r.action_required, false),
+    ai_action_items = COALESCE(r.action_items, '[]'::JSONB),
+    ai_summary = COALESCE(r.summary, m.ai_summary),
+    ai_analyzed_at = NOW()
+  FROM jsonb_to_recordset(p_results) AS r(
+    id UUID,
+    priority TEXT,
+    sentiment TEXT,
+    category TEXT,
+    action_required BOOLEAN,
+    action_items JSONB,
+    summary TEXT
+  )
+  WHERE m.id = r.id;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
@@ -0,0 +1,123 @@
+-- Email Search: exact vector scan per account
+-- 전역 ivfflat 인덱스(기본 probes = 1)로 근사 검색한 뒤 account_id로 거르면 여러 계정이 섞인
+-- 테이블에서 한 계정의 의미 검색 결과가 자주 비어 있음
+-- → 계정(폴더) 메일만 골라 정확한 코사인 거리로 정렬. 메일함 규모(계정당 수만 통)에서는
+--   계정 인덱스 + 순차 거리 계산이 충분히 빠르고 결과 누락이 없음 (대신 계정당 메일 수에 비례해 느려짐)
+-- 이 함수만 쓰던 전역 ivfflat 인덱스는 쓰기 비용만 남으므로 제거
+
+DROP INDEX IF EXISTS idx_email_messages_embedding;
+
+-- ============================================
+-- Search Function
+-- text_score: ts_rank_cd (0~1), 제목 word_similarity, 발신자 부분 일치(0.5) 중 큰 값
+-- vector_score: 코사인 유사도 (임베딩이 주어진 경우, 계정 메일 전체 대상 정확 계산)
+-- score = p_text_weight * text_score + (1 - p_text_weight) * vector_score
+-- ============================================
+CREATE OR REPLACE FUNCTION search_email_messages(
+  p_account_id UUID,
+  p_query TEXT,
+  p_query_embedding vector(1536) DEFAULT NULL,
+  p_folder TEXT DEFAULT NULL,
+  p_match_count INTEGER DEFAULT 20,
+  p_text_weight FLOAT DEFAULT 0.5,
+  p_match_threshold FLOAT DEFAULT 0.3
+)
+RETURNS TABLE (
+  id UUID,
+  subject TEXT,
+  from_address TEXT,
+  from_name TEXT,
+  snippet TEXT,
+  received_at TIMESTAMPTZ,
+  folder TEXT,
+  text_score FLOAT,
+  vector_score FLOAT,
+  score FLOAT
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_tsquery tsquery;
+  v_pattern TEXT;
+  v_text_weight FLOAT;
+BEGIN
+  -- 검색어를 어절 단위 접두사 AND 쿼리로 변환
+  SELECT to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' & '))
+  INTO v_tsquery
+  FROM unnest(tsvector_to_array(to_tsvector('simple', coalesce(p_query, '')))) AS lexeme;
+
+  -- LIKE 와일드카드 이스케이프 (검색어 안의 %, _는 문자 그대로)
+  v_pattern := '%' || replace(replace(replace(coalesce(p_query, ''), '\', '\\'), '%', '\%'), '_', '\_') || '%';
+
+  v_text_weight := CASE WHEN p_query_embedding IS NULL THEN 1.0 ELSE p_text_weight END;
+
+  RETURN QUERY
+  WITH text_hits AS (
+    SELECT
+      m.id,
+      GREATEST(
+        CASE WHEN v_tsquery IS NOT NULL AND m.search_vector @@ v_tsquery
+          THEN ts_rank_cd(m.search_vector, v_tsquery, 1 | 32) ELSE 0 END,
+        word_similarity(p_query, coalesce(m.subject, '')),
+        CASE WHEN m.from_address ILIKE v_pattern THEN 0.5 ELSE 0 END
+      )::FLOAT AS text_score
+    FROM email_messages m
+    WHERE m.account_id = p_account_id
+      AND m.is_trash = false
+      AND (p_folder IS NULL OR m.folder = p_folder)
+      AND length(trim(coalesce(p_query, ''))) > 0
+      AND (
+        (v_tsquery IS NOT NULL AND m.search_vector @@ v_tsquery)
+        OR m.subject ILIKE v_pattern
+        OR m.from_address ILIKE v_pattern
+      )
+    ORDER BY text_score DESC, m.received_at DESC
+    LIMIT p_match_count * 5
+  ),
+  -- 계정 메일만 먼저 골라(idx_email_messages_account/folder) 정확한 거리 계산.
+  -- MATERIALIZED로 ivfflat 인덱스 스캔 후 account 필터가 적용되지 않도록 고정
+  account_vectors AS MATERIALIZED (
+    SELECT
+      m.id,
+      (1 - (m.embedding <=> p_query_embedding))::FLOAT AS vector_score
+    FROM email_messages m
+    WHERE p_query_embedding IS NOT NULL
+      AND m.account_id = p_account_id
+      AND m.is_trash = false
+      AND m.embedding IS NOT NULL
+      AND (p_folder IS NULL OR m.folder = p_folder)
+  ),
+  vector_hits AS (
+    SELECT a.id, a.vector_score
+    FROM account_vectors a
+    WHERE a.vector_score >= p_match_threshold
+    ORDER BY a.vector_score DESC
+    LIMIT p_match_count * 5
+  ),
+  candidates AS (
+    SELECT
+      coalesce(t.id, v.id) AS id,
+      coalesce(t.text_score, 0) AS text_score,
+      coalesce(v.vector_score, 0) AS vector_score
+    FROM text_hits t
+    FULL OUTER JOIN vector_hits v ON v.id = t.id
+  )
+  SELECT
+    m.id,
+    m.subject,
+    m.from_address,
+    m.from_name,
+    m.snippet,
+    m.received_at,
+    m.folder,
+    c.text_score,
+    c.vector_score,
+    (v_text_weight * c.text_score + (1 - v_text_weight) * c.vector_score)::FLOAT AS score
+  FROM candidates c
+  JOIN email_messages m ON m.id = c.id
+  ORDER BY score DESC, m.received_at DESC
+  LIMIT p_match_count;
+END;
+$$;
@@ -0,0 +1,14 @@
+-- Email Triage Failures
+-- 사전 분석 워커가 모델 응답에서 계속 빠지는 메일을 ai_analyzed_at 대신 별도 표시로 큐에서 제외
+-- (기본값 priority/sentiment를 분석 결과처럼 저장하지 않음 → email_analyze가 실시간 분석)
+
+ALTER TABLE email_messages
+  ADD COLUMN IF NOT EXISTS ai_triage_failed_at TIMESTAMPTZ;
+
+-- ============================================
+-- Worker Queue Index (oldest unanalyzed, not given up on)
+-- ============================================
+DROP INDEX IF EXISTS idx_email_messages_pending_analysis;
+CREATE INDEX IF NOT EXISTS idx_email_messages_pending_analysis
+  ON email_messages(created_at)
+  WHERE ai_analyzed_at IS NULL AND ai_triage_failed_at IS NULL;
@@ -0,0 +1,8 @@
+-- Project Documents Keyset Index without INCLUDE columns
+-- 20260203_project_documents_keyset.sql의 이전 정의는 title/summary/tags를 INCLUDE 해서
+-- 긴 summary나 태그 목록을 가진 문서가 btree 튜플 한도(~2704바이트)를 넘어 저장에 실패
+-- 이미 적용된 DB에서 고정 크기 키 컬럼만 가진 인덱스로 다시 생성
+
+DROP INDEX IF EXISTS idx_project_documents_project_keyset;
+CREATE INDEX IF NOT EXISTS idx_project_documents_project_keyset
+  ON project_documents (project_id, created_at DESC, id DESC);
@@ -0,0 +1,93 @@
+-- Sheet Update Cell: expected version is the sheet version in both storage modes
+-- 조회(ai_sheet_get/load_sheet) 결과에는 sheets.version만 있으므로 rows 모드도 행 버전 대신 시트 버전으로 충돌 검사
+-- 증분 컬럼 통계(20260208_sheet_column_stats.sql)가 이전 값을 빼도록 old_value도 반환하는 최종 정의
+
+DROP FUNCTION IF EXISTS sheet_update_cell(UUID, TEXT, TEXT, JSONB, INTEGER);
+
+-- ============================================
+-- Update Cell (both storage modes)
+-- p_expected_version / version: sheets.version (rows 모드도 동일)
+-- status: updated | conflict | row_not_found | sheet_not_found
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_update_cell(
+  p_sheet_id UUID,
+  p_row_key TEXT,
+  p_column_id TEXT,
+  p_value JSONB,
+  p_expected_version INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+  status TEXT,
+  version INTEGER,
+  sheet_version INTEGER,
+  old_value JSONB
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_mode TEXT;
+  v_sheet_version INTEGER;
+  v_index INTEGER;
+  v_version INTEGER;
+  v_old JSONB;
+BEGIN
+  IF p_value IS NULL THEN
+    p_value := 'null'::JSONB;
+  END IF;
+
+  -- 시트 행 잠금: 버전 비교와 셀 수정 사이에 다른 쓰기(행 추가 등)가 끼어들지 못하게 함
+  SELECT s.storage_mode, s.version INTO v_mode, v_sheet_version
+  FROM sheets s WHERE s.id = p_sheet_id
+  FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN QUERY SELECT 'sheet_not_found'::TEXT, NULL::INTEGER, NULL::INTEGER, NULL::JSONB;
+    RETURN;
+  END IF;
+
+  IF p_expected_version IS NOT NULL AND p_expected_version <> v_sheet_version THEN
+    RETURN QUERY SELECT 'conflict'::TEXT, v_sheet_version, v_sheet_version, NULL::JSONB;
+    RETURN;
+  END IF;
+
+  IF v_mode = 'rows' THEN
+    SELECT r.cells->p_column_id INTO v_old
+    FROM sheet_rows r
+    WHERE r.sheet_id = p_sheet_id AND r.row_key = p_row_key
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+      RETURN QUERY SELECT 'row_not_found'::TEXT, v_sheet_version, v_sheet_version, NULL::JSONB;
+      RETURN;
+    END IF;
+
+    UPDATE sheet_rows r
+    SET cells = jsonb_set(r.cells, ARRAY[p_column_id], p_value),
+        version = r.version + 1
+    WHERE r.sheet_id = p_sheet_id AND r.row_key = p_row_key;
+
+    -- sheet_rows 트리거가 sheets.version을 올린 뒤의 값
+    SELECT s.version INTO v_sheet_version FROM sheets s WHERE s.id = p_sheet_id;
+    RETURN QUERY SELECT 'updated'::TEXT, v_sheet_version, v_sheet_version, v_old;
+    RETURN;
+  END IF;
+
+  -- blob 모드: 배열 위치를 찾아 해당 셀만 jsonb_set
+  SELECT (e.ord - 1)::INTEGER, e.elem->p_column_id INTO v_index, v_old
+  FROM sheets s, jsonb_array_elements(s.rows) WITH ORDINALITY AS e(elem, ord)
+  WHERE s.id = p_sheet_id AND e.elem->>'id' = p_row_key
+  LIMIT 1;
+
+  IF v_index IS NULL THEN
+    RETURN QUERY SELECT 'row_not_found'::TEXT, v_sheet_version, v_sheet_version, NULL::JSONB;
+    RETURN;
+  END IF;
+
+  UPDATE sheets s
+  SET rows = jsonb_set(s.rows, ARRAY[v_index::TEXT, p_column_id], p_value)
+  WHERE s.id = p_sheet_id
+  RETURNING s.version INTO v_version;
+
+  RETURN QUERY SELECT 'updated'::TEXT, v_version, v_version, v_old;
+END;
+$$;
@@ -0,0 +1,141 @@
+-- Sheet Row/Column Counts
+-- 시트 목록 조회 시 시트마다 rows/columns 전체를 내려받아 개수를 세던 N+1 쿼리 제거
+-- row_count/column_count를 트리거로 유지
+-- sheet_rows(storage_mode, bump_sheets_version)와 sheet_update_cell/sheet_append_rows 정의 이후에 실행되어야 하므로
+-- 20260204_sheet_rows.sql, 20260206_sheet_update_cell_sheet_version.sql보다 뒤 파일명 사용
+
+-- ============================================
+-- Count Columns
+-- ============================================
+ALTER TABLE sheets
+  ADD COLUMN IF NOT EXISTS row_count INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS column_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE sheets s
+SET
+  column_count = jsonb_array_length(s.columns),
+  row_count = CASE
+    WHEN s.storage_mode = 'rows' THEN (SELECT count(*) FROM sheet_rows r WHERE r.sheet_id = s.id)
+    ELSE jsonb_array_length(s.rows)
+  END;
+
+-- 팀별 목록 (updated_at DESC 정렬)
+CREATE INDEX IF NOT EXISTS idx_sheets_team_updated ON sheets(team_id, updated_at DESC);
+
+-- ============================================
+-- Sheets: version + counts in one BEFORE trigger
+-- (rows/columns는 큰 JSONB라 비교를 한 번만 수행)
+-- ============================================
+CREATE OR REPLACE FUNCTION sync_sheet_metadata()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_rows_changed BOOLEAN;
+  v_columns_changed BOOLEAN;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    NEW.column_count := jsonb_array_length(NEW.columns);
+    IF NEW.storage_mode = 'blob' THEN
+      NEW.row_count := jsonb_array_length(NEW.rows);
+    END IF;
+    RETURN NEW;
+  END IF;
+
+  v_rows_changed := NEW.rows IS DISTINCT FROM OLD.rows;
+  v_columns_changed := NEW.columns IS DISTINCT FROM OLD.columns;
+
+  IF v_rows_changed OR v_columns_changed THEN
+    NEW.version := OLD.version + 1;
+  END IF;
+
+  IF v_columns_changed THEN
+    NEW.column_count := jsonb_array_length(NEW.columns);
+  END IF;
+
+  IF NEW.storage_mode = 'blob' AND (v_rows_changed OR OLD.storage_mode <> 'blob') THEN
+    NEW.row_count := jsonb_array_length(NEW.rows);
+  ELSIF NEW.storage_mode = 'rows' AND OLD.storage_mode <> 'rows' THEN
+    -- blob → rows 전환 직후 한 번만 계산, 이후는 sheet_rows 트리거가 증감
+    NEW.row_count := (SELECT count(*) FROM sheet_rows r WHERE r.sheet_id = NEW.id);
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_sheets_version ON sheets;
+DROP FUNCTION IF EXISTS bump_sheet_version();
+
+CREATE TRIGGER sync_sheets_metadata
+  BEFORE INSERT OR UPDATE ON sheets
+  FOR EACH ROW EXECUTE FUNCTION sync_sheet_metadata();
+
+-- ============================================
+-- Sheet Rows: adjust row_count per statement
+-- storage_mode = 'rows'인 시트만 (전환 중 삽입/삭제는 위 트리거가 처리)
+-- ============================================
+CREATE OR REPLACE FUNCTION adjust_sheet_row_count()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE sheets s
+  SET row_count = s.row_count + (CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END) * c.changed
+  FROM (
+    SELECT sheet_id, count(*) AS changed FROM changed_rows GROUP BY sheet_id
+  ) c
+  WHERE s.id = c.sheet_id AND s.storage_mode = 'rows';
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sheet_rows_adjust_count_insert
+  AFTER INSERT ON sheet_rows
+  REFERENCING NEW TABLE AS changed_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION adjust_sheet_row_count();
+
+CREATE TRIGGER sheet_rows_adjust_count_delete
+  AFTER DELETE ON sheet_rows
+  REFERENCING OLD TABLE AS changed_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION adjust_sheet_row_count();
+
+-- ============================================
+-- Append Rows: total from row_count instead of count(*)
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_append_rows(
+  p_sheet_id UUID,
+  p_rows JSONB
+)
+RETURNS TABLE (
+  status TEXT,
+  total_rows INTEGER,
+  version INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_mode TEXT;
+  v_total INTEGER;
+  v_version INTEGER;
+BEGIN
+  SELECT s.storage_mode INTO v_mode FROM sheets s WHERE s.id = p_sheet_id;
+  IF NOT FOUND THEN
+    RETURN QUERY SELECT 'sheet_not_found'::TEXT, NULL::INTEGER, NULL::INTEGER;
+    RETURN;
+  END IF;
+
+  IF v_mode = 'rows' THEN
+    INSERT INTO sheet_rows (sheet_id, row_key, cells)
+    SELECT p_sheet_id, e.elem->>'id', e.elem - 'id'
+    FROM jsonb_array_elements(p_rows) WITH ORDINALITY AS e(elem, ord)
+    ORDER BY e.ord;
+
+    SELECT s.row_count, s.version INTO v_total, v_version FROM sheets s WHERE s.id = p_sheet_id;
+  ELSE
+    UPDATE sheets s
+    SET rows = s.rows || p_rows
+    WHERE s.id = p_sheet_id
+    RETURNING s.row_count, s.version INTO v_total, v_version;
+  END IF;
+
+  RETURN QUERY SELECT 'appended'::TEXT, v_total, v_version;
+END;
+$$;
@@ -0,0 +1,117 @@
+-- Sheet Column Statistics
+-- 컬럼별 누적 통계(count/sum/m2/min/max/t-digest/상위 값)를 시트 옆에 저장하고
+-- 행 추가/셀 수정 시 증분 갱신 → 분석 시 전체 행 재계산 생략
+-- (sheets 행에 두면 저장할 때마다 updated_at/메타데이터 트리거가 돌아 별도 테이블 사용)
+-- sheet_get_column_stats(LANGUAGE sql)는 생성 시 본문을 검사하므로 sheets.version(20260204_sheet_rows.sql),
+-- sheets.row_count(20260207_sheet_counts.sql) 이후 파일명 사용
+-- 이전 셀 값(old_value)을 돌려주는 sheet_update_cell은 20260206_sheet_update_cell_sheet_version.sql에 정의
+
+-- ============================================
+-- Column Stats Table (1:1 with sheets)
+-- ============================================
+CREATE TABLE IF NOT EXISTS sheet_column_stats (
+  sheet_id UUID PRIMARY KEY REFERENCES sheets(id) ON DELETE CASCADE,
+
+  -- Per-column running aggregates keyed by column id
+  stats JSONB NOT NULL DEFAULT '{}',
+  -- Format: {"col1": {"count", "num_count", "sum", "m2", "min", "max", "digest", "top", ...}, ...}
+
+  -- sheets.version the stats describe (stale when it differs)
+  version INTEGER NOT NULL,
+
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- ============================================
+-- RLS Policies (same access as the parent sheet)
+-- ============================================
+ALTER TABLE sheet_column_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "sheet_column_stats_select" ON sheet_column_stats
+  FOR SELECT USING (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_column_stats.sheet_id)
+  );
+
+CREATE POLICY "sheet_column_stats_insert" ON sheet_column_stats
+  FOR INSERT WITH CHECK (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_column_stats.sheet_id)
+  );
+
+CREATE POLICY "sheet_column_stats_update" ON sheet_column_stats
+  FOR UPDATE USING (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_column_stats.sheet_id)
+  );
+
+CREATE POLICY "sheet_column_stats_delete" ON sheet_column_stats
+  FOR DELETE USING (
+    EXISTS (SELECT 1 FROM sheets s WHERE s.id = sheet_column_stats.sheet_id)
+  );
+
+-- ============================================
+-- Get Stats with the current sheet version/row count
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_get_column_stats(
+  p_sheet_id UUID
+)
+RETURNS TABLE (
+  sheet_version INTEGER,
+  row_count INTEGER,
+  stats JSONB,
+  stats_version INTEGER
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT s.version, s.row_count, c.stats, c.version
+  FROM sheets s
+  LEFT JOIN sheet_column_stats c ON c.sheet_id = s.id
+  WHERE s.id = p_sheet_id;
+$$;
+
+-- ============================================
+-- Save Stats (only if they describe the current sheet version)
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_save_column_stats(
+  p_sheet_id UUID,
+  p_stats JSONB,
+  p_version INTEGER
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM 1 FROM sheets s WHERE s.id = p_sheet_id AND s.version = p_version;
+  IF NOT FOUND THEN
+    RETURN FALSE;
+  END IF;
+
+  INSERT INTO sheet_column_stats (sheet_id, stats, version, updated_at)
+  VALUES (p_sheet_id, p_stats, p_version, NOW())
+  ON CONFLICT (sheet_id) DO UPDATE
+  SET stats = EXCLUDED.stats, version = EXCLUDED.version, updated_at = NOW();
+  RETURN TRUE;
+END;
+$$;
+
+-- ============================================
+-- Touch Stats: carry stats across a write that changed no cell values
+-- (컬럼 추가 등) p_version - 1 → p_version
+-- ============================================
+CREATE OR REPLACE FUNCTION sheet_touch_column_stats(
+  p_sheet_id UUID,
+  p_version INTEGER
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE sheet_column_stats c
+  SET version = p_version, updated_at = NOW()
+  FROM sheets s
+  WHERE c.sheet_id = p_sheet_id
+    AND s.id = c.sheet_id
+    AND c.version = p_version - 1
+    AND s.version = p_version;
+  RETURN FOUND;
+END;
+$$;